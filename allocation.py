@@ -0,0 +1,120 @@
+# allocation.py
+"""
+Batch room allocation from ranked preferences (room_preferences, migration 0011).
+
+Random serial dictatorship: students are put in a lottery order (seeded, so a
+run can be reproduced), and each in turn gets the cheapest room with a free
+place that matches their highest-ranked satisfiable preference. With all rooms
+ranking students by the same lottery this is the student-proposing deferred
+acceptance (stable) matching, and no student gains by misreporting.
+
+Rooms of each type are sorted by price once. A per-type cursor points at the
+cheapest room that still has a place; rooms only ever fill up, so it only
+moves forward, and each preference is checked in O(1) amortized time:
+O(rooms log rooms + students x preferences) per run.
+"""
+import random
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_PREFERENCES = 5
+ROOM_TYPES = ("single", "shared", "studio")
+
+
+def solve(rooms: Iterable[tuple], preferences: Dict[int, List[tuple]], order: Iterable[int]) -> Dict[int, tuple]:
+    """
+    rooms: (room_id, type, price_eur, free places)
+    preferences: user_id -> [(room_type, max_price_eur or None), ...], best first
+    order: user ids, highest priority first
+    Returns user_id -> (room_id, rank) for every student who got a room.
+    """
+    by_type: Dict[str, list] = {}
+    for room_id, room_type, price, free in sorted(rooms, key=lambda r: (r[2], r[0])):
+        if free > 0:
+            by_type.setdefault(room_type, []).append([room_id, price, free])
+    cursor = dict.fromkeys(by_type, 0)
+
+    out = {}
+    for user_id in order:
+        for rank, (room_type, max_price) in enumerate(preferences.get(user_id, ()), start=1):
+            slots = by_type.get(room_type)
+            if slots is None:
+                continue
+            i = cursor[room_type]
+            if i == len(slots):
+                continue  # every room of this type is full
+            slot = slots[i]
+            if max_price is not None and slot[1] > max_price:
+                continue  # the cheapest free room of this type is over budget
+            out[user_id] = (slot[0], rank)
+            slot[2] -= 1
+            if slot[2] == 0:
+                cursor[room_type] = i + 1
+            break
+    return out
+
+
+def allocate(db, seed: Optional[int] = None, dry_run: bool = False) -> dict:
+    """
+    Assign rooms to every student with preferences and no booking yet.
+
+    Reading rooms and preferences, solving and inserting the bookings happen
+    in one IMMEDIATE transaction, so nobody can join or leave in between and
+    the result is written all at once (or, with dry_run, not at all). A real
+    run also switches room_allocation back to "fcfs".
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 31)
+
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        rooms = db.execute(
+            """
+            SELECT r.id, r.type, r.price_eur,
+                   r.capacity - (SELECT COUNT(*) FROM room_bookings rb WHERE rb.room_id = r.id)
+            FROM rooms r
+            WHERE r.available = 1
+            """
+        ).fetchall()
+
+        preferences: Dict[int, List[Tuple[str, Optional[int]]]] = {}
+        rows = db.execute(
+            """
+            SELECT p.user_id, p.room_type, p.max_price_eur
+            FROM room_preferences p
+            WHERE NOT EXISTS (SELECT 1 FROM room_bookings rb WHERE rb.user_id = p.user_id)
+            ORDER BY p.user_id, p.rank
+            """
+        )
+        for user_id, room_type, max_price in rows:
+            preferences.setdefault(user_id, []).append((room_type, max_price))
+
+        order = sorted(preferences)
+        random.Random(seed).shuffle(order)
+        assigned = solve(rooms, preferences, order)
+
+        if dry_run:
+            db.rollback()
+        else:
+            now = datetime.now(timezone.utc).isoformat()
+            db.executemany(
+                "INSERT INTO room_bookings (room_id, user_id, created_at) VALUES (?, ?, ?)",
+                ((room_id, user_id, now) for user_id, (room_id, _) in assigned.items()),
+            )
+            db.execute("UPDATE admin_settings SET value = 'fcfs' WHERE key = 'room_allocation'")
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    by_rank: Dict[int, int] = {}
+    for _, rank in assigned.values():
+        by_rank[rank] = by_rank.get(rank, 0) + 1
+    return {
+        "seed": seed,
+        "dry_run": dry_run,
+        "students": len(preferences),
+        "assigned": len(assigned),
+        "unassigned": len(preferences) - len(assigned),
+        "by_rank": dict(sorted(by_rank.items())),
+    }
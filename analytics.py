@@ -0,0 +1,105 @@
+# analytics.py
+"""
+Admin analytics read from the stats_* summary tables (see migrations/0007_analytics.py).
+Triggers keep those tables current, so every query here is O(groups), not O(rows).
+"""
+from typing import Any, Dict, List, Optional
+
+REQUEST_STATUSES = ("pending", "accepted", "rejected")
+
+
+def occupancy(db) -> List[Dict[str, Any]]:
+    rows = db.execute(
+        """
+        SELECT room_type, price_band, rooms, capacity, booked
+        FROM stats_room_groups
+        WHERE rooms > 0
+        ORDER BY room_type, price_band
+        """
+    ).fetchall()
+
+    out = []
+    for r in rows:
+        capacity = int(r["capacity"])
+        booked = int(r["booked"])
+        out.append({
+            "room_type": r["room_type"],
+            "price_band": f"{int(r['price_band'])}-{int(r['price_band']) + 99}",
+            "rooms": int(r["rooms"]),
+            "capacity": capacity,
+            "booked": booked,
+            "occupancy_rate": round(booked / capacity, 4) if capacity else 0.0,
+        })
+    return out
+
+
+def registrations_over_time(db, event_id: Optional[int] = None, category: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Daily registration counts, per event and per category.
+    Optional filters narrow both series.
+    """
+    where = []
+    params = []
+    if event_id is not None:
+        where.append("event_id = ?")
+        params.append(event_id)
+    if category:
+        where.append("category = ?")
+        params.append(category)
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+
+    per_event = db.execute(
+        f"""
+        SELECT event_id, day, registrations
+        FROM stats_event_regs_daily
+        {where_sql}
+        ORDER BY event_id, day
+        """,
+        params,
+    ).fetchall()
+
+    per_category = db.execute(
+        f"""
+        SELECT category, day, SUM(registrations) AS registrations
+        FROM stats_event_regs_daily
+        {where_sql}
+        GROUP BY category, day
+        ORDER BY category, day
+        """,
+        params,
+    ).fetchall()
+
+    events: Dict[int, List[Dict[str, Any]]] = {}
+    for r in per_event:
+        if int(r["registrations"]) == 0:
+            continue
+        events.setdefault(int(r["event_id"]), []).append({"day": r["day"], "registrations": int(r["registrations"])})
+
+    categories: Dict[str, List[Dict[str, Any]]] = {}
+    for r in per_category:
+        if int(r["registrations"]) == 0:
+            continue
+        categories.setdefault(r["category"], []).append({"day": r["day"], "registrations": int(r["registrations"])})
+
+    return {
+        "by_event": [{"event_id": k, "series": v} for k, v in events.items()],
+        "by_category": [{"category": k, "series": v} for k, v in categories.items()],
+    }
+
+
+def request_funnel(db) -> Dict[str, Any]:
+    rows = db.execute("SELECT status, requests FROM stats_request_status").fetchall()
+    counts = {s: 0 for s in REQUEST_STATUSES}
+    for r in rows:
+        counts[r["status"]] = int(r["requests"])
+
+    submitted = sum(counts.values())
+    decided = counts["accepted"] + counts["rejected"]
+    return {
+        "submitted": submitted,
+        "pending": counts["pending"],
+        "accepted": counts["accepted"],
+        "rejected": counts["rejected"],
+        "decided_rate": round(decided / submitted, 4) if submitted else 0.0,
+        "acceptance_rate": round(counts["accepted"] / decided, 4) if decided else 0.0,
+    }
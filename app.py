@@ -1,17 +1,37 @@
 # app.py
+import json
 import os
 import sqlite3
 from datetime import datetime, timezone
 from typing import Optional
 
-import app as app
-from flask import Flask, jsonify, request, abort, render_template, redirect, session
+from flask import (Flask, Response, g, jsonify, request, abort, get_template_attribute, render_template, redirect,
+                   session, stream_with_context)
+from werkzeug.test import EnvironBuilder
+
+
+from db import SnapshotCopy, close_db, get_db, get_db_path, get_read_db, read_meta, write_meta
+import allocation
+import analytics
+import archive
+import changes
+import clock
+import fragments
+import info_bundle
+import migrate
+import queries
+from seed import SEED_VERSION, seed_if_empty
+from ratelimit import RateLimiter
+from sweeper import VerificationSweeper
+from changes import ChangeLogCompactor
+import auth
 
 
-from db import close_db, get_db, get_db_path, init_db
-from dto import RoomDto, EventDto, InfoPageDto
-from seed import seed_if_empty
-import auth
+DEFAULT_EVENT_MINUTES = 120
+MAX_EVENT_MINUTES = 7 * 24 * 60
+BATCH_MAX_REQUESTS = 25
+ROSTER_PAGE_SIZE = 100
+ROSTER_MAX_PAGE_SIZE = 1000
 
 
 def _now_iso() -> str:
@@ -24,18 +44,36 @@ def _session_role() -> str:
 
 
 def _ensure_db(app: Flask):
-    if not os.path.exists(get_db_path(app)):
-        init_db(app)
-
     db = sqlite3.connect(get_db_path(app))
     db.row_factory = sqlite3.Row
     db.execute("PRAGMA foreign_keys = ON;")
-    seed_if_empty(db)
-    db.close()
+    try:
+        # two small reads on a warm database; migrate/seed only when behind
+        if migrate.current_version(db) < migrate.latest_version():
+            migrate.migrate(db)
+            archive.upgrade(get_db_path(app))
+        meta = read_meta(db)
+        if meta.get("seed_version") != str(SEED_VERSION):
+            seed_if_empty(db)
+            write_meta(db, "seed_version", str(SEED_VERSION))
+    finally:
+        db.close()
 
 
 def _user_row(db, email: str):
-    return db.execute("SELECT email, role FROM users WHERE email = ?", (email,)).fetchone()
+    """
+    (id, email, role) for email. Looked up once per request: the auth checks
+    and the handler all resolve the same email.
+    """
+    cache = g.setdefault("users_by_email", {})
+    if email not in cache:
+        cache[email] = queries.fetch_one(db, "users.by_email", (email,))
+    return cache[email]
+
+
+def _user_id(db, email: str) -> Optional[int]:
+    u = _user_row(db, email) if email else None
+    return int(u["id"]) if u else None
 
 
 def _require_student(db, _ignored_email_param=None) -> Optional[str]:
@@ -70,74 +108,385 @@ def _require_admin(db, _ignored_email_param=None) -> Optional[str]:
 
 
 
-def _room_dto_from_row(row) -> RoomDto:
-    booked = int(row["booked_count"])
-    capacity = int(row["capacity"])
-    remaining = max(0, capacity - booked)
-    is_full = remaining == 0
-
-    return RoomDto(
-        id=int(row["id"]),
-        type=row["type"],
-        title=row["title"],
-        description=row["description"],
-        price_eur=int(row["price_eur"]),
-        capacity=capacity,
-        available=bool(row["available"]),
-        booked_count=booked,
-        remaining=remaining,
-        is_full=is_full,
-    )
-
-
-
-def _event_dto_from_row(row) -> EventDto:
-    registered = int(row["registered_count"])
-    quota = row["quota"]
-    quota_val = None if quota is None else int(quota)
-
-    if quota_val is None:
-        remaining = None
-        is_full = False
-    else:
-        remaining = max(0, quota_val - registered)
-        is_full = remaining == 0
-
-    return EventDto(
-        id=int(row["id"]),
-        title=row["title"],
-        category=row["category"],
-        date_time=row["date_time"],
-        location=row["location"],
-        description=row["description"],
-        quota=quota_val,
-        registered_count=registered,
-        remaining=remaining,
-        is_full=is_full,
-    )
-
-
-def _info_dto(row) -> InfoPageDto:
-    return InfoPageDto(
-        id=int(row["id"]),
-        slug=row["slug"],
-        title=row["title"],
-        content=row["content"],
-    )
+def _retry_response(error: str, retry_in: int):
+    resp = jsonify({"error": error, "retry_in_seconds": retry_in})
+    resp.status_code = 429
+    resp.headers["Retry-After"] = str(max(1, int(retry_in)))
+    return resp
 
 
 def _get_setting(db, key: str, default: str = "0") -> str:
-    row = db.execute("SELECT value FROM admin_settings WHERE key = ?", (key,)).fetchone()
+    row = queries.fetch_one(db, "settings.get", (key,))
     return row["value"] if row else default
 
 
-def create_app():
-    app = Flask(__name__, instance_relative_config=True)
+def _page_args(default_size: int = 4):
+    """
+    ((page, page_size), None) from the query string, or (None, error message).
+    Out-of-range values fall back to the defaults.
+    """
+    try:
+        page = int(request.args.get("page", "1"))
+        page_size = int(request.args.get("page_size", str(default_size)))
+    except ValueError:
+        return None, "page and page_size must be integers"
+    if page < 1:
+        page = 1
+    if page_size < 1 or page_size > 50:
+        page_size = default_size
+    return (page, page_size), None
+
+
+def _include_archived() -> bool:
+    return request.args.get("include_archived") in ("1", "true")
+
+
+def _list_rooms(db) -> list:
+    return [r.to_dict() for r in queries.fetch_all(db, "rooms.list")]
+
+
+def _event_filter():
+    """
+    EventFilter from the query string, or (None, error message).
+    when: upcoming (default) | past | all; category; from/to: ISO date or
+    date-time, from inclusive, to exclusive; has_seats=1.
+    """
+    when = (request.args.get("when") or "upcoming").strip().lower()
+    if when not in ("upcoming", "past", "all"):
+        return None, "when must be upcoming, past or all"
+
+    bounds = {}
+    for arg in ("from", "to"):
+        value = (request.args.get(arg) or "").strip()
+        if not value:
+            bounds[arg] = None
+            continue
+        try:
+            bounds[arg] = clock.wall_ts(clock.parse_wall(value))
+        except ValueError:
+            return None, f"{arg} must be an ISO date (YYYY-MM-DD) or date-time (YYYY-MM-DDTHH:MM)"
+
+    return queries.EventFilter(
+        when=when,
+        category=(request.args.get("category") or "").strip().lower() or None,
+        date_from=bounds["from"],
+        date_to=bounds["to"],
+        has_seats=request.args.get("has_seats") in ("1", "true"),
+    ), None
+
+
+def _event_facets(rows, f) -> tuple:
+    """
+    Facet counts from the (category, upcoming, has_seats, n) rows of the
+    events.facets query. Each facet counts events matching all the other
+    active filters. Also returns the total for the current filter.
+    """
+    def when_ok(upcoming):
+        return f.when == "all" or (f.when == "upcoming") == bool(upcoming)
+
+    categories = {}
+    when = {"upcoming": 0, "past": 0}
+    has_seats = 0
+    total = 0
+    for r in rows:
+        cat_ok = not f.category or r["category"] == f.category
+        seats_ok = not f.has_seats or r["has_seats"]
+        n = int(r["n"])
+        if when_ok(r["upcoming"]) and seats_ok:
+            categories[r["category"]] = categories.get(r["category"], 0) + n
+        if cat_ok and seats_ok:
+            when["upcoming" if r["upcoming"] else "past"] += n
+        if when_ok(r["upcoming"]) and cat_ok and r["has_seats"]:
+            has_seats += n
+        if when_ok(r["upcoming"]) and cat_ok and seats_ok:
+            total += n
+    when["all"] = when["upcoming"] + when["past"]
+
+    return {"when": when, "category": dict(sorted(categories.items())), "has_seats": has_seats}, total
+
+
+def _events_page(db, page: int, page_size: int, user_id: Optional[int] = None, f=None) -> dict:
+    """
+    One page of events matching f, with facet counts. With user_id, each item
+    also carries is_registered, computed in the same query.
+    """
+    f = f or queries.EventFilter()
+    now = clock.wall_now_ts()
+    offset = (page - 1) * page_size
+
+    name, params = queries.event_facets_query(f, now)
+    facets, total = _event_facets(queries.fetch_all(db, name, params), f)
+
+    name, params = queries.events_page_query(f, now, user_id)
+    events = queries.fetch_all(db, name, (*params, page_size, offset))
+
+    return {
+        "items": [e.to_dict() for e in events],
+        "page": page,
+        "page_size": page_size,
+        "has_prev": page > 1,
+        "has_next": (offset + page_size) < total,
+        "total": total,
+        "filters": {
+            "when": f.when,
+            "category": f.category,
+            "from": None if f.date_from is None else clock.wall_iso(f.date_from),
+            "to": None if f.date_to is None else clock.wall_iso(f.date_to),
+            "has_seats": f.has_seats,
+        },
+        "facets": facets,
+    }
+
+
+def _my_events(db, user_id: int) -> list:
+    return [e.to_dict() for e in queries.fetch_all(db, "events.by_user", (user_id,))]
+
+
+def _conflict_dicts(rows) -> list:
+    return [
+        {
+            "id": int(r["id"]),
+            "title": r["title"],
+            "date_time": r["date_time"],
+            "duration_minutes": r["duration_minutes"],
+            "location": r["location"],
+        }
+        for r in rows
+    ]
+
+
+def _schedule_conflicts(db, event_id: int, user_id: int) -> list:
+    """
+    Events the student is registered for that overlap event_id. One R*Tree
+    search over the overlapping events, not a scan of their registrations.
+    """
+    ev = queries.fetch_one(db, "events.times", (event_id,))
+    if not ev or ev["starts_at"] is None:
+        return []
+    rows = queries.fetch_all(db, "events.conflicts_for_user", (ev["starts_at"], ev["ends_at"], event_id, user_id))
+    return _conflict_dicts(rows)
+
+
+def _dashboard(db, email: str, user_id: int, page: int, page_size: int, f) -> dict:
+    """
+    Everything the student rooms/events pages need, read in one transaction
+    so all parts come from the same snapshot. "version" is the change_log
+    version of that snapshot (see /api/changes).
+    """
+    db.execute("BEGIN")
+    try:
+        version = changes.current_version(db)
+        rooms_open = _get_setting(db, "rooms_open", "1") == "1"
+        room_allocation = _get_setting(db, "room_allocation", "fcfs")
+        rooms = _list_rooms(db)
+        booking = queries.fetch_one(db, "room_bookings.room_of_user", (user_id,))
+        events = _events_page(db, page, page_size, user_id, f)
+        my_events = _my_events(db, user_id)
+        event_requests = _my_event_requests(db, user_id)
+    finally:
+        db.rollback()
+
+    my_room = None
+    if booking:
+        my_room = next((r for r in rooms if r["id"] == int(booking["room_id"])), None)
+
+    return {
+        "version": version,
+        "email": email,
+        "rooms_open": rooms_open,
+        "room_allocation": room_allocation,
+        "rooms": rooms,
+        "my_room": my_room,
+        "events": events,
+        "my_events": my_events,
+        "event_requests": event_requests,
+    }
+
+
+def _delta(rows: list, changed_ids) -> dict:
+    """Split changed ids into the rows that still exist and the deleted ids."""
+    found = {r["id"] for r in rows}
+    return {"upserted": rows, "deleted": sorted(set(changed_ids) - found)}
+
+
+def _roster_args():
+    """
+    (ids or None for all, offset, limit) from ?ids=1,2,3&offset=0&limit=100,
+    or an error message. offset/limit page inside each roster.
+    """
+    ids = None
+    raw = (request.args.get("ids") or "").strip()
+    try:
+        if raw:
+            ids = [int(x) for x in raw.split(",") if x.strip()]
+        offset = int(request.args.get("offset", "0"))
+        limit = int(request.args.get("limit", str(ROSTER_PAGE_SIZE)))
+    except ValueError:
+        return None, "ids, offset and limit must be integers"
+    if offset < 0 or not 0 < limit <= ROSTER_MAX_PAGE_SIZE:
+        return None, f"offset must be >= 0 and limit 1 to {ROSTER_MAX_PAGE_SIZE}"
+    return (ids, offset, limit), None
+
+
+def _rosters(cursor, kind: str, joined_key: str):
+    """
+    Group the (id, title, total, user_email, created_at) rows of a
+    rosters.* query, ordered by id, into one roster dict per room/event.
+    Yields as it goes, so a streamed response never holds all of them.
+    """
+    current = None
+    for r in cursor:
+        if current is None or current[f"{kind}_id"] != r["id"]:
+            if current is not None:
+                yield current
+            current = {f"{kind}_id": r["id"], f"{kind}_title": r["title"], "total": r["total"], "students": []}
+        if r["user_email"] is not None:
+            current["students"].append({"email": r["user_email"], joined_key: r["created_at"]})
+    if current is not None:
+        yield current
+
+
+def _batch_entry(resp, path: str) -> dict:
+    """
+    One /api/batch result. JSON bodies are embedded as they are; other
+    successful bodies (e.g. CSV) come back as text with their content type,
+    and error pages are reduced to their status line. Streamed responses are
+    refused, since the batch would have to buffer all of them.
+    """
+    if resp.is_json:
+        return {"status": resp.status_code, "body": resp.get_json(silent=True)}
+    if resp.status_code >= 400:
+        return {"status": resp.status_code, "body": {"error": resp.status}}
+    if resp.is_streamed:
+        resp.close()
+        return {"status": 400, "body": {"error": f"{path.split('?')[0]} streams its response and cannot be batched"}}
+    return {"status": resp.status_code, "content_type": resp.content_type, "body": resp.get_data(as_text=True)}
+
+
+def _promote_waitlist(db, event_id: int) -> int:
+    """
+    Move the head of the event's waitlist into its free places. Runs inside the
+    caller's write transaction; returns how many students were promoted.
+
+    Students registered for an overlapping event are skipped (the same check
+    as registering) and keep their place in the queue; GET .../waitlist tells
+    them why.
+    """
+    ev = queries.fetch_one(db, "events.quota", (event_id,))
+    if not ev or ev["quota"] is None:
+        return 0
+    free = int(ev["quota"]) - int(queries.fetch_one(db, "event_registrations.count", (event_id,))["c"])
+    if free <= 0:
+        return 0
+    now = _now_iso()
+    promoted = 0
+    for w in queries.fetch_all(db, "waitlist.queue", (event_id,)):
+        if promoted == free:
+            break
+        if _schedule_conflicts(db, event_id, w["user_id"]):
+            continue
+        queries.execute(db, "event_registrations.insert", (event_id, w["user_id"], now))
+        queries.execute(db, "waitlist.delete_by_id", (w["id"],))
+        promoted += 1
+    return promoted
+
+
+def _event_request_dict(r, include_requester: bool = False) -> dict:
+    out = {
+        "id": int(r["id"]),
+        "title": r["title"],
+        "category": r["category"],
+        "date_time": r["date_time"],
+        "duration_minutes": r["duration_minutes"],
+        "location": r["location"],
+        "description": r["description"],
+        "quota": (None if r["quota"] is None else int(r["quota"])),
+    }
+    if include_requester:
+        out["requested_by_email"] = r["requested_by_email"]
+    out.update({
+        "status": r["status"],
+        "admin_comment": r["admin_comment"],
+        "created_at": r["created_at"],
+        "updated_at": r["updated_at"],
+    })
+    return out
+
+
+def _my_event_requests(db, user_id: int) -> list:
+    rows = queries.fetch_all(db, "event_requests.visible_for_student", (user_id,))
+    return [_event_request_dict(r) for r in rows]
+
+
+def start_background_jobs(app: Flask):
+    for job in app.extensions.get("background_jobs", []):
+        job.start()
+
+
+def stop_background_jobs(app: Flask):
+    for job in app.extensions.get("background_jobs", []):
+        job.stop()
+
+
+def create_app(instance_path: Optional[str] = None, start_background: bool = True):
+    """
+    start_background=False leaves the sweeper/snapshot threads unstarted, for
+    pre-forking servers that load the app in the parent (see serve.py) and
+    start them per worker with start_background_jobs().
+    """
+    app = Flask(__name__, instance_path=instance_path, instance_relative_config=True)
     app.teardown_appcontext(close_db)
     app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key-change-me")
     with app.app_context():
         _ensure_db(app)
 
+    # In-memory throttling for auth/demo endpoints (checked before any DB access)
+    limiter = RateLimiter()
+
+    def _throttled(scope: str, email: str = ""):
+        retry_in = limiter.check(scope, request.remote_addr or "", email)
+        if retry_in:
+            return _retry_response("Too many requests. Please slow down.", retry_in)
+        return None
+
+    # Periodically delete expired verification codes (0 disables)
+    sweeper = VerificationSweeper(
+        get_db_path(app),
+        interval_seconds=float(os.environ.get("VERIFICATION_SWEEP_INTERVAL", "300")),
+    )
+    # Periodically drop change_log entries older than the retention (0 disables)
+    compactor = ChangeLogCompactor(
+        get_db_path(app),
+        retention_seconds=float(os.environ.get("CHANGE_LOG_RETENTION", "86400")),
+        interval_seconds=float(os.environ.get("CHANGE_LOG_COMPACT_INTERVAL", "600")),
+    )
+    app.extensions["background_jobs"] = [sweeper, compactor]
+
+    # Server-side rendered student pages (SSR=0 serves the JS-filled shells)
+    ssr = os.environ.get("SSR", "1") != "0"
+    fragment_cache = fragments.FragmentCache(int(os.environ.get("FRAGMENT_CACHE_SIZE", "512")))
+    app.extensions["fragment_cache"] = fragment_cache
+
+    # Optional periodically refreshed copy for admin reads (0 = read the live file)
+    snapshot = SnapshotCopy(
+        get_db_path(app),
+        interval_seconds=float(os.environ.get("ADMIN_SNAPSHOT_INTERVAL", "0")),
+    )
+    if snapshot.interval_seconds > 0:
+        app.extensions["db_snapshot"] = snapshot
+        app.extensions["background_jobs"].append(snapshot)
+
+    if start_background:
+        start_background_jobs(app)
+
+    def _info_bundle():
+        # built lazily on first use; info pages only change through the seed
+        bundle = app.extensions.get("info_bundle")
+        if bundle is None:
+            bundle = info_bundle.load_bundle(get_db(app))
+            app.extensions["info_bundle"] = bundle
+        return bundle
+
     # ---------------- Pages ----------------
     @app.get("/")
     def root_redirect():
@@ -159,13 +508,52 @@ def create_app():
     def demo_inbox_page():
         return render_template("demo_inbox.html")
 
+    def _student_page(template: str):
+        """
+        Rooms/events page with the student's dashboard rendered in (SSR=1,
+        the default). The payload is embedded as JSON for app.js to hydrate
+        from, so the page needs no API call before it is usable. Payload and
+        card lists come from the fragment cache, keyed on the change_log
+        version (and the minute, since events move from upcoming to past).
+        Anyone not logged in as a student gets the empty shell as before.
+        """
+        if not ssr or _session_role() != "student":
+            return render_template(template, initial=None)
+        pages, page_err = _page_args()
+        f, err = _event_filter()
+        db = get_db(app)
+        if page_err or err or _require_student(db):
+            return render_template(template, initial=None)
+        page, page_size = pages
+
+        email = _session_email()
+        user_id = _user_id(db, email)
+        version = changes.current_version(db)
+        minute = clock.wall_now_ts() // 60
+        key = (version, minute, user_id, page, page_size, f)
+        data = fragment_cache.get(("dashboard",) + key, lambda: _dashboard(db, email, user_id, page, page_size, f))
+
+        now = clock.wall_iso(minute * 60)
+        if template == "rooms.html":
+            cards = {"room_cards": fragment_cache.get(
+                ("room_cards", version),
+                lambda: get_template_attribute("_cards.html", "room_cards")(data["rooms"]),
+            )}
+        else:
+            cards = fragment_cache.get(("event_cards",) + key, lambda: {
+                "event_cards": get_template_attribute("_cards.html", "event_cards")(data["events"]["items"], now),
+                "my_event_cards": get_template_attribute("_cards.html", "my_event_cards")(data["my_events"], now),
+                "request_cards": get_template_attribute("_cards.html", "request_cards")(data["event_requests"]),
+            })
+        return render_template(template, initial=data, **cards)
+
     @app.get("/rooms")
     def rooms_page():
-        return render_template("rooms.html")
+        return _student_page("rooms.html")
 
     @app.get("/events")
     def events_page():
-        return render_template("events.html")
+        return _student_page("events.html")
 
     @app.get("/admin")
     def admin_page():
@@ -186,6 +574,10 @@ def create_app():
         if len(password) < 6:
             return jsonify({"error": "Password must be at least 6 characters"}), 400
 
+        limited = _throttled("register", email)
+        if limited:
+            return limited
+
         db = get_db(app)
         try:
             code, retry_in = auth.start_registration(db, email, password)
@@ -195,7 +587,7 @@ def create_app():
             return jsonify({"error": "Registration failed"}), 400
 
         if code == "":
-            return jsonify({"error": "Please wait before requesting a new code.", "retry_in_seconds": retry_in}), 429
+            return _retry_response("Please wait before requesting a new code.", retry_in)
 
         return jsonify({
             "message": "Verification created. Open /demo-inbox and click Verify (demo).",
@@ -217,6 +609,10 @@ def create_app():
         if not auth.is_allowed_email(email):
             return jsonify({"error": "Only @uni-bayreuth.de emails allowed"}), 400
 
+        limited = _throttled("resend", email)
+        if limited:
+            return limited
+
         db = get_db(app)
         try:
             code, retry_in = auth.resend_code(db, email)
@@ -228,7 +624,7 @@ def create_app():
             return jsonify({"error": "Resend failed"}), 400
 
         if code == "":
-            return jsonify({"error": "Please wait before resending.", "retry_in_seconds": retry_in}), 429
+            return _retry_response("Please wait before resending.", retry_in)
 
         return jsonify({
             "message": "Verification re-generated. Open /demo-inbox and click Verify (demo).",
@@ -247,7 +643,14 @@ def create_app():
             return jsonify({"error": "Code is required"}), 400
 
         db = get_db(app)
-        ok = auth.verify_code_and_create_user(db, email, code)
+        try:
+            ok = auth.verify_code_and_create_user(db, email, code)
+        except ValueError as e:
+            if str(e) == "CODE_EXPIRED":
+                return jsonify({"error": "Code expired. Please request a new one."}), 400
+            if str(e) == "TOO_MANY_ATTEMPTS":
+                return jsonify({"error": "Too many wrong codes. Please request a new one."}), 429
+            return jsonify({"error": "Verification failed"}), 400
         if not ok:
             return jsonify({"error": "Wrong code. Try again."}), 400
 
@@ -262,6 +665,10 @@ def create_app():
         if not auth.is_allowed_email(email):
             return jsonify({"error": "Invalid email domain"}), 400
 
+        limited = _throttled("login", email)
+        if limited:
+            return limited
+
         db = get_db(app)
         ok, role = auth.login(db, email, password)
         if not ok:
@@ -284,23 +691,22 @@ def create_app():
         if not email:
             return jsonify({"error": "email is required"}), 400
 
+        limited = _throttled("demo", email)
+        if limited:
+            return limited
+
         db = get_db(app)
-        row = db.execute(
-            """
-            SELECT email, created_at, last_sent_at
-            FROM email_verifications
-            WHERE email = ?
-            """,
-            (email,),
-        ).fetchone()
+        row = queries.fetch_one(db, "verifications.status", (email, auth.expiry_cutoff_ts()))
 
         if not row:
             return jsonify({"error": "No pending verification for this email"}), 404
 
         return jsonify({
             "email": row["email"],
-            "created_at": row["created_at"],
-            "last_sent_at": row["last_sent_at"],
+            "created_at": clock.iso(row["created_ts"]),
+            "last_sent_at": clock.iso(row["last_sent_ts"]),
+            "expires_at": auth.expires_at_iso(row["last_sent_ts"]),
+            "attempts_left": max(0, auth.MAX_VERIFY_ATTEMPTS - int(row["attempts"])),
         })
 
     @app.post("/api/demo/verify")
@@ -320,29 +726,20 @@ def create_app():
 
         db = get_db(app)
 
-        pending = db.execute(
-            "SELECT password_hash FROM email_verifications WHERE email = ?",
-            (email,),
-        ).fetchone()
+        pending = queries.fetch_one(db, "verifications.password_hash", (email, auth.expiry_cutoff_ts()))
         if not pending:
             return jsonify({"error": "No pending verification for this email"}), 404
 
         # If user exists, just remove pending
-        existing = db.execute("SELECT email FROM users WHERE email = ?", (email,)).fetchone()
+        existing = queries.fetch_one(db, "users.by_email", (email,))
         if existing:
-            db.execute("DELETE FROM email_verifications WHERE email = ?", (email,))
+            queries.execute(db, "verifications.delete", (email,))
             db.commit()
             return jsonify({"message": "Already verified"}), 200
 
         # Always create as student
-        db.execute(
-            """
-            INSERT INTO users (email, password_hash, role, created_at)
-            VALUES (?, ?, 'student', ?)
-            """,
-            (email, pending["password_hash"], _now_iso()),
-        )
-        db.execute("DELETE FROM email_verifications WHERE email = ?", (email,))
+        queries.execute(db, "users.insert_student", (email, pending["password_hash"], _now_iso()))
+        queries.execute(db, "verifications.delete", (email,))
         db.commit()
 
         return jsonify({"message": "Verified (demo). Student user created."}), 200
@@ -378,18 +775,117 @@ def create_app():
         else:
             return jsonify({"error": "open must be boolean (true/false) or '0'/'1'"}), 400
 
-        db.execute(
-            """
-            INSERT INTO admin_settings (key, value)
-            VALUES ('rooms_open', ?)
-            ON CONFLICT(key) DO UPDATE SET value = excluded.value
-            """,
-            (value,),
-        )
+        queries.execute(db, "settings.set", ("rooms_open", value))
         db.commit()
 
         return jsonify({"message": "Updated", "open": value == "1"}), 200
 
+    @app.get("/api/admin/settings/room_allocation")
+    def api_admin_get_room_allocation():
+        db = get_db(app)
+        err = _require_admin(db)
+        if err:
+            return jsonify({"error": err}), 401
+
+        return jsonify({"mode": _get_setting(db, "room_allocation", "fcfs")}), 200
+
+    @app.post("/api/admin/settings/room_allocation")
+    def api_admin_set_room_allocation():
+        """
+        mode "preferences" opens the preference window (direct joins are
+        refused); "fcfs" closes it. Running the allocation also closes it.
+        """
+        data = request.get_json(silent=True) or {}
+        mode = (data.get("mode") or "").strip().lower()
+
+        db = get_db(app)
+        err = _require_admin(db)
+        if err:
+            return jsonify({"error": err}), 401
+
+        if mode not in ("fcfs", "preferences"):
+            return jsonify({"error": "mode must be fcfs or preferences"}), 400
+
+        queries.execute(db, "settings.set", ("room_allocation", mode))
+        db.commit()
+        return jsonify({"message": "Updated", "mode": mode}), 200
+
+    @app.post("/api/admin/rooms/allocate")
+    def api_admin_allocate_rooms():
+        data = request.get_json(silent=True) or {}
+        seed = data.get("seed", None)
+        dry_run = bool(data.get("dry_run", False))
+
+        db = get_db(app)
+        err = _require_admin(db)
+        if err:
+            return jsonify({"error": err}), 401
+
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            return jsonify({"error": "seed must be an integer"}), 400
+
+        return jsonify(allocation.allocate(db, seed=seed, dry_run=dry_run))
+
+    @app.get("/api/admin/metrics/verifications")
+    def api_admin_verification_metrics():
+        admin_email = (request.args.get("admin_email") or "").strip().lower()
+        db = get_db(app)
+        err = _require_admin(db, admin_email)
+        if err:
+            return jsonify({"error": err}), 401
+
+        pending = queries.fetch_one(db, "verifications.counts", (auth.expiry_cutoff_ts(),))
+
+        return jsonify({
+            "table_rows": int(pending["total"]),
+            "expired_rows": int(pending["expired"]),
+            "sweeper": sweeper.stats(),
+        })
+
+    @app.get("/api/admin/archive")
+    def api_admin_archive_status():
+        db = get_db(app)
+        err = _require_admin(db)
+        if err:
+            return jsonify({"error": err}), 401
+        db = get_read_db(app, with_archive=True)
+
+        if not archive.is_attached(db):
+            return jsonify({"archived": {"events": 0, "event_registrations": 0, "event_requests": 0}})
+        return jsonify({"archived": archive.counts(db)})
+
+    @app.post("/api/admin/archive")
+    def api_admin_archive_run():
+        """
+        Move events before `before` (YYYY-MM-DD) and requests closed before it
+        into the archive, in batches.
+        """
+        data = request.get_json(silent=True) or {}
+        before = (data.get("before") or "").strip()
+
+        db = get_db(app)
+        err = _require_admin(db)
+        if err:
+            return jsonify({"error": err}), 401
+
+        try:
+            before_ts = clock.wall_ts(clock.parse_wall(before))
+        except ValueError:
+            return jsonify({"error": "before must be an ISO date (YYYY-MM-DD)"}), 400
+        if before_ts > clock.wall_now_ts():
+            return jsonify({"error": "before must not be in the future"}), 400
+
+        moved = archive.run(get_db_path(app), before)
+        return jsonify({"message": "Archived", "moved": moved})
+
+    @app.get("/api/admin/metrics/queries")
+    def api_admin_query_metrics():
+        db = get_db(app)
+        err = _require_admin(db)
+        if err:
+            return jsonify({"error": err}), 401
+        return jsonify({"queries": queries.stats(), "fragment_cache": fragment_cache.stats()})
+
     # ---------------- Demo Inbox API ----------------
     @app.get("/api/demo/last-code")
     def api_demo_last_code():
@@ -397,15 +893,12 @@ def create_app():
         if not email:
             return jsonify({"error": "email is required"}), 400
 
+        limited = _throttled("demo", email)
+        if limited:
+            return limited
+
         db = get_db(app)
-        row = db.execute(
-            """
-            SELECT code_plain AS code, created_at, last_sent_at
-            FROM email_verifications
-            WHERE email = ?
-            """,
-            (email,),
-        ).fetchone()
+        row = queries.fetch_one(db, "verifications.last_code", (email, auth.expiry_cutoff_ts()))
 
         if not row:
             return jsonify({"error": "No pending verification for this email"}), 404
@@ -413,8 +906,9 @@ def create_app():
         return jsonify({
             "email": email,
             "code": row["code"],
-            "created_at": row["created_at"],
-            "last_sent_at": row["last_sent_at"],
+            "created_at": clock.iso(row["created_ts"]),
+            "last_sent_at": clock.iso(row["last_sent_ts"]),
+            "expires_at": auth.expires_at_iso(row["last_sent_ts"]),
         })
 
     # ---------------- Rooms APIs ----------------
@@ -427,55 +921,21 @@ def create_app():
     @app.get("/api/rooms")
     def api_rooms():
         db = get_db(app)
-        rows = db.execute(
-            """
-            SELECT r.*,
-                   (SELECT COUNT(*) FROM room_bookings rb WHERE rb.room_id = r.id) AS booked_count
-            FROM rooms r
-            ORDER BY r.id
-            """
-        ).fetchall()
-        return jsonify([_room_dto_from_row(r).to_dict() for r in rows])
+        return jsonify(_list_rooms(db))
 
     @app.get("/api/me/room")
     def api_me_room():
         email = (request.args.get("email") or "").strip().lower()
         db = get_db(app)
 
-        if not email:
+        user_id = _user_id(db, email)
+        if user_id is None:
             return jsonify({"room": None})
 
-        row = db.execute(
-            """
-            SELECT r.*
-            FROM room_bookings rb
-            JOIN rooms r ON r.id = rb.room_id
-            WHERE rb.user_email = ?
-            """,
-            (email,),
-        ).fetchone()
-
-        if not row:
+        room = queries.fetch_one(db, "rooms.by_user", (user_id,))
+        if not room:
             return jsonify({"room": None})
-
-        booked = db.execute(
-            "SELECT COUNT(*) AS c FROM room_bookings WHERE room_id = ?",
-            (row["id"],),
-        ).fetchone()["c"]
-
-        dto = RoomDto(
-            id=int(row["id"]),
-            type=row["type"],
-            title=row["title"],
-            description=row["description"],
-            price_eur=int(row["price_eur"]),
-            capacity=int(row["capacity"]),
-            available=bool(row["available"]),
-            booked_count=int(booked),
-            remaining=max(0, int(row["capacity"]) - int(booked)),
-            is_full=(int(booked) >= int(row["capacity"])),
-        )
-        return jsonify({"room": dto.to_dict()})
+        return jsonify({"room": room.to_dict()})
 
 
 
@@ -487,72 +947,111 @@ def create_app():
         if err:
             return jsonify({"error": err}), 401
 
-        email = _session_email()
+        user_id = _user_id(db, _session_email())
 
         rooms_open = _get_setting(db, "rooms_open", "1") == "1"
         if not rooms_open:
             return jsonify({"error": "Room selection is closed by admin."}), 403
+        if _get_setting(db, "room_allocation", "fcfs") == "preferences":
+            return jsonify({"error": "Rooms are being assigned by preference. Submit your preferences instead."}), 409
 
-        existing = db.execute("SELECT room_id FROM room_bookings WHERE user_email = ?", (email,)).fetchone()
+        existing = queries.fetch_one(db, "room_bookings.room_of_user", (user_id,))
         if existing:
             return jsonify({"error": "You are already in a room. Leave it first to switch."}), 409
 
-        room = db.execute("SELECT id, capacity FROM rooms WHERE id = ?", (room_id,)).fetchone()
+        room = queries.fetch_one(db, "rooms.capacity", (room_id,))
         if not room:
             return jsonify({"error": "Room not found"}), 404
 
-        booked = db.execute("SELECT COUNT(*) AS c FROM room_bookings WHERE room_id = ?", (room_id,)).fetchone()["c"]
+        booked = queries.fetch_one(db, "room_bookings.count", (room_id,))["c"]
         if int(booked) >= int(room["capacity"]):
             return jsonify({"error": "Room is full"}), 409
 
         try:
-            db.execute(
-                "INSERT INTO room_bookings (room_id, user_email, created_at) VALUES (?, ?, ?)",
-                (room_id, email, _now_iso()),
-            )
+            queries.execute(db, "room_bookings.insert", (room_id, user_id, _now_iso()))
             db.commit()
         except sqlite3.IntegrityError:
+            db.rollback()
             return jsonify({"error": "You are already in a room. Leave it first to switch."}), 409
 
         return jsonify({"message": "Joined room"})
 
+    @app.get("/api/me/room-preferences")
+    def api_me_room_preferences():
+        db = get_db(app)
+        err = _require_student(db)
+        if err:
+            return jsonify({"error": err}), 401
+
+        rows = queries.fetch_all(db, "room_preferences.by_user", (_user_id(db, _session_email()),))
+        return jsonify({
+            "mode": _get_setting(db, "room_allocation", "fcfs"),
+            "preferences": [
+                {"rank": int(r["rank"]), "room_type": r["room_type"], "max_price_eur": r["max_price_eur"]}
+                for r in rows
+            ],
+        })
+
+    @app.put("/api/me/room-preferences")
+    def api_me_set_room_preferences():
+        """
+        Replace the student's ranked preferences, best first:
+        {"preferences": [{"room_type": "single", "max_price_eur": 350}, ...]}
+        """
+        data = request.get_json(silent=True) or {}
+        prefs = data.get("preferences")
+
+        db = get_db(app)
+        err = _require_student(db)
+        if err:
+            return jsonify({"error": err}), 401
+
+        if _get_setting(db, "room_allocation", "fcfs") != "preferences":
+            return jsonify({"error": "Room preferences are not being collected right now."}), 409
+
+        if not isinstance(prefs, list) or len(prefs) > allocation.MAX_PREFERENCES:
+            return jsonify({"error": f"preferences must be a list of at most {allocation.MAX_PREFERENCES}"}), 400
+        rows = []
+        for rank, p in enumerate(prefs, start=1):
+            room_type = (p.get("room_type") or "").strip().lower() if isinstance(p, dict) else ""
+            max_price = p.get("max_price_eur") if isinstance(p, dict) else None
+            if room_type not in allocation.ROOM_TYPES:
+                return jsonify({"error": f"preference {rank}: room_type must be single, shared or studio"}), 400
+            if max_price is not None and (isinstance(max_price, bool) or not isinstance(max_price, int)
+                                          or max_price < 0):
+                return jsonify({"error": f"preference {rank}: max_price_eur must be null or a non-negative integer"}), 400
+            rows.append((rank, room_type, max_price))
+
+        user_id = _user_id(db, _session_email())
+        now = _now_iso()
+        try:
+            queries.execute(db, "room_preferences.delete_for_user", (user_id,))
+            for rank, room_type, max_price in rows:
+                queries.execute(db, "room_preferences.insert", (user_id, rank, room_type, max_price, now))
+            db.commit()
+        except sqlite3.Error:
+            db.rollback()
+            raise
+
+        return jsonify({"message": "Preferences saved", "count": len(rows)})
+
     # ---------------- Events APIs (pagination) ----------------
     @app.get("/api/events")
     def api_events():
-        page = int(request.args.get("page", "1"))
-        page_size = int(request.args.get("page_size", "4"))
-        if page < 1:
-            page = 1
-        if page_size < 1 or page_size > 50:
-            page_size = 4
-
-        db = get_db(app)
-        total = db.execute("SELECT COUNT(*) AS c FROM events").fetchone()["c"]
-        offset = (page - 1) * page_size
-
-        rows = db.execute(
-            """
-            SELECT e.*,
-                   (SELECT COUNT(*) FROM event_registrations er WHERE er.event_id = e.id) AS registered_count
-            FROM events e
-            ORDER BY e.date_time ASC
-            LIMIT ? OFFSET ?
-            """,
-            (page_size, offset),
-        ).fetchall()
-
-        items = [_event_dto_from_row(r).to_dict() for r in rows]
-        has_prev = page > 1
-        has_next = (offset + page_size) < int(total)
+        pages, err = _page_args()
+        if err:
+            return jsonify({"error": err}), 400
+        page, page_size = pages
+        f, err = _event_filter()
+        if err:
+            return jsonify({"error": err}), 400
+        # ?personalize=1 adds is_registered for the logged-in student
+        db = get_db(app)
+        user_id = None
+        if request.args.get("personalize") == "1" and _session_role() == "student":
+            user_id = _user_id(db, _session_email())
 
-        return jsonify({
-            "items": items,
-            "page": page,
-            "page_size": page_size,
-            "has_prev": has_prev,
-            "has_next": has_next,
-            "total": int(total),
-        })
+        return jsonify(_events_page(db, page, page_size, user_id, f))
 
     @app.post("/api/events/<int:event_id>/register")
     def api_register_event(event_id: int):
@@ -562,28 +1061,33 @@ def create_app():
         if err:
             return jsonify({"error": err}), 401
 
-        email = _session_email()
+        user_id = _user_id(db, _session_email())
 
-        ev = db.execute("SELECT id, quota FROM events WHERE id = ?", (event_id,)).fetchone()
+        ev = queries.fetch_one(db, "events.quota", (event_id,))
         if not ev:
             return jsonify({"error": "Event not found"}), 404
 
-        registered = db.execute(
-            "SELECT COUNT(*) AS c FROM event_registrations WHERE event_id = ?",
-            (event_id,),
-        ).fetchone()["c"]
+        registered = queries.fetch_one(db, "event_registrations.count", (event_id,))["c"]
 
         quota = ev["quota"]
         if quota is not None and int(registered) >= int(quota):
-            return jsonify({"error": "Event is full"}), 409
+            return jsonify({"error": "Event is full. Join the waitlist to get the next free place.",
+                            "can_waitlist": True}), 409
+
+        # {"ignore_conflicts": true} registers anyway after the student saw the warning
+        if not (request.get_json(silent=True) or {}).get("ignore_conflicts"):
+            conflicts = _schedule_conflicts(db, event_id, user_id)
+            if conflicts:
+                return jsonify({"error": "This event overlaps with events you are registered for",
+                                "conflicts": conflicts}), 409
 
         try:
-            db.execute(
-                "INSERT INTO event_registrations (event_id, user_email, created_at) VALUES (?, ?, ?)",
-                (event_id, email, _now_iso()),
-            )
+            queries.execute(db, "event_registrations.insert", (event_id, user_id, _now_iso()))
+            # a place opened up some other way; do not keep a stale waitlist entry
+            queries.execute(db, "waitlist.delete", (event_id, user_id))
             db.commit()
         except sqlite3.IntegrityError:
+            db.rollback()
             return jsonify({"error": "You are already registered for this event"}), 409
 
         return jsonify({"message": "Registered"})
@@ -606,8 +1110,8 @@ def create_app():
         if not rooms_open:
             return jsonify({"error": "Room selection is closed by admin. You cannot leave your room now."}), 403
 
-        email = _session_email()
-        db.execute("DELETE FROM room_bookings WHERE user_email = ?", (email,))
+        user_id = _user_id(db, _session_email())
+        queries.execute(db, "room_bookings.delete_for_user", (user_id,))
         db.commit()
         return jsonify({"message": "Left room"})
 
@@ -620,29 +1124,148 @@ def create_app():
         if err:
             return jsonify({"error": err}), 401
 
-        rows = db.execute(
-            """
-            SELECT e.*,
-                   (SELECT COUNT(*) FROM event_registrations er WHERE er.event_id = e.id) AS registered_count
-            FROM event_registrations my
-            JOIN events e ON e.id = my.event_id
-            WHERE my.user_email = ?
-            ORDER BY e.date_time ASC
-            """,
-            (email,),
-        ).fetchall()
+        user_id = _user_id(db, email)
+        return jsonify(_my_events(db, user_id) if user_id is not None else [])
+
+    @app.post("/api/batch")
+    def api_batch():
+        """
+        Several API calls in one round trip:
+          {"requests": [{"method": "GET", "path": "/api/admin/rooms"},
+                        {"method": "POST", "path": "/api/...", "body": {...}}]}
+        -> {"responses": [{"status": 200, "body": ...}, ...]} in the same order.
+
+        Sub-requests are dispatched to the normal routes inside this request's
+        app context, so they share its database connections (and the admin
+        read snapshot) and the user row looked up once below (see _user_row).
+        Each one still runs its route's own role check.
+        """
+        err = _require_logged_in()
+        if err:
+            return jsonify({"error": err}), 401
+        db = get_db(app)
+        if not _user_row(db, _session_email()):
+            return jsonify({"error": "User not found."}), 401
+
+        subs = (request.get_json(silent=True) or {}).get("requests")
+        if not isinstance(subs, list) or not subs or len(subs) > BATCH_MAX_REQUESTS:
+            return jsonify({"error": f"requests must be a list of 1 to {BATCH_MAX_REQUESTS} calls"}), 400
+
+        headers = {"Cookie": request.headers.get("Cookie", "")}
+        environ_base = {"REMOTE_ADDR": request.remote_addr or ""}
+        out = []
+        for sub in subs:
+            method = (sub.get("method") or "GET").upper() if isinstance(sub, dict) else ""
+            path = (sub.get("path") or "") if isinstance(sub, dict) else ""
+            if method not in ("GET", "POST", "PUT", "DELETE") or not path.startswith("/api/"):
+                out.append({"status": 400, "body": {"error": "Each call needs a method and an /api/ path"}})
+                continue
+            if path.startswith(("/api/batch", "/api/auth/")):
+                # no nesting; login/logout would change the session of the whole batch
+                out.append({"status": 400, "body": {"error": f"{path.split('?')[0]} cannot be batched"}})
+                continue
+
+            body = sub.get("body")
+            builder = EnvironBuilder(path=path, method=method, headers=headers, environ_base=environ_base,
+                                     json=body if body is not None and method != "GET" else None)
+            with app.request_context(builder.get_environ()):
+                try:
+                    resp = app.full_dispatch_request()
+                except Exception:
+                    app.logger.exception("batch call %s %s failed", method, path)
+                    resp = jsonify({"error": "Internal server error"})
+                    resp.status_code = 500
+            if db.in_transaction:
+                # the next call shares this connection; a handler that returned
+                # early (e.g. on IntegrityError) may have left its transaction open
+                db.rollback()
+            out.append(_batch_entry(resp, path))
+
+        return jsonify({"responses": out})
+
+    @app.get("/api/changes")
+    def api_changes():
+        """
+        What changed after ?since=<version>: current rows plus deleted ids per
+        list. Without since, or when since is older than the compacted part of
+        the log, answers "reset": reload the full lists, then continue from
+        "version".
+        """
+        db = get_db(app)
+        role = _session_role()
+        err = _require_admin(db) if role == "admin" else _require_student(db)
+        if err:
+            return jsonify({"error": err}), 401
+        user_id = _user_id(db, _session_email())
+
+        try:
+            since = int(request.args["since"]) if "since" in request.args else None
+        except ValueError:
+            return jsonify({"error": "since must be an integer version"}), 400
+
+        db.execute("BEGIN")
+        try:
+            version = changes.current_version(db)
+            if since is None or since < changes.compacted_through(db) or since > version:
+                return jsonify({"version": version, "reset": True})
+            ids = changes.changed_ids(db, since, version)
+
+            out = {"version": version, "reset": False}
+            if ids["room"]:
+                rooms = [r.to_dict() for r in queries.fetch_all(db, "rooms.by_ids", (json.dumps(ids["room"]),))]
+                out["rooms"] = _delta(rooms, ids["room"])
+            if ids["event"]:
+                if role == "admin":
+                    rows = queries.fetch_all(db, "events.by_ids", (json.dumps(ids["event"]),))
+                else:
+                    rows = queries.fetch_all(db, "events.by_ids_for_user", (user_id, json.dumps(ids["event"])))
+                out["events"] = _delta([e.to_dict() for e in rows], ids["event"])
+            if ids["event_request"]:
+                if role == "admin":
+                    rows = queries.fetch_all(db, "event_requests.by_ids", (json.dumps(ids["event_request"]),))
+                    reqs = [_event_request_dict(r, include_requester=True) for r in rows]
+                    out["event_requests"] = _delta(reqs, ids["event_request"])
+                else:
+                    rows = queries.fetch_all(
+                        db, "event_requests.visible_by_ids_for_student", (user_id, json.dumps(ids["event_request"]))
+                    )
+                    # other students' requests are neither shown nor reported as deleted;
+                    # own ones that got hidden are
+                    owners = {r["id"]: r["requested_by_id"] for r in queries.fetch_all(
+                        db, "event_requests.owners_by_ids", (json.dumps(ids["event_request"]),)
+                    )}
+                    mine = [i for i in ids["event_request"] if owners.get(i, user_id) == user_id]
+                    out["event_requests"] = _delta([_event_request_dict(r) for r in rows], mine)
+        finally:
+            db.rollback()
+
+        return jsonify(out)
+
+    @app.get("/api/me/dashboard")
+    def api_me_dashboard():
+        pages, err = _page_args()
+        if err:
+            return jsonify({"error": err}), 400
+        page, page_size = pages
+        f, err = _event_filter()
+        if err:
+            return jsonify({"error": err}), 400
+        db = get_db(app)
+
+        err = _require_student(db)
+        if err:
+            return jsonify({"error": err}), 401
 
-        items = [_event_dto_from_row(r).to_dict() for r in rows]
-        return jsonify(items)
+        email = _session_email()
+        return jsonify(_dashboard(db, email, _user_id(db, email), page, page_size, f))
 
     # ---------------- Info APIs ----------------
     @app.get("/api/info/<slug>")
     def api_info(slug):
-        db = get_db(app)
-        row = db.execute("SELECT * FROM info_pages WHERE slug = ?", (slug,)).fetchone()
-        if not row:
+        entry = _info_bundle().page(slug)
+        if entry is None:
             abort(404)
-        return jsonify(_info_dto(row).to_dict())
+        return info_bundle.respond(entry, request)
 
     @app.get("/info")
     def info_root_page():
@@ -651,19 +1274,7 @@ def create_app():
 
     @app.get("/api/info")
     def api_info_all():
-        db = get_db(app)
-        rows = db.execute(
-            "SELECT slug, title, content FROM info_pages ORDER BY slug"
-        ).fetchall()
-
-        items = []
-        for r in rows:
-            items.append({
-                "slug": r["slug"],
-                "title": r["title"],
-                "content": r["content"],
-            })
-        return jsonify(items)
+        return info_bundle.respond(_info_bundle().all(), request)
 
     # ---------------- Event Requests (student + admin) ----------------
     @app.get("/api/event-requests")
@@ -675,35 +1286,8 @@ def create_app():
         if err:
             return jsonify({"error": err}), 401
 
-        rows = db.execute(
-            """
-            SELECT er.*
-            FROM event_requests er
-            LEFT JOIN student_hidden_event_requests h
-              ON h.request_id = er.id AND h.student_email = er.requested_by_email
-            WHERE er.requested_by_email = ?
-              AND h.id IS NULL
-            ORDER BY er.created_at DESC
-            """,
-            (email,),
-        ).fetchall()
-
-        out = []
-        for r in rows:
-            out.append({
-                "id": int(r["id"]),
-                "title": r["title"],
-                "category": r["category"],
-                "date_time": r["date_time"],
-                "location": r["location"],
-                "description": r["description"],
-                "quota": (None if r["quota"] is None else int(r["quota"])),
-                "status": r["status"],
-                "admin_comment": r["admin_comment"],
-                "created_at": r["created_at"],
-                "updated_at": r["updated_at"],
-            })
-        return jsonify(out)
+        user_id = _user_id(db, email)
+        return jsonify(_my_event_requests(db, user_id) if user_id is not None else [])
 
     @app.post("/api/event-requests")
     def api_event_requests_create():
@@ -716,6 +1300,7 @@ def create_app():
         location = (data.get("location") or "").strip()
         description = (data.get("description") or "").strip()
         quota = data.get("quota", None)
+        duration = data.get("duration_minutes", DEFAULT_EVENT_MINUTES)
 
         db = get_db(app)
         err = _require_student(db, email)
@@ -725,6 +1310,14 @@ def create_app():
         if not title or category not in ("social", "orientation", "study_group") or not date_time or not location or not description:
             return jsonify({"error": "Invalid request fields"}), 400
 
+        try:
+            date_time = clock.parse_wall(date_time).strftime(clock.WALL_FORMAT)
+        except ValueError:
+            return jsonify({"error": "date_time must be an ISO date-time (YYYY-MM-DDTHH:MM)"}), 400
+
+        if isinstance(duration, bool) or not isinstance(duration, int) or not 0 < duration <= MAX_EVENT_MINUTES:
+            return jsonify({"error": f"duration_minutes must be an integer from 1 to {MAX_EVENT_MINUTES}"}), 400
+
         if quota is not None:
             try:
                 quota_int = int(quota)
@@ -734,14 +1327,15 @@ def create_app():
             except Exception:
                 return jsonify({"error": "Quota must be null or an integer"}), 400
 
+        user_id = _user_id(db, email)
+        if user_id is None:
+            return jsonify({"error": "User not found"}), 404
+
         now = _now_iso()
-        db.execute(
-            """
-            INSERT INTO event_requests
-              (title, category, date_time, location, description, quota, requested_by_email, status, admin_comment, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, 'pending', NULL, ?, ?)
-            """,
-            (title, category, date_time, location, description, quota, email, now, now),
+        queries.execute(
+            db,
+            "event_requests.insert",
+            (title, category, date_time, duration, location, description, quota, user_id, now, now),
         )
         db.commit()
         return jsonify({"message": "Event request created", "status": "pending"})
@@ -756,28 +1350,21 @@ def create_app():
         if err:
             return jsonify({"error": err}), 401
 
-        row = db.execute(
-            "SELECT id, requested_by_email, status FROM event_requests WHERE id = ?",
-            (req_id,),
-        ).fetchone()
+        row = queries.fetch_one(db, "event_requests.owner", (req_id,))
 
         if not row:
             return jsonify({"error": "Request not found"}), 404
-        if row["requested_by_email"] != email:
+        user_id = _user_id(db, email)
+        if user_id is None or row["requested_by_id"] != user_id:
             return jsonify({"error": "Not your request"}), 403
         if row["status"] == "pending":
             return jsonify({"error": "Pending requests cannot be hidden"}), 409
 
         try:
-            db.execute(
-                """
-                INSERT INTO student_hidden_event_requests (request_id, student_email, created_at)
-                VALUES (?, ?, ?)
-                """,
-                (req_id, email, _now_iso()),
-            )
+            queries.execute(db, "hidden_requests.insert", (req_id, user_id, _now_iso()))
             db.commit()
         except sqlite3.IntegrityError:
+            db.rollback()
             return jsonify({"message": "Already hidden"})
 
         return jsonify({"message": "Hidden"})
@@ -791,36 +1378,19 @@ def create_app():
         err = _require_admin(db, admin_email)
         if err:
             return jsonify({"error": err}), 401
+        with_archive = _include_archived()
+        db = get_read_db(app, with_archive=with_archive)
 
         if status not in ("pending", "accepted", "rejected"):
             status = "pending"
 
-        rows = db.execute(
-            """
-            SELECT *
-            FROM event_requests
-            WHERE status = ?
-            ORDER BY updated_at DESC
-            """,
-            (status,),
-        ).fetchall()
+        rows = queries.fetch_all(db, "event_requests.by_status", (status,))
+        out = [_event_request_dict(r, include_requester=True) for r in rows]
+
+        if with_archive and archive.is_attached(db):
+            for r in queries.fetch_all(db, "archive.event_requests.by_status", (status,)):
+                out.append(dict(_event_request_dict(r, include_requester=True), archived=True))
 
-        out = []
-        for r in rows:
-            out.append({
-                "id": int(r["id"]),
-                "title": r["title"],
-                "category": r["category"],
-                "date_time": r["date_time"],
-                "location": r["location"],
-                "description": r["description"],
-                "quota": (None if r["quota"] is None else int(r["quota"])),
-                "requested_by_email": r["requested_by_email"],
-                "status": r["status"],
-                "admin_comment": r["admin_comment"],
-                "created_at": r["created_at"],
-                "updated_at": r["updated_at"],
-            })
         return jsonify(out)
 
     @app.post("/api/admin/event-requests/<int:req_id>/decision")
@@ -835,7 +1405,7 @@ def create_app():
         if err:
             return jsonify({"error": err}), 401
 
-        req = db.execute("SELECT * FROM event_requests WHERE id = ?", (req_id,)).fetchone()
+        req = queries.fetch_one(db, "event_requests.by_id", (req_id,))
         if not req:
             return jsonify({"error": "Request not found"}), 404
 
@@ -847,41 +1417,41 @@ def create_app():
         if action == "reject":
             if not comment:
                 return jsonify({"error": "Rejection comment is required"}), 400
-            db.execute(
-                """
-                UPDATE event_requests
-                SET status = 'rejected', admin_comment = ?, updated_at = ?
-                WHERE id = ?
-                """,
-                (comment, now, req_id),
-            )
+            queries.execute(db, "event_requests.reject", (comment, now, req_id))
             db.commit()
             return jsonify({"message": "Rejected"})
 
         if req["status"] == "accepted":
             return jsonify({"message": "Already accepted"})
 
-        db.execute(
-            """
-            UPDATE event_requests
-            SET status = 'accepted', admin_comment = NULL, updated_at = ?
-            WHERE id = ?
-            """,
-            (now, req_id),
-        )
-        db.execute(
-            """
-            INSERT INTO events (title, category, date_time, location, description, quota, created_by_email, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+        # another event in the same place at the same time; {"ignore_conflicts": true} publishes anyway
+        if not data.get("ignore_conflicts"):
+            try:
+                starts_at = clock.wall_ts(clock.parse_wall(req["date_time"]))
+            except ValueError:
+                starts_at = None
+            if starts_at is not None:
+                rows = queries.fetch_all(
+                    db, "events.conflicts_at_location",
+                    (starts_at, starts_at + req["duration_minutes"] * 60, req["location"]),
+                )
+                if rows:
+                    return jsonify({"error": "Another event overlaps at this location",
+                                    "conflicts": _conflict_dicts(rows)}), 409
+
+        queries.execute(db, "event_requests.accept", (now, req_id))
+        queries.execute(
+            db,
+            "events.insert",
             (
                 req["title"],
                 req["category"],
                 req["date_time"],
+                req["duration_minutes"],
                 req["location"],
                 req["description"],
                 req["quota"],
-                req["requested_by_email"],
+                req["requested_by_id"],
                 now,
             ),
         )
@@ -895,16 +1465,9 @@ def create_app():
         err = _require_admin(db, admin_email)
         if err:
             return jsonify({"error": err}), 401
+        db = get_read_db(app)
 
-        rows = db.execute(
-            """
-            SELECT r.*,
-                   (SELECT COUNT(*) FROM room_bookings rb WHERE rb.room_id = r.id) AS booked_count
-            FROM rooms r
-            ORDER BY r.id
-            """
-        ).fetchall()
-        return jsonify([_room_dto_from_row(r).to_dict() for r in rows])
+        return jsonify(_list_rooms(db))
 
     @app.get("/api/admin/rooms/<int:room_id>/students")
     def api_admin_room_students(room_id: int):
@@ -913,24 +1476,35 @@ def create_app():
         err = _require_admin(db, admin_email)
         if err:
             return jsonify({"error": err}), 401
+        db = get_read_db(app)
 
-        room = db.execute("SELECT id, title FROM rooms WHERE id = ?", (room_id,)).fetchone()
+        room = queries.fetch_one(db, "rooms.title", (room_id,))
         if not room:
             return jsonify({"error": "Room not found"}), 404
 
-        rows = db.execute(
-            """
-            SELECT user_email, created_at
-            FROM room_bookings
-            WHERE room_id = ?
-            ORDER BY created_at ASC
-            """,
-            (room_id,),
-        ).fetchall()
+        rows = queries.fetch_all(db, "room_bookings.roster", (room_id,))
 
         students = [{"email": r["user_email"], "joined_at": r["created_at"]} for r in rows]
         return jsonify({"room_id": room_id, "room_title": room["title"], "students": students})
 
+    @app.get("/api/admin/analytics")
+    def api_admin_analytics():
+        admin_email = (request.args.get("admin_email") or "").strip().lower()
+        db = get_db(app)
+        err = _require_admin(db, admin_email)
+        if err:
+            return jsonify({"error": err}), 401
+        db = get_read_db(app)
+
+        event_id = request.args.get("event_id", type=int)
+        category = (request.args.get("category") or "").strip().lower() or None
+
+        return jsonify({
+            "occupancy": analytics.occupancy(db),
+            "registrations": analytics.registrations_over_time(db, event_id, category),
+            "request_funnel": analytics.request_funnel(db),
+        })
+
     @app.get("/api/admin/events")
     def api_admin_events():
         admin_email = (request.args.get("admin_email") or "").strip().lower()
@@ -938,17 +1512,15 @@ def create_app():
         err = _require_admin(db, admin_email)
         if err:
             return jsonify({"error": err}), 401
+        with_archive = _include_archived()
+        db = get_read_db(app, with_archive=with_archive)
 
-        rows = db.execute(
-            """
-            SELECT e.*,
-                   (SELECT COUNT(*) FROM event_registrations er WHERE er.event_id = e.id) AS registered_count
-            FROM events e
-            ORDER BY e.date_time ASC
-            """
-        ).fetchall()
-
-        return jsonify([_event_dto_from_row(r).to_dict() for r in rows])
+        out = []
+        if with_archive and archive.is_attached(db):
+            # archived events are all older than the live ones
+            out = [dict(e.to_dict(), archived=True) for e in queries.fetch_all(db, "archive.events.all")]
+        out.extend(e.to_dict() for e in queries.fetch_all(db, "events.all"))
+        return jsonify(out)
 
     @app.post("/api/events/<int:event_id>/leave")
     def api_leave_event(event_id: int):
@@ -958,15 +1530,92 @@ def create_app():
         if err:
             return jsonify({"error": err}), 401
 
-        email = _session_email()
+        user_id = _user_id(db, _session_email())
 
-        db.execute(
-            "DELETE FROM event_registrations WHERE event_id = ? AND user_email = ?",
-            (event_id, email),
-        )
+        # the freed place goes to the head of the waitlist in the same
+        # transaction, so nobody can register in between
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            left = queries.execute(db, "event_registrations.delete", (event_id, user_id)).rowcount
+            promoted = _promote_waitlist(db, event_id) if left else 0
+            db.commit()
+        except sqlite3.Error:
+            db.rollback()
+            raise
+
+        return jsonify({"message": "Left event", "promoted": promoted})
+
+    @app.get("/api/events/<int:event_id>/waitlist")
+    def api_waitlist_position(event_id: int):
+        db = get_db(app)
+
+        err = _require_student(db)
+        if err:
+            return jsonify({"error": err}), 401
+
+        user_id = _user_id(db, _session_email())
+
+        row = queries.fetch_one(db, "waitlist.position", (event_id, user_id))
+        if row:
+            # overlapping registrations make promotion skip this student
+            return jsonify({"registered": False, "position": row["position"], "waiting": row["waiting"],
+                            "conflicts": _schedule_conflicts(db, event_id, user_id)})
+        if queries.fetch_one(db, "event_registrations.exists", (event_id, user_id)):
+            # promoted (or registered directly)
+            return jsonify({"registered": True, "position": None})
+        return jsonify({"error": "You are not on the waitlist for this event"}), 404
+
+    @app.post("/api/events/<int:event_id>/waitlist")
+    def api_join_waitlist(event_id: int):
+        db = get_db(app)
+
+        err = _require_student(db)
+        if err:
+            return jsonify({"error": err}), 401
+
+        user_id = _user_id(db, _session_email())
+
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            ev = queries.fetch_one(db, "events.quota", (event_id,))
+            if not ev:
+                db.rollback()
+                return jsonify({"error": "Event not found"}), 404
+            if queries.fetch_one(db, "event_registrations.exists", (event_id, user_id)):
+                db.rollback()
+                return jsonify({"error": "You are already registered for this event"}), 409
+            registered = queries.fetch_one(db, "event_registrations.count", (event_id,))["c"]
+            if ev["quota"] is None or int(registered) < int(ev["quota"]):
+                db.rollback()
+                return jsonify({"error": "Event is not full, register instead"}), 409
+            try:
+                queries.execute(db, "waitlist.insert", (event_id, user_id, _now_iso()))
+            except sqlite3.IntegrityError:
+                db.rollback()
+                return jsonify({"error": "You are already on the waitlist for this event"}), 409
+            row = queries.fetch_one(db, "waitlist.position", (event_id, user_id))
+            db.commit()
+        except sqlite3.Error:
+            db.rollback()
+            raise
+
+        return jsonify({"message": "Added to waitlist", "position": row["position"], "waiting": row["waiting"],
+                        "conflicts": _schedule_conflicts(db, event_id, user_id)})
+
+    @app.delete("/api/events/<int:event_id>/waitlist")
+    def api_leave_waitlist(event_id: int):
+        db = get_db(app)
+
+        err = _require_student(db)
+        if err:
+            return jsonify({"error": err}), 401
+
+        user_id = _user_id(db, _session_email())
+
+        queries.execute(db, "waitlist.delete", (event_id, user_id))
         db.commit()
 
-        return jsonify({"message": "Left event"})
+        return jsonify({"message": "Left waitlist"})
 
     @app.get("/api/admin/events/<int:event_id>/students")
     def api_admin_event_students(event_id: int):
@@ -975,23 +1624,59 @@ def create_app():
         err = _require_admin(db, admin_email)
         if err:
             return jsonify({"error": err}), 401
-
-        ev = db.execute("SELECT id, title FROM events WHERE id = ?", (event_id,)).fetchone()
+        with_archive = _include_archived()
+        db = get_read_db(app, with_archive=with_archive)
+
+        archived = False
+        ev = queries.fetch_one(db, "events.title", (event_id,))
+        if not ev and with_archive and archive.is_attached(db):
+            ev = queries.fetch_one(db, "archive.events.title", (event_id,))
+            archived = True
         if not ev:
             return jsonify({"error": "Event not found"}), 404
 
-        rows = db.execute(
-            """
-            SELECT user_email, created_at
-            FROM event_registrations
-            WHERE event_id = ?
-            ORDER BY created_at ASC
-            """,
-            (event_id,),
-        ).fetchall()
+        roster = "archive.event_registrations.roster" if archived else "event_registrations.roster"
+        rows = queries.fetch_all(db, roster, (event_id,))
 
         students = [{"email": r["user_email"], "registered_at": r["created_at"]} for r in rows]
-        return jsonify({"event_id": event_id, "event_title": ev["title"], "students": students})
+        out = {"event_id": event_id, "event_title": ev["title"], "students": students}
+        if archived:
+            out["archived"] = True
+        return jsonify(out)
+
+    @app.get("/api/admin/rosters/<kind>")
+    def api_admin_rosters(kind: str):
+        """
+        Rosters of many rooms or events in one query (kind: rooms | events):
+        ?ids=1,2,3 (default: all), offset/limit page inside each roster, and
+        every roster carries its total. ?stream=1 sends one JSON roster per
+        line (application/x-ndjson) as rows are read. Live tables only.
+        """
+        admin_email = (request.args.get("admin_email") or "").strip().lower()
+        db = get_db(app)
+        err = _require_admin(db, admin_email)
+        if err:
+            return jsonify({"error": err}), 401
+        if kind not in ("rooms", "events"):
+            return jsonify({"error": "Unknown roster kind"}), 404
+        args, err = _roster_args()
+        if err:
+            return jsonify({"error": err}), 400
+        ids, offset, limit = args
+        db = get_read_db(app)
+
+        if ids is None:
+            cursor = queries.execute(db, f"rosters.{kind}.all", (offset, offset + limit))
+        else:
+            ids_json = json.dumps(ids)
+            cursor = queries.execute(db, f"rosters.{kind}.by_ids", (ids_json, offset, offset + limit, ids_json))
+        singular, joined_key = ("room", "joined_at") if kind == "rooms" else ("event", "registered_at")
+        rosters = _rosters(cursor, singular, joined_key)
+
+        if request.args.get("stream") in ("1", "true"):
+            lines = (json.dumps(r) + "\n" for r in rosters)
+            return Response(stream_with_context(lines), mimetype="application/x-ndjson")
+        return jsonify({"offset": offset, "limit": limit, "rosters": list(rosters)})
 
     return app
 
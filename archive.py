@@ -0,0 +1,260 @@
+# archive.py
+"""
+Cold storage for past semesters.
+
+Past events with their registrations, and closed event requests (rejected,
+or accepted with their event archived too), are moved out of app.sqlite
+into archive.sqlite next to it, so the tables every student request reads
+stay the size of the current semester.
+The archive is only ATTACHed by the mover and by admin reads that ask for
+include_archived=1.
+
+Rows are moved in batches: every batch copies into the archive and deletes
+from the live tables in one IMMEDIATE transaction, so the writer lock is held
+for one batch at a time. With WAL the two files commit separately; a crash
+between them leaves rows in both, and the copy is INSERT OR REPLACE, so
+running the mover again finishes the job. The deletes go through the stats
+triggers, so admin analytics cover the live tables only.
+
+Usage:
+  python archive.py --before 2026-03-01     archive events before that date and
+                                            requests closed before it
+"""
+import argparse
+import os
+import sqlite3
+import time
+from typing import Dict
+
+import clock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive.events (
+  id INTEGER PRIMARY KEY,
+  title TEXT NOT NULL,
+  category TEXT NOT NULL,
+  date_time TEXT NOT NULL,
+  starts_at INTEGER NULL,
+  duration_minutes INTEGER NOT NULL DEFAULT 120,
+  ends_at INTEGER NULL,
+  location TEXT NOT NULL,
+  description TEXT NOT NULL,
+  quota INTEGER NULL,
+  created_by_id INTEGER NULL,
+  created_at TEXT NOT NULL,
+  archived_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archive.idx_archive_events_starts_at ON events(starts_at);
+
+CREATE TABLE IF NOT EXISTS archive.event_registrations (
+  id INTEGER PRIMARY KEY,
+  event_id INTEGER NOT NULL,
+  user_id INTEGER NOT NULL,
+  created_at TEXT NOT NULL,
+  archived_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archive.idx_archive_event_regs_event_created ON event_registrations(event_id, created_at);
+
+CREATE TABLE IF NOT EXISTS archive.event_requests (
+  id INTEGER PRIMARY KEY,
+  title TEXT NOT NULL,
+  category TEXT NOT NULL,
+  date_time TEXT NOT NULL,
+  duration_minutes INTEGER NOT NULL DEFAULT 120,
+  location TEXT NOT NULL,
+  description TEXT NOT NULL,
+  quota INTEGER NULL,
+  requested_by_id INTEGER NULL,
+  status TEXT NOT NULL,
+  admin_comment TEXT NULL,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  archived_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archive.idx_archive_event_requests_status_updated ON event_requests(status, updated_at);
+"""
+
+# columns added to the live tables after the archive schema was first written;
+# attach() adds them to older archive files
+ADDED_COLUMNS = [
+    ("events", "duration_minutes", "INTEGER NOT NULL DEFAULT 120"),
+    ("events", "ends_at", "INTEGER NULL"),
+    ("event_requests", "duration_minutes", "INTEGER NOT NULL DEFAULT 120"),
+]
+
+REGISTRATION_COLUMNS = "id, event_id, user_id, created_at"
+EVENT_COLUMNS = ("id, title, category, date_time, starts_at, duration_minutes, ends_at, location, description, "
+                 "quota, created_by_id, created_at")
+REQUEST_COLUMNS = ("id, title, category, date_time, duration_minutes, location, description, quota, "
+                   "requested_by_id, status, admin_comment, created_at, updated_at")
+
+
+def archive_path(db_path: str) -> str:
+    return os.path.join(os.path.dirname(db_path), "archive.sqlite")
+
+
+def is_attached(db) -> bool:
+    return any(r[1] == "archive" for r in db.execute("PRAGMA database_list").fetchall())
+
+
+def attach(db, path: str, readonly: bool = False) -> bool:
+    """
+    ATTACH path as "archive" (must be outside a transaction). Read-only
+    attaches need a connection opened with uri=True and return False when
+    nothing has been archived yet.
+    """
+    if is_attached(db):
+        return True
+    if readonly:
+        if not os.path.exists(path):
+            return False
+        db.execute("ATTACH DATABASE ? AS archive", (f"file:{path}?mode=ro",))
+        return True
+    db.execute("ATTACH DATABASE ? AS archive", (path,))
+    db.execute("PRAGMA archive.journal_mode = WAL;")
+    for stmt in SCHEMA.split(";"):
+        if stmt.strip():
+            db.execute(stmt)
+    for table, column, ddl in ADDED_COLUMNS:
+        if column not in {r[1] for r in db.execute(f"PRAGMA archive.table_info({table})")}:
+            db.execute(f"ALTER TABLE archive.{table} ADD COLUMN {column} {ddl}")
+    db.commit()
+    return True
+
+
+def upgrade(db_path: str):
+    """
+    Bring an existing archive.sqlite up to the current schema, so read-only
+    attaches can query it. Called on startup after the migrations.
+    """
+    path = archive_path(db_path)
+    if not os.path.exists(path):
+        return
+    db = sqlite3.connect(":memory:")
+    try:
+        attach(db, path)
+    finally:
+        db.close()
+
+
+def _move_batch(db, ids: list, copies: list, deletes: list, now: str):
+    marks = ",".join("?" * len(ids))
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        for sql in copies:
+            db.execute(sql.format(marks=marks), (now, *ids))
+        for sql in deletes:
+            db.execute(sql.format(marks=marks), ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def move(db, before: str, batch_size: int = 200, pause_seconds: float = 0.01) -> Dict[str, int]:
+    """
+    Move events starting before `before` (local date or date-time) with their
+    registrations, and requests closed (updated_at, UTC) before it. Accepted
+    requests stay while the event they published is still live.
+    db must have the archive attached read/write. Returns the moved row counts.
+    """
+    before_ts = clock.wall_ts(clock.parse_wall(before))
+    # same instant as the updated_at strings ("2026-03-01T00:00:00+00:00"), so
+    # "2026-03-01 10:00" and "2026-03-01T10:00" compare alike
+    before_iso = clock.iso(before_ts)
+    now = clock.iso(clock.now_ts())
+    moved = {"events": 0, "event_registrations": 0, "event_requests": 0}
+
+    while True:
+        ids = [r[0] for r in db.execute(
+            "SELECT id FROM main.events WHERE starts_at < ? ORDER BY starts_at LIMIT ?", (before_ts, batch_size)
+        ).fetchall()]
+        if not ids:
+            break
+        marks = ",".join("?" * len(ids))
+        regs = db.execute(
+            f"SELECT COUNT(*) FROM main.event_registrations WHERE event_id IN ({marks})", ids
+        ).fetchone()[0]
+        _move_batch(
+            db, ids,
+            [
+                f"INSERT OR REPLACE INTO archive.event_registrations ({REGISTRATION_COLUMNS}, archived_at) "
+                f"SELECT {REGISTRATION_COLUMNS}, ? FROM main.event_registrations WHERE event_id IN ({{marks}})",
+                f"INSERT OR REPLACE INTO archive.events ({EVENT_COLUMNS}, archived_at) "
+                f"SELECT {EVENT_COLUMNS}, ? FROM main.events WHERE id IN ({{marks}})",
+            ],
+            [
+                "DELETE FROM main.event_registrations WHERE event_id IN ({marks})",
+                "DELETE FROM main.events WHERE id IN ({marks})",
+            ],
+            now,
+        )
+        moved["events"] += len(ids)
+        moved["event_registrations"] += int(regs)
+        time.sleep(pause_seconds)
+
+    while True:
+        # the event an accepted request published is a copy of its title, date_time and location
+        ids = [r[0] for r in db.execute(
+            """
+            SELECT r.id FROM main.event_requests r
+            WHERE r.updated_at < ?
+              AND (r.status = 'rejected'
+                   OR (r.status = 'accepted' AND NOT EXISTS (
+                         SELECT 1 FROM main.events e
+                         WHERE e.starts_at IS CAST(strftime('%s', r.date_time) AS INTEGER)
+                           AND e.title = r.title AND e.location = r.location)))
+            ORDER BY r.updated_at LIMIT ?
+            """,
+            (before_iso, batch_size),
+        ).fetchall()]
+        if not ids:
+            break
+        _move_batch(
+            db, ids,
+            [
+                f"INSERT OR REPLACE INTO archive.event_requests ({REQUEST_COLUMNS}, archived_at) "
+                f"SELECT {REQUEST_COLUMNS}, ? FROM main.event_requests WHERE id IN ({{marks}})",
+            ],
+            ["DELETE FROM main.event_requests WHERE id IN ({marks})"],  # hidden flags cascade
+            now,
+        )
+        moved["event_requests"] += len(ids)
+        time.sleep(pause_seconds)
+
+    return moved
+
+
+def run(db_path: str, before: str, batch_size: int = 200) -> Dict[str, int]:
+    db = sqlite3.connect(db_path, timeout=5, isolation_level=None)
+    try:
+        db.execute("PRAGMA busy_timeout = 5000;")
+        db.execute("PRAGMA foreign_keys = ON;")
+        attach(db, archive_path(db_path))
+        return move(db, before, batch_size=batch_size)
+    finally:
+        db.close()
+
+
+def counts(db) -> Dict[str, int]:
+    """Row counts of the archive tables; db must have it attached."""
+    return {
+        table: int(db.execute(f"SELECT COUNT(*) FROM archive.{table}").fetchone()[0])
+        for table in ("events", "event_registrations", "event_requests")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move past semesters into the archive database")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(__file__), "instance", "app.sqlite"))
+    parser.add_argument("--before", required=True, help="YYYY-MM-DD: archive events before this date")
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    moved = run(args.db, args.before, batch_size=args.batch_size)
+    print(f"moved {moved} in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
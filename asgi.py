@@ -0,0 +1,245 @@
+# asgi.py
+"""
+ASGI serving mode.
+
+Runs the regular create_app() routes under an async server. Flask handlers
+(and their SQLite work) run on a bounded thread pool, so a slow or idle client
+only costs a coroutine, not a worker thread. Streaming endpoints are handled
+natively on the event loop.
+
+Run with:
+  uvicorn asgi:create_asgi_app --factory --port 5000
+or
+  python asgi.py
+
+Environment:
+  ASGI_DB_THREADS        size of the handler/DB thread pool (default 16)
+  ROOMS_STREAM_INTERVAL  seconds between room availability polls (default 2)
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import _list_rooms, create_app
+from db import _connect_readonly, get_db_path
+
+
+def _build_environ(scope, body: bytes) -> dict:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    path = scope.get("path", "/")
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_TYPE" or name == "CONTENT_LENGTH":
+            environ[name] = value
+            continue
+        key = "HTTP_" + name
+        if key in environ:
+            sep = "; " if key == "HTTP_COOKIE" else ","
+            value = environ[key] + sep + value
+        environ[key] = value
+    return environ
+
+
+def _call_wsgi(wsgi_app, environ):
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+        return lambda data: response.setdefault("early", []).append(data)
+
+    result = wsgi_app(environ, start_response)
+    try:
+        chunks = response.get("early", []) + [chunk for chunk in result]
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return response["status"], response["headers"], b"".join(chunks)
+
+
+class WsgiBridge:
+    """
+    Runs a WSGI app for ASGI http scopes on a bounded executor.
+    Requests beyond the pool size wait as coroutines instead of holding threads.
+    """
+
+    def __init__(self, wsgi_app, executor: ThreadPoolExecutor):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        environ = _build_environ(scope, bytes(body))
+        loop = asyncio.get_running_loop()
+        status, headers, payload = await loop.run_in_executor(self.executor, _call_wsgi, self.wsgi_app, environ)
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": payload})
+
+
+class RoomsFeed:
+    """
+    Server-sent events stream of room availability (/api/stream/rooms).
+
+    One poller per process reads the room list every interval seconds and
+    fans it out to all subscribers, so N open streams cost one query per
+    interval, and an idle stream costs no thread at all.
+    """
+
+    HEARTBEAT_SECONDS = 15
+
+    def __init__(self, flask_app, executor: ThreadPoolExecutor, interval_seconds: float):
+        self.flask_app = flask_app
+        self.executor = executor
+        self.interval_seconds = interval_seconds
+        self._subscribers = set()
+        self._latest = None
+        self._task = None
+
+    def _read_rooms(self) -> bytes:
+        db = _connect_readonly(get_db_path(self.flask_app))
+        try:
+            return json.dumps(_list_rooms(db), separators=(",", ":")).encode("utf-8")
+        finally:
+            db.close()
+
+    async def _poll(self):
+        loop = asyncio.get_running_loop()
+        while self._subscribers:
+            try:
+                payload = await loop.run_in_executor(self.executor, self._read_rooms)
+            except Exception:
+                payload = None
+            if payload is not None and payload != self._latest:
+                self._latest = payload
+                for q in list(self._subscribers):
+                    if q.full():
+                        q.get_nowait()  # slow client: only the newest state matters
+                    q.put_nowait(payload)
+            await asyncio.sleep(self.interval_seconds)
+        self._task = None
+
+    async def serve(self, scope, receive, send):
+        q = asyncio.Queue(maxsize=1)
+        if self._latest is not None:
+            q.put_nowait(self._latest)
+        self._subscribers.add(q)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._poll())
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        try:
+            while not disconnected.done():
+                getter = asyncio.ensure_future(q.get())
+                done, _ = await asyncio.wait(
+                    {getter, disconnected},
+                    timeout=self.HEARTBEAT_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if getter in done:
+                    chunk = b"event: rooms\ndata: " + getter.result() + b"\n\n"
+                else:
+                    getter.cancel()
+                    if disconnected.done():
+                        break
+                    chunk = b": keepalive\n\n"
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            self._subscribers.discard(q)
+            disconnected.cancel()
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+
+
+class AsgiApp:
+    def __init__(self, flask_app=None, max_threads: int = 16, stream_interval: float = 2.0):
+        self.flask_app = flask_app or create_app()
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="asgi-db")
+        self.wsgi = WsgiBridge(self.flask_app, self.executor)
+        self.rooms_feed = RoomsFeed(self.flask_app, self.executor, stream_interval)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        if scope["path"] == "/api/stream/rooms" and scope["method"] == "GET":
+            await self.rooms_feed.serve(scope, receive, send)
+            return
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(flask_app=None) -> AsgiApp:
+    return AsgiApp(
+        flask_app,
+        max_threads=int(os.environ.get("ASGI_DB_THREADS", "16")),
+        stream_interval=float(os.environ.get("ROOMS_STREAM_INTERVAL", "2")),
+    )
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("ASGI mode needs uvicorn: pip install uvicorn")
+    uvicorn.run(create_asgi_app(), host="127.0.0.1", port=int(os.environ.get("PORT", "5000")))
@@ -5,8 +5,12 @@ import time
 import sqlite3
 from datetime import datetime, timezone
 
+import clock
+
 ALLOWED_DOMAIN = "@uni-bayreuth.de"
 CODE_TTL_SECONDS = 60  # cooldown for resend/register
+CODE_EXPIRY_SECONDS = 15 * 60  # a sent code is valid this long
+MAX_VERIFY_ATTEMPTS = 5  # wrong codes allowed per sent code
 
 
 def _now_iso() -> str:
@@ -44,14 +48,19 @@ def _hash_code(code: str) -> str:
     return hashlib.sha256(code.encode("utf-8")).hexdigest()
 
 
-def _cooldown_seconds(row_last_sent_at: str) -> int:
-    try:
-        t = datetime.fromisoformat(row_last_sent_at.replace("Z", "+00:00"))
-        elapsed = (datetime.now(timezone.utc) - t).total_seconds()
-        left = int(max(0, CODE_TTL_SECONDS - elapsed))
-        return left
-    except Exception:
-        return 0
+def _cooldown_seconds(last_sent_ts: int, now: int) -> int:
+    return max(0, CODE_TTL_SECONDS - (now - last_sent_ts))
+
+
+def expiry_cutoff_ts() -> int:
+    """
+    Pending codes sent before this instant (epoch seconds) are expired.
+    """
+    return clock.now_ts() - CODE_EXPIRY_SECONDS
+
+
+def expires_at_iso(last_sent_ts: int) -> str:
+    return clock.iso(last_sent_ts + CODE_EXPIRY_SECONDS)
 
 
 def start_registration(db: sqlite3.Connection, email: str, password: str):
@@ -61,30 +70,31 @@ def start_registration(db: sqlite3.Connection, email: str, password: str):
         raise ValueError("USER_ALREADY_EXISTS")
 
     # check cooldown if pending exists
+    now = clock.now_ts()
     pending = db.execute(
-        "SELECT last_sent_at FROM email_verifications WHERE email = ?",
+        "SELECT last_sent_ts FROM email_verifications WHERE email = ?",
         (email,),
     ).fetchone()
     if pending:
-        retry_in = _cooldown_seconds(pending["last_sent_at"])
+        retry_in = _cooldown_seconds(pending["last_sent_ts"], now)
         if retry_in > 0:
             return "", retry_in
 
     code = _generate_code()
     code_hash = _hash_code(code)
     password_hash = _make_password_hash(password)
-    now = _now_iso()
 
     db.execute(
         """
-        INSERT INTO email_verifications (email, code_hash, code_plain, password_hash, created_at, last_sent_at)
-        VALUES (?, ?, ?, ?, ?, ?)
+        INSERT INTO email_verifications (email, code_hash, code_plain, password_hash, created_ts, last_sent_ts, attempts)
+        VALUES (?, ?, ?, ?, ?, ?, 0)
         ON CONFLICT(email) DO UPDATE SET
           code_hash=excluded.code_hash,
           code_plain=excluded.code_plain,
           password_hash=excluded.password_hash,
-          created_at=excluded.created_at,
-          last_sent_at=excluded.last_sent_at
+          created_ts=excluded.created_ts,
+          last_sent_ts=excluded.last_sent_ts,
+          attempts=0
         """,
         (email, code_hash, code, password_hash, now, now),
     )
@@ -99,24 +109,24 @@ def resend_code(db: sqlite3.Connection, email: str):
         raise ValueError("USER_ALREADY_EXISTS")
 
     pending = db.execute(
-        "SELECT last_sent_at FROM email_verifications WHERE email = ?",
+        "SELECT last_sent_ts FROM email_verifications WHERE email = ?",
         (email,),
     ).fetchone()
     if not pending:
         raise ValueError("NO_PENDING_REGISTRATION")
 
-    retry_in = _cooldown_seconds(pending["last_sent_at"])
+    now = clock.now_ts()
+    retry_in = _cooldown_seconds(pending["last_sent_ts"], now)
     if retry_in > 0:
         return "", retry_in
 
     code = _generate_code()
     code_hash = _hash_code(code)
-    now = _now_iso()
 
     db.execute(
         """
         UPDATE email_verifications
-        SET code_hash = ?, code_plain = ?, last_sent_at = ?
+        SET code_hash = ?, code_plain = ?, last_sent_ts = ?, attempts = 0
         WHERE email = ?
         """,
         (code_hash, code, now, email),
@@ -127,13 +137,27 @@ def resend_code(db: sqlite3.Connection, email: str):
 
 def verify_code_and_create_user(db: sqlite3.Connection, email: str, code: str) -> bool:
     row = db.execute(
-        "SELECT email, code_hash, password_hash FROM email_verifications WHERE email = ?",
+        """
+        SELECT email, code_hash, password_hash, last_sent_ts, attempts
+        FROM email_verifications
+        WHERE email = ?
+        """,
         (email,),
     ).fetchone()
     if not row:
         return False
 
+    if row["last_sent_ts"] < expiry_cutoff_ts():
+        raise ValueError("CODE_EXPIRED")
+    if int(row["attempts"]) >= MAX_VERIFY_ATTEMPTS:
+        raise ValueError("TOO_MANY_ATTEMPTS")
+
     if _hash_code(code) != row["code_hash"]:
+        db.execute(
+            "UPDATE email_verifications SET attempts = attempts + 1 WHERE email = ?",
+            (email,),
+        )
+        db.commit()
         return False
 
     now = _now_iso()
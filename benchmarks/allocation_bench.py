@@ -0,0 +1,109 @@
+# benchmarks/allocation_bench.py
+"""
+Batch room allocation at scale (allocation.py).
+
+Loads --students students with 3 random ranked preferences each and rooms
+for about --fill of them into a throwaway database, then times
+allocation.allocate(): reading, solving and writing all bookings in one
+transaction. The solver alone is timed separately on the same input.
+
+Usage:
+  python benchmarks/allocation_bench.py --students 50000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import allocation  # noqa: E402
+import migrate  # noqa: E402
+
+NOW = "2026-01-01T00:00:00+00:00"
+ROOM_KINDS = [("single", 1), ("shared", 2), ("shared", 3), ("studio", 1)]
+
+
+def load(db, students: int, fill: float, seed: int = 1):
+    rnd = random.Random(seed)
+    db.executemany(
+        "INSERT INTO users (email, password_hash, role, created_at) VALUES (?, 'x', 'student', ?)",
+        ((f"user{i}@uni-bayreuth.de", NOW) for i in range(students)),
+    )
+
+    rooms, places = [], 0
+    while places < students * fill:
+        room_type, capacity = rnd.choice(ROOM_KINDS)
+        rooms.append((room_type, f"Room {len(rooms)}", 150 + rnd.randrange(0, 400, 10), capacity))
+        places += capacity
+    db.executemany(
+        "INSERT INTO rooms (type, title, description, price_eur, capacity, available) VALUES (?, ?, '', ?, ?, 1)",
+        rooms,
+    )
+
+    def prefs():
+        for user_id in range(1, students + 1):
+            for rank, room_type in enumerate(rnd.sample(allocation.ROOM_TYPES, 3), start=1):
+                yield user_id, rank, room_type, rnd.choice([None, 300, 400, 500]), NOW
+
+    db.executemany(
+        "INSERT INTO room_preferences (user_id, rank, room_type, max_price_eur, created_at) VALUES (?, ?, ?, ?, ?)",
+        prefs(),
+    )
+    db.execute("UPDATE admin_settings SET value = 'preferences' WHERE key = 'room_allocation'")
+    db.commit()
+    return len(rooms), places
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=50_000)
+    parser.add_argument("--fill", type=float, default=0.9, help="room places per student")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = sqlite3.connect(os.path.join(tmp, "bench.sqlite"))
+        migrate.migrate(db)
+
+        t0 = time.perf_counter()
+        rooms, places = load(db, args.students, args.fill)
+        print(f"loaded {args.students} students, {rooms} rooms / {places} places in {time.perf_counter() - t0:.1f} s")
+
+        room_rows = db.execute(
+            "SELECT id, type, price_eur, capacity FROM rooms WHERE available = 1"
+        ).fetchall()
+        preferences = {}
+        for user_id, room_type, max_price in db.execute(
+            "SELECT user_id, room_type, max_price_eur FROM room_preferences ORDER BY user_id, rank"
+        ):
+            preferences.setdefault(user_id, []).append((room_type, max_price))
+        order = sorted(preferences)
+        random.Random(7).shuffle(order)
+        t0 = time.perf_counter()
+        allocation.solve(room_rows, preferences, order)
+        solve_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        result = allocation.allocate(db, seed=7)
+        total_ms = (time.perf_counter() - t0) * 1000
+
+        print(f"solve only:           {solve_ms:8.1f} ms")
+        print(f"allocate (read+solve+write, one transaction): {total_ms:8.1f} ms")
+        print(f"assigned {result['assigned']} / {result['students']}, by rank {result['by_rank']}")
+        booked = db.execute("SELECT COUNT(*) FROM room_bookings").fetchone()[0]
+        over = db.execute(
+            """
+            SELECT COUNT(*) FROM rooms r
+            WHERE (SELECT COUNT(*) FROM room_bookings rb WHERE rb.room_id = r.id) > r.capacity
+            """
+        ).fetchone()[0]
+        print(f"bookings written: {booked}, over-capacity rooms: {over}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
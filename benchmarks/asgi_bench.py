@@ -0,0 +1,169 @@
+# benchmarks/asgi_bench.py
+"""
+Concurrent-connection capacity: WSGI (threaded Werkzeug server, what
+`python app.py` runs) vs ASGI (asgi.py under uvicorn).
+
+For each level of --held connections, that many clients connect and send an
+incomplete request (slow clients, long polls). While they are held, a probe
+client times --probes sequential GET /api/rooms requests. Server thread count
+and RSS are read from /proc. A final phase runs --clients active clients
+hammering /api/events to compare plain throughput.
+
+Usage:
+  python benchmarks/asgi_bench.py --held 100 500 1000
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "wsgi": (
+        "from app import create_app\n"
+        "from werkzeug.serving import run_simple\n"
+        "run_simple('127.0.0.1', {port}, create_app(instance_path={instance!r}), threaded=True)\n"
+    ),
+    "asgi": (
+        "import uvicorn\n"
+        "from app import create_app\n"
+        "from asgi import create_asgi_app\n"
+        "uvicorn.run(create_asgi_app(create_app(instance_path={instance!r})),"
+        " host='127.0.0.1', port={port}, log_level='warning', backlog=4096)\n"
+    ),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(mode: str, instance: str):
+    port = _free_port()
+    env = dict(os.environ, VERIFICATION_SWEEP_INTERVAL="0", PYTHONPATH=ROOT)
+    proc = subprocess.Popen(
+        [sys.executable, "-c", SERVERS[mode].format(port=port, instance=instance)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            _get(port, "/api/rooms")
+            return proc, port
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def _get(port: int, path: str) -> float:
+    t0 = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    resp.read()
+    conn.close()
+    if resp.status != 200:
+        raise RuntimeError(f"{path} -> {resp.status}")
+    return (time.perf_counter() - t0) * 1000
+
+
+def _proc_stats(pid: int) -> tuple:
+    threads = rss_kb = 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("Threads:"):
+                threads = int(line.split()[1])
+            elif line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+    return threads, rss_kb
+
+
+def held_phase(proc, port: int, held: int, probes: int) -> str:
+    socks = []
+    failed = 0
+    for _ in range(held):
+        try:
+            s = socket.create_connection(("127.0.0.1", port), timeout=5)
+            s.sendall(b"GET /api/rooms HTTP/1.1\r\nHost: bench\r\n")  # never finished
+            socks.append(s)
+        except OSError:
+            failed += 1
+    time.sleep(0.5)
+
+    latencies = []
+    errors = 0
+    for _ in range(probes):
+        try:
+            latencies.append(_get(port, "/api/rooms"))
+        except (OSError, RuntimeError):
+            errors += 1
+    threads, rss_kb = _proc_stats(proc.pid)
+
+    for s in socks:
+        s.close()
+    time.sleep(0.5)
+
+    lat = sorted(latencies) or [0.0]
+    return (
+        f"held={held:5d} connect_fail={failed:4d}  probe p50={statistics.median(lat):7.2f} ms "
+        f"p99={lat[int(len(lat) * 0.99) - 1 if len(lat) > 1 else 0]:7.2f} ms errors={errors:3d}  "
+        f"threads={threads:5d} rss={rss_kb / 1024:6.1f} MB"
+    )
+
+
+def throughput_phase(port: int, clients: int, seconds: float) -> str:
+    counts = [0] * clients
+    errors = [0] * clients
+    stop = time.perf_counter() + seconds
+
+    def worker(i):
+        while time.perf_counter() < stop:
+            try:
+                _get(port, "/api/events?page=1&page_size=4")
+                counts[i] += 1
+            except (OSError, RuntimeError):
+                errors[i] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = sum(counts)
+    return f"clients={clients:4d}  {total / seconds:8.1f} req/s  errors={sum(errors)}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--held", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--probes", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--modes", nargs="+", default=list(SERVERS))
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as instance:
+            proc, port = _start(mode, instance)
+            try:
+                print(f"[{mode}]")
+                for held in args.held:
+                    print("  " + held_phase(proc, port, held, args.probes))
+                print("  " + throughput_phase(port, args.clients, args.seconds))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/conflict_bench.py
+"""
+Schedule-conflict check: R*Tree search (events.conflicts_for_user) vs. a scan
+of the student's registrations.
+
+Loads --events events spread over --days days and registers one student for
+--history of them, then times both ways of answering "which of my events
+overlap this one" for random events.
+
+Usage:
+  python benchmarks/conflict_bench.py --events 200000 --history 2000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import migrate  # noqa: E402
+import queries  # noqa: E402
+
+NOW = "2026-01-01T00:00:00+00:00"
+
+SCAN = """
+SELECT e.id, e.title, e.date_time, e.duration_minutes, e.location
+FROM event_registrations er
+JOIN events e ON e.id = er.event_id
+WHERE er.user_id = ?4 AND e.id != ?3 AND e.starts_at < ?2 AND e.ends_at > ?1
+ORDER BY e.starts_at
+"""
+
+
+def load(db, events: int, days: int, history: int, seed: int = 1):
+    rnd = random.Random(seed)
+
+    def rows():
+        for i in range(events):
+            minute = rnd.randrange(days * 24 * 60)
+            day, rest = divmod(minute, 24 * 60)
+            dt = time.strftime("%Y-%m-%dT%H:%M", time.gmtime(1767225600 + day * 86400 + rest * 60))
+            yield f"Event {i}", dt, rnd.choice([60, 90, 120, 180]), NOW
+
+    db.executemany(
+        """
+        INSERT INTO events (title, category, date_time, duration_minutes, location, description, quota,
+                            created_by_id, created_at)
+        VALUES (?, 'social', ?, ?, 'Hall', '', NULL, NULL, ?)
+        """,
+        rows(),
+    )
+    db.execute(
+        "INSERT INTO users (email, password_hash, role, created_at) VALUES ('s@uni-bayreuth.de', 'x', 'student', ?)",
+        (NOW,),
+    )
+    user_id = db.execute("SELECT id FROM users WHERE email = 's@uni-bayreuth.de'").fetchone()[0]
+    db.executemany(
+        "INSERT INTO event_registrations (event_id, user_id, created_at) VALUES (?, ?, ?)",
+        ((event_id, user_id, NOW) for event_id in rnd.sample(range(1, events + 1), history)),
+    )
+    db.commit()
+    return user_id
+
+
+def bench(db, sql: str, probes, user_id: int) -> float:
+    started = time.perf_counter()
+    for event_id, starts_at, ends_at in probes:
+        db.execute(sql, (starts_at, ends_at, event_id, user_id)).fetchall()
+    return (time.perf_counter() - started) * 1000 / len(probes)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=365 * 4)
+    parser.add_argument("--history", type=int, default=2000, help="registrations of the student")
+    parser.add_argument("--probes", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = sqlite3.connect(os.path.join(tmp, "bench.sqlite"))
+        migrate.migrate(db)
+        t0 = time.perf_counter()
+        user_id = load(db, args.events, args.days, args.history)
+        print(f"loaded {args.events} events, {args.history} registrations in {time.perf_counter() - t0:.1f} s")
+
+        rnd = random.Random(2)
+        probes = [
+            db.execute("SELECT id, starts_at, ends_at FROM events WHERE id = ?", (rnd.randint(1, args.events),)).fetchone()
+            for _ in range(args.probes)
+        ]
+        rtree = queries.QUERIES["events.conflicts_for_user"].sql
+        scan_ms = bench(db, SCAN, probes, user_id)
+        rtree_ms = bench(db, rtree, probes, user_id)
+        same = all(
+            sorted(db.execute(SCAN, (s, e, i, user_id)).fetchall()) == sorted(db.execute(rtree, (s, e, i, user_id)).fetchall())
+            for i, s, e in probes[:200]
+        )
+        print(f"scan of registrations: {scan_ms:7.3f} ms/check")
+        print(f"R*Tree search:         {rtree_ms:7.3f} ms/check")
+        print(f"same results: {same}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
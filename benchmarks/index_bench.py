@@ -0,0 +1,220 @@
+# benchmarks/index_bench.py
+"""
+Before/after timing of the app.py query workload around migration 0006 (index audit).
+
+Builds a throwaway database at schema version 0005, loads synthetic data
+(--rows event registrations, other tables scaled from it), times each hot
+query, applies 0006 and times again. Query plans are printed for both runs.
+
+Usage:
+  python benchmarks/index_bench.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import migrate  # noqa: E402
+
+BEFORE_VERSION = 5
+AFTER_VERSION = 6  # the workload below still uses the email columns dropped in 0009
+NOW = "2026-01-01T00:00:00+00:00"
+
+# name -> (sql, params factory)
+WORKLOAD = {
+    "me_events": (
+        """
+        SELECT e.*,
+               (SELECT COUNT(*) FROM event_registrations er WHERE er.event_id = e.id) AS registered_count
+        FROM event_registrations my
+        JOIN events e ON e.id = my.event_id
+        WHERE my.user_email = ?
+        ORDER BY e.date_time ASC
+        """,
+        lambda n: (f"user{random.randrange(n['users'])}@uni-bayreuth.de",),
+    ),
+    "events_page": (
+        """
+        SELECT e.*,
+               (SELECT COUNT(*) FROM event_registrations er WHERE er.event_id = e.id) AS registered_count
+        FROM events e
+        ORDER BY e.date_time ASC
+        LIMIT 4 OFFSET ?
+        """,
+        lambda n: (random.randrange(n["events"] - 4),),
+    ),
+    "student_requests": (
+        """
+        SELECT er.*
+        FROM event_requests er
+        LEFT JOIN student_hidden_event_requests h
+          ON h.request_id = er.id AND h.student_email = er.requested_by_email
+        WHERE er.requested_by_email = ?
+          AND h.id IS NULL
+        ORDER BY er.created_at DESC
+        """,
+        lambda n: (f"user{random.randrange(n['users'])}@uni-bayreuth.de",),
+    ),
+    "admin_requests": (
+        "SELECT * FROM event_requests WHERE status = ? ORDER BY updated_at DESC LIMIT 50",
+        lambda n: (random.choice(["pending", "accepted", "rejected"]),),
+    ),
+    "room_roster": (
+        "SELECT user_email, created_at FROM room_bookings WHERE room_id = ? ORDER BY created_at ASC",
+        lambda n: (random.randrange(1, n["rooms"] + 1),),
+    ),
+    "event_roster": (
+        "SELECT user_email, created_at FROM event_registrations WHERE event_id = ? ORDER BY created_at ASC",
+        lambda n: (random.randrange(1, n["events"] + 1),),
+    ),
+    "user_lookup": (
+        "SELECT email, role FROM users WHERE email = ?",
+        lambda n: (f"user{random.randrange(n['users'])}@uni-bayreuth.de",),
+    ),
+}
+
+
+def _ts(i: int) -> str:
+    return f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00+00:00"
+
+
+def load(db: sqlite3.Connection, rows: int):
+    n = {
+        "registrations": rows,
+        "users": max(1000, rows // 20),
+        "events": max(100, rows // 200),
+        "rooms": max(50, rows // 500),
+        "requests": max(100, rows // 5),
+    }
+
+    db.executemany(
+        "INSERT INTO users (email, password_hash, role, created_at) VALUES (?, 'x', 'student', ?)",
+        ((f"user{i}@uni-bayreuth.de", NOW) for i in range(n["users"])),
+    )
+    db.executemany(
+        "INSERT INTO rooms (type, title, description, price_eur, capacity, available) VALUES ('shared', ?, '', 200, 4, 1)",
+        ((f"Room {i}",) for i in range(n["rooms"])),
+    )
+    db.executemany(
+        """
+        INSERT INTO events (title, category, date_time, location, description, quota, created_by_email, created_at)
+        VALUES (?, 'social', ?, 'Hall', '', NULL, 'admin@uni-bayreuth.de', ?)
+        """,
+        ((f"Event {i}", _ts(i), NOW) for i in range(n["events"])),
+    )
+
+    def regs():
+        per_user = max(1, rows // n["users"])
+        count = 0
+        for u in range(n["users"]):
+            for ev in random.sample(range(1, n["events"] + 1), min(per_user, n["events"])):
+                yield ev, f"user{u}@uni-bayreuth.de", _ts(count)
+                count += 1
+                if count >= rows:
+                    return
+
+    db.executemany("INSERT INTO event_registrations (event_id, user_email, created_at) VALUES (?, ?, ?)", regs())
+    db.executemany(
+        "INSERT INTO room_bookings (room_id, user_email, created_at) VALUES (?, ?, ?)",
+        ((1 + i % n["rooms"], f"user{i}@uni-bayreuth.de", _ts(i)) for i in range(min(n["users"], n["rooms"] * 4))),
+    )
+    db.executemany(
+        """
+        INSERT INTO event_requests
+          (title, category, date_time, location, description, quota, requested_by_email, status, admin_comment, created_at, updated_at)
+        VALUES ('Req', 'social', ?, 'Hall', '', NULL, ?, ?, NULL, ?, ?)
+        """,
+        (
+            (_ts(i), f"user{i % n['users']}@uni-bayreuth.de", ("pending", "accepted", "rejected")[i % 3], _ts(i), _ts(i + 7))
+            for i in range(n["requests"])
+        ),
+    )
+    db.executemany(
+        "INSERT OR IGNORE INTO student_hidden_event_requests (request_id, student_email, created_at) VALUES (?, ?, ?)",
+        ((i, f"user{(i - 1) % n['users']}@uni-bayreuth.de", NOW) for i in range(1, n["requests"] + 1, 4)),
+    )
+    db.commit()
+    db.execute("ANALYZE")
+    db.commit()
+    return n
+
+
+def run_workload(db: sqlite3.Connection, n: dict, iterations: int) -> dict:
+    out = {}
+    for name, (sql, params) in WORKLOAD.items():
+        random.seed(name)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            db.execute(sql, params(n)).fetchall()
+        out[name] = (time.perf_counter() - started) / iterations * 1000
+    return out
+
+
+def plans(db: sqlite3.Connection, n: dict) -> dict:
+    out = {}
+    for name, (sql, params) in WORKLOAD.items():
+        rows = db.execute("EXPLAIN QUERY PLAN " + sql, params(n)).fetchall()
+        out[name] = "; ".join(r[3] for r in rows)
+    return out
+
+
+def index_bytes(db: sqlite3.Connection) -> int:
+    try:
+        row = db.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name IN (SELECT name FROM sqlite_master WHERE type = 'index')"
+        ).fetchone()
+        return int(row[0] or 0)
+    except sqlite3.OperationalError:
+        return -1  # dbstat not compiled in
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000, help="event registrations to load")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = sqlite3.connect(os.path.join(tmp, "bench.sqlite"))
+        migrate.migrate(db, target=BEFORE_VERSION)
+
+        t0 = time.perf_counter()
+        n = load(db, args.rows)
+        print(f"loaded {n} in {time.perf_counter() - t0:.1f} s")
+
+        before_plans = plans(db, n)
+        before = run_workload(db, n, args.iterations)
+        before_idx = index_bytes(db)
+
+        t0 = time.perf_counter()
+        migrate.migrate(db, target=AFTER_VERSION)
+        db.execute("ANALYZE")
+        db.commit()
+        print(f"migration 0006 applied in {time.perf_counter() - t0:.1f} s")
+
+        after_plans = plans(db, n)
+        after = run_workload(db, n, args.iterations)
+        after_idx = index_bytes(db)
+
+        print()
+        print(f"{'query':18s} {'before ms':>10s} {'after ms':>10s} {'speedup':>8s}")
+        for name in WORKLOAD:
+            b, a = before[name], after[name]
+            print(f"{name:18s} {b:10.3f} {a:10.3f} {b / a if a else 0:7.1f}x")
+        if before_idx >= 0:
+            print(f"\nindex bytes: before={before_idx:,} after={after_idx:,}")
+
+        print("\nplans (before -> after)")
+        for name in WORKLOAD:
+            print(f"- {name}\n    {before_plans[name]}\n    {after_plans[name]}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
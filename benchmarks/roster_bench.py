@@ -0,0 +1,86 @@
+# benchmarks/roster_bench.py
+"""
+Admin overview of every room's roster: one /api/admin/rooms/<id>/students
+call per room vs one /api/admin/rosters/rooms call.
+
+Loads --rooms rooms with --per-room students each into a fresh instance and
+times both through the Flask test client (no network, so the gap shown is
+the per-call query and dispatch cost; over HTTP each call also pays a round
+trip).
+
+Usage:
+  python benchmarks/roster_bench.py --rooms 400 --per-room 3
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("VERIFICATION_SWEEP_INTERVAL", "0")
+os.environ.setdefault("CHANGE_LOG_COMPACT_INTERVAL", "0")
+
+from app import create_app  # noqa: E402
+
+NOW = "2026-01-01T00:00:00+00:00"
+
+
+def load(db_path: str, rooms: int, per_room: int):
+    db = sqlite3.connect(db_path)
+    db.execute("DELETE FROM room_bookings")
+    db.execute("DELETE FROM rooms")
+    db.executemany(
+        "INSERT INTO rooms (type, title, description, price_eur, capacity, available) "
+        "VALUES ('shared', ?, '', 300, ?, 1)",
+        ((f"Room {i}", per_room) for i in range(rooms)),
+    )
+    room_ids = [r[0] for r in db.execute("SELECT id FROM rooms ORDER BY id")]
+    db.executemany(
+        "INSERT INTO users (email, password_hash, role, created_at) VALUES (?, 'x', 'student', ?)",
+        ((f"user{i}@uni-bayreuth.de", NOW) for i in range(rooms * per_room)),
+    )
+    user_ids = [r[0] for r in db.execute("SELECT id FROM users WHERE role = 'student' ORDER BY id")]
+    db.executemany(
+        "INSERT INTO room_bookings (room_id, user_id, created_at) VALUES (?, ?, ?)",
+        ((room_ids[i // per_room], user_id, NOW) for i, user_id in enumerate(user_ids)),
+    )
+    db.commit()
+    db.close()
+    return room_ids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=400)
+    parser.add_argument("--per-room", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(instance_path=tmp, start_background=False)
+        room_ids = load(os.path.join(tmp, "app.sqlite"), args.rooms, args.per_room)
+        client = app.test_client()
+        client.post("/api/auth/login", json={"email": "admin@uni-bayreuth.de", "password": "admin123"})
+
+        def per_room():
+            for room_id in room_ids:
+                assert client.get(f"/api/admin/rooms/{room_id}/students").status_code == 200
+
+        def bulk():
+            r = client.get("/api/admin/rosters/rooms?limit=1000")
+            assert r.status_code == 200 and len(r.get_json()["rosters"]) == len(room_ids)
+
+        for name, fn in (("one call per room", per_room), ("bulk roster call", bulk)):
+            fn()  # warm up
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                fn()
+            ms = (time.perf_counter() - started) * 1000 / args.repeat
+            print(f"{name:18s}: {ms:8.1f} ms for {len(room_ids)} rosters")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# benchmarks/rows_bench.py
+"""
+Row handling cost of the list endpoints: sqlite3.Row + keyed lookups into a
+dataclass (the old path) vs the positional row factories and NamedTuple DTOs
+in queries.py.
+
+Loads --rows rooms and events into a throwaway database, then for each path
+times fetch -> DTO -> to_dict -> json.dumps and records peak allocation
+(tracemalloc) for the fetch -> DTO step.
+
+Usage:
+  python benchmarks/rows_bench.py --rows 100000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import migrate  # noqa: E402
+import queries  # noqa: E402
+
+
+# ---- the previous implementation, kept here for comparison ----
+
+@dataclass
+class _OldRoomDto:
+    id: int
+    type: str
+    title: str
+    description: str
+    price_eur: int
+    capacity: int
+    available: bool
+    booked_count: int
+    remaining: int
+    is_full: bool
+
+    def to_dict(self):
+        return {
+            "id": self.id, "type": self.type, "title": self.title, "description": self.description,
+            "price_eur": self.price_eur, "capacity": self.capacity, "available": self.available,
+            "booked_count": self.booked_count, "remaining": self.remaining, "is_full": self.is_full,
+        }
+
+
+@dataclass
+class _OldEventDto:
+    id: int
+    title: str
+    category: str
+    date_time: str
+    location: str
+    description: str
+    quota: Optional[int]
+    registered_count: int
+    remaining: Optional[int]
+    is_full: bool
+    is_registered: Optional[bool] = None
+
+    def to_dict(self):
+        out = {
+            "id": self.id, "title": self.title, "category": self.category, "date_time": self.date_time,
+            "location": self.location, "description": self.description, "quota": self.quota,
+            "registered_count": self.registered_count, "remaining": self.remaining, "is_full": self.is_full,
+        }
+        if self.is_registered is not None:
+            out["is_registered"] = self.is_registered
+        return out
+
+
+def _old_room(row):
+    booked = int(row["booked_count"])
+    capacity = int(row["capacity"])
+    remaining = max(0, capacity - booked)
+    return _OldRoomDto(
+        id=int(row["id"]), type=row["type"], title=row["title"], description=row["description"],
+        price_eur=int(row["price_eur"]), capacity=capacity, available=bool(row["available"]),
+        booked_count=booked, remaining=remaining, is_full=remaining == 0,
+    )
+
+
+def _old_event(row):
+    registered = int(row["registered_count"])
+    quota = row["quota"]
+    quota_val = None if quota is None else int(quota)
+    if quota_val is None:
+        remaining, is_full = None, False
+    else:
+        remaining = max(0, quota_val - registered)
+        is_full = remaining == 0
+    return _OldEventDto(
+        id=int(row["id"]), title=row["title"], category=row["category"], date_time=row["date_time"],
+        location=row["location"], description=row["description"], quota=quota_val,
+        registered_count=registered, remaining=remaining, is_full=is_full,
+        is_registered=(bool(row["is_registered"]) if "is_registered" in row.keys() else None),
+    )
+
+
+OLD_SQL = {
+    "rooms.list": (
+        "SELECT r.*, (SELECT COUNT(*) FROM room_bookings rb WHERE rb.room_id = r.id) AS booked_count "
+        "FROM rooms r ORDER BY r.id",
+        _old_room,
+    ),
+    "events.all": (
+        "SELECT e.*, (SELECT COUNT(*) FROM event_registrations er WHERE er.event_id = e.id) AS registered_count "
+        "FROM events e ORDER BY e.date_time ASC",
+        _old_event,
+    ),
+}
+
+
+def load(db, rows: int):
+    db.executemany(
+        "INSERT INTO rooms (type, title, description, price_eur, capacity, available) VALUES (?, ?, ?, ?, ?, 1)",
+        (("shared", f"Room {i}", "Shared room for 2 students.", 200 + i % 300, 2) for i in range(rows)),
+    )
+    db.executemany(
+        """
+        INSERT INTO events (title, category, date_time, location, description, quota, created_by_id, created_at)
+        VALUES (?, 'social', ?, 'Main Hall', 'Meet other students.', ?, NULL, '2026-01-01')
+        """,
+        ((f"Event {i}", f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T18:00", None if i % 3 else 50) for i in range(rows)),
+    )
+    db.commit()
+
+
+def old_path(db, name):
+    sql, mapper = OLD_SQL[name]
+    db.row_factory = sqlite3.Row
+    return [mapper(r) for r in db.execute(sql).fetchall()]
+
+
+def new_path(db, name):
+    return queries.fetch_all(db, name)
+
+
+def measure(db, fn, name, repeat: int):
+    best_fetch = best_total = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        items = fn(db, name)
+        t1 = time.perf_counter()
+        json.dumps([x.to_dict() for x in items])
+        t2 = time.perf_counter()
+        best_fetch = min(best_fetch, t1 - t0)
+        best_total = min(best_total, t2 - t0)
+        del items
+
+    tracemalloc.start()
+    items = fn(db, name)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return best_fetch * 1000, best_total * 1000, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = sqlite3.connect(os.path.join(tmp, "bench.sqlite"))
+        migrate.migrate(db)
+        load(db, args.rows)
+
+        print(f"{args.rows} rows, best of {args.repeat}")
+        print(f"{'query':12s} {'path':4s} {'fetch+dto ms':>13s} {'+json ms':>10s} {'peak MB':>8s}")
+        for name in OLD_SQL:
+            results = {}
+            for label, fn in (("old", old_path), ("new", new_path)):
+                results[label] = measure(db, fn, name, args.repeat)
+                f, t, m = results[label]
+                print(f"{name:12s} {label:4s} {f:13.1f} {t:10.1f} {m:8.1f}")
+            o, n = results["old"], results["new"]
+            print(f"{'':12s} gain {o[0] / n[0]:12.2f}x {o[1] / n[1]:9.2f}x {o[2] / n[2]:7.2f}x")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/serve_bench.py
+"""
+Throughput of the development server (`python app.py`: Werkzeug, debug mode)
+vs the production launcher (serve.py: gunicorn, preloaded, N workers x T threads).
+
+Each server gets a fresh instance directory. --clients concurrent keep-alive-less
+clients request a mix of read endpoints for --seconds.
+
+Usage:
+  python benchmarks/serve_bench.py --workers 4 --threads 4 --clients 32
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = ["/api/rooms", "/api/events?page=1&page_size=4", "/api/info", "/api/settings/rooms_open"]
+
+SERVERS = {
+    "dev": (
+        "from app import create_app\n"
+        "create_app(instance_path={instance!r}).run(port={port}, debug=True, use_reloader=False)\n"
+    ),
+    "serve": (
+        "import serve\n"
+        "opts = serve.default_options()\n"
+        "opts.update(bind='127.0.0.1:{port}', workers={workers}, threads={threads})\n"
+        "serve.StandaloneApplication(opts, instance_path={instance!r}).run()\n"
+    ),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(port: int, path: str) -> float:
+    t0 = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    resp.read()
+    conn.close()
+    if resp.status != 200:
+        raise RuntimeError(f"{path} -> {resp.status}")
+    return (time.perf_counter() - t0) * 1000
+
+
+def _start(mode: str, instance: str, workers: int, threads: int):
+    port = _free_port()
+    env = dict(os.environ, VERIFICATION_SWEEP_INTERVAL="0", PYTHONPATH=ROOT)
+    code = SERVERS[mode].format(port=port, instance=instance, workers=workers, threads=threads)
+    proc = subprocess.Popen(
+        [sys.executable, "-c", code], cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            _get(port, PATHS[0])
+            return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def run_load(port: int, clients: int, seconds: float) -> str:
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+    stop = time.perf_counter() + seconds
+
+    def worker(i):
+        n = i
+        while time.perf_counter() < stop:
+            try:
+                latencies[i].append(_get(port, PATHS[n % len(PATHS)]))
+            except (OSError, RuntimeError):
+                errors[i] += 1
+            n += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    lat = sorted(x for per in latencies for x in per) or [0.0]
+    return (
+        f"{len(lat) / seconds:8.1f} req/s  p50={statistics.median(lat):7.2f} ms  "
+        f"p99={lat[max(0, int(len(lat) * 0.99) - 1)]:7.2f} ms  errors={sum(errors)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    for mode in SERVERS:
+        with tempfile.TemporaryDirectory() as instance:
+            proc, port = _start(mode, instance, args.workers, args.threads)
+            try:
+                label = mode if mode == "dev" else f"serve {args.workers}x{args.threads}"
+                print(f"{label:12s} clients={args.clients:3d}  {run_load(port, args.clients, args.seconds)}")
+            finally:
+                proc.terminate()
+                proc.wait(timeout=60)
+
+
+if __name__ == "__main__":
+    main()
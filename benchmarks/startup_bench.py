@@ -0,0 +1,94 @@
+# benchmarks/startup_bench.py
+"""
+Cold-start time of N pre-forked style workers booting create_app() at once.
+
+Each worker is a fresh interpreter (spawn), so module import time is included.
+Compares:
+  warm   - schema/seed versions match, startup only reads the recorded versions
+  reseed - app_meta cleared once before the workers start, so the boot
+           goes through seed_if_empty again (a deploy after the recorded
+           versions changed)
+
+Background jobs are disabled so no sweeper/compactor thread runs while
+timing.
+
+Usage:
+  python benchmarks/startup_bench.py --workers 8
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _no_background_jobs():
+    os.environ["VERIFICATION_SWEEP_INTERVAL"] = "0"
+    os.environ["CHANGE_LOG_COMPACT_INTERVAL"] = "0"
+
+
+def _boot(instance_path: str, q):
+    sys.path.insert(0, ROOT)
+    _no_background_jobs()
+
+    t0 = time.perf_counter()
+    import app as app_module
+    t1 = time.perf_counter()
+    app_module.create_app(instance_path=instance_path)
+    t2 = time.perf_counter()
+    q.put(((t1 - t0) * 1000, (t2 - t1) * 1000))
+
+
+def run(instance_path: str, workers: int, reseed: bool):
+    if reseed:
+        # once, before any worker starts; the workers must not race on it
+        db = sqlite3.connect(os.path.join(instance_path, "app.sqlite"), timeout=30)
+        db.execute("DELETE FROM app_meta")
+        db.commit()
+        db.close()
+
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    procs = [ctx.Process(target=_boot, args=(instance_path, q)) for _ in range(workers)]
+
+    started = time.perf_counter()
+    for p in procs:
+        p.start()
+    results = [q.get() for _ in procs]
+    for p in procs:
+        p.join()
+    wall = (time.perf_counter() - started) * 1000
+
+    create = [r[1] for r in results]
+    imports = [r[0] for r in results]
+    label = "reseed" if reseed else "warm"
+    print(
+        f"{label:7s} workers={workers:3d}  wall={wall:8.1f} ms  "
+        f"import median={statistics.median(imports):6.1f} ms  "
+        f"create_app median={statistics.median(create):6.1f} ms  max={max(create):6.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as instance_path:
+        # first boot creates and seeds the database
+        sys.path.insert(0, ROOT)
+        _no_background_jobs()
+        import app as app_module
+        app_module.create_app(instance_path=instance_path)
+
+        run(instance_path, args.workers, reseed=False)
+        run(instance_path, args.workers, reseed=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/user_ids_bench.py
+"""
+Storage and query cost of email TEXT keys vs integer user ids (migration 0009).
+
+Builds a throwaway database at schema version 0008, loads the synthetic data
+of index_bench.py (--rows event registrations), records per-table data and
+index bytes (dbstat) and times the per-user queries, applies 0009 and does the
+same with the id-keyed queries from queries.py.
+
+Usage:
+  python benchmarks/user_ids_bench.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import migrate  # noqa: E402
+import queries  # noqa: E402
+from index_bench import load  # noqa: E402
+
+BEFORE_VERSION = 8
+TABLES = ["event_registrations", "room_bookings", "event_requests", "student_hidden_event_requests", "events"]
+
+# name -> (sql before 0009, named query after, key: "email" or "id")
+WORKLOAD = {
+    "me_events": (
+        """
+        SELECT e.id, e.title, e.category, e.date_time, e.location, e.description, e.quota,
+               (SELECT COUNT(*) FROM event_registrations er WHERE er.event_id = e.id) AS registered_count
+        FROM event_registrations my
+        JOIN events e ON e.id = my.event_id
+        WHERE my.user_email = ?
+        ORDER BY e.date_time ASC
+        """,
+        "events.by_user",
+    ),
+    "my_room": (
+        "SELECT room_id FROM room_bookings WHERE user_email = ?",
+        "room_bookings.room_of_user",
+    ),
+    "student_requests": (
+        """
+        SELECT er.*
+        FROM event_requests er
+        LEFT JOIN student_hidden_event_requests h
+          ON h.request_id = er.id AND h.student_email = er.requested_by_email
+        WHERE er.requested_by_email = ?
+          AND h.id IS NULL
+        ORDER BY er.created_at DESC
+        """,
+        "event_requests.visible_for_student",
+    ),
+    "event_roster": (
+        "SELECT user_email, created_at FROM event_registrations WHERE event_id = ? ORDER BY created_at ASC",
+        "event_registrations.roster",
+    ),
+}
+
+
+def sizes(db: sqlite3.Connection) -> dict:
+    """table -> (data bytes, index bytes), or {} without dbstat."""
+    out = {}
+    try:
+        for table in TABLES:
+            data = db.execute("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = ?", (table,)).fetchone()[0]
+            idx = db.execute(
+                """
+                SELECT COALESCE(SUM(pgsize), 0) FROM dbstat
+                WHERE name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?)
+                """,
+                (table,),
+            ).fetchone()[0]
+            out[table] = (int(data), int(idx))
+    except sqlite3.OperationalError:
+        return {}  # dbstat not compiled in
+    return out
+
+
+def _params(name: str, n: dict, by_id: bool):
+    if name == "event_roster":
+        return (random.randrange(1, n["events"] + 1),)
+    u = random.randrange(n["users"])
+    # index_bench.load inserts users first, so user{i} has id i + 1
+    return (u + 1,) if by_id else (f"user{u}@uni-bayreuth.de",)
+
+
+def run_workload(db: sqlite3.Connection, n: dict, iterations: int, by_id: bool) -> dict:
+    out = {}
+    for name, (sql, query_name) in WORKLOAD.items():
+        random.seed(name)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            params = _params(name, n, by_id)
+            if by_id:
+                queries.fetch_all(db, query_name, params)
+            else:
+                db.execute(sql, params).fetchall()
+        out[name] = (time.perf_counter() - started) / iterations * 1000
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000, help="event registrations to load")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = sqlite3.connect(os.path.join(tmp, "bench.sqlite"))
+        migrate.migrate(db, target=BEFORE_VERSION)
+
+        t0 = time.perf_counter()
+        n = load(db, args.rows)
+        print(f"loaded {n} in {time.perf_counter() - t0:.1f} s")
+
+        before_sizes = sizes(db)
+        before = run_workload(db, n, args.iterations, by_id=False)
+
+        t0 = time.perf_counter()
+        migrate.migrate(db)
+        db.execute("ANALYZE")
+        db.commit()
+        print(f"migrated to {migrate.current_version(db):04d} in {time.perf_counter() - t0:.1f} s")
+
+        after_sizes = sizes(db)
+        after = run_workload(db, n, args.iterations, by_id=True)
+
+        if before_sizes:
+            mb = 1024 * 1024
+            print(f"\n{'table':30s} {'data MB':>15s} {'index MB':>15s}")
+            totals = [0, 0, 0, 0]
+            for table in TABLES:
+                bd, bi = before_sizes[table]
+                ad, ai = after_sizes[table]
+                totals = [totals[0] + bd, totals[1] + ad, totals[2] + bi, totals[3] + ai]
+                print(f"{table:30s} {bd / mb:6.1f} -> {ad / mb:5.1f} {bi / mb:6.1f} -> {ai / mb:5.1f}")
+            print(f"{'total':30s} {totals[0] / mb:6.1f} -> {totals[1] / mb:5.1f} "
+                  f"{totals[2] / mb:6.1f} -> {totals[3] / mb:5.1f}")
+        else:
+            print("\n(dbstat not available, sizes skipped)")
+
+        print(f"\n{'query':18s} {'email ms':>10s} {'id ms':>10s} {'speedup':>8s}")
+        for name in WORKLOAD:
+            b, a = before[name], after[name]
+            print(f"{name:18s} {b:10.3f} {a:10.3f} {b / a if a else 0:7.1f}x")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
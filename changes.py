@@ -0,0 +1,123 @@
+# changes.py
+"""
+Incremental sync on top of change_log (migration 0014).
+
+Triggers append (entity, entity_id) for every write to rooms, events and
+event requests (including booking/registration counts). A client remembers
+the version of its last sync and asks /api/changes?since=<version> for
+what changed after it; the answer holds the current state of each changed
+row once, plus the ids of deleted ones, so a refresh costs work proportional
+to what changed, not to the table sizes.
+
+ChangeLogCompactor deletes entries older than the retention period and
+records the highest deleted version in app_meta. A client that is further
+behind than that gets "reset": it reloads the full lists and continues from
+the returned version.
+"""
+import itertools
+import sqlite3
+import threading
+import time
+from typing import Any, Dict
+
+import clock
+from periodic import PeriodicJob
+
+ENTITIES = ("room", "event", "event_request")
+COMPACTED_KEY = "change_log_compacted_through"
+
+
+def current_version(db) -> int:
+    row = db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def compacted_through(db) -> int:
+    row = db.execute("SELECT value FROM app_meta WHERE key = ?", (COMPACTED_KEY,)).fetchone()
+    return int(row[0]) if row else 0
+
+
+def changed_ids(db, since: int, until: int) -> Dict[str, list]:
+    """entity -> ids changed in (since, until], each id once."""
+    out: Dict[str, list] = {entity: [] for entity in ENTITIES}
+    rows = db.execute(
+        "SELECT DISTINCT entity, entity_id FROM change_log WHERE version > ? AND version <= ?",
+        (since, until),
+    )
+    for entity, entity_id in rows:
+        if entity in out:
+            out[entity].append(entity_id)
+    return out
+
+
+class ChangeLogCompactor(PeriodicJob):
+    """
+    Background thread that deletes change_log entries older than
+    retention_seconds, in small batches, each in its own short transaction
+    that also advances change_log_compacted_through.
+    """
+
+    thread_name = "change-log-compactor"
+
+    def __init__(self, db_path: str, retention_seconds: float = 86400, interval_seconds: float = 600,
+                 batch_size: int = 1000, pause_seconds: float = 0.05):
+        super().__init__(interval_seconds)
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+
+        self._lock = threading.Lock()
+        self._stats = {"runs": 0, "deleted_total": 0, "last_run_at": None, "last_deleted": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5)
+        db.execute("PRAGMA busy_timeout = 5000;")
+        return db
+
+    def compact_once(self) -> int:
+        cutoff = clock.now_ts() - int(self.retention_seconds)
+        deleted = 0
+
+        db = self._connect()
+        try:
+            while not self._stop.is_set():
+                # oldest entries first, up to the first recent one
+                rows = db.execute(
+                    "SELECT version, created_ts FROM change_log ORDER BY version LIMIT ?", (self.batch_size,)
+                ).fetchall()
+                old = [version for version, _ in itertools.takewhile(lambda r: r[1] < cutoff, rows)]
+                if not old:
+                    break
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    db.execute("DELETE FROM change_log WHERE version <= ?", (old[-1],))
+                    db.execute(
+                        "UPDATE app_meta SET value = ? WHERE key = ? AND CAST(value AS INTEGER) < ?",
+                        (str(old[-1]), COMPACTED_KEY, old[-1]),
+                    )
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+                deleted += len(old)
+                if len(old) < len(rows):
+                    break
+                time.sleep(self.pause_seconds)
+        finally:
+            db.close()
+
+        with self._lock:
+            s = self._stats
+            s["runs"] += 1
+            s["deleted_total"] += deleted
+            s["last_run_at"] = clock.iso(clock.now_ts())
+            s["last_deleted"] = deleted
+        return deleted
+
+    def run_once(self):
+        self.compact_once()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
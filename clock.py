@@ -0,0 +1,45 @@
+# clock.py
+"""
+Integer timestamps.
+
+- Instants (verification send times) are UTC epoch seconds.
+- Event start times are wall-clock: the local date/time the event was entered
+  with, counted in seconds as if it were UTC. They order exactly like the
+  normalized "YYYY-MM-DDTHH:MM" strings, without a timezone lookup.
+
+Comparisons happen on the integers (in SQL or Python); ISO strings are only
+produced when building a response.
+"""
+import calendar
+import time
+from datetime import datetime, timezone
+
+WALL_FORMAT = "%Y-%m-%dT%H:%M"
+
+
+def now_ts() -> int:
+    return int(time.time())
+
+
+def iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def parse_wall(value: str) -> datetime:
+    """
+    Local date or date-time as entered ("2026-02-01", "2026-02-01T18:00",
+    "2026-02-01 18:00"). Raises ValueError.
+    """
+    return datetime.fromisoformat(value.strip())
+
+
+def wall_ts(dt: datetime) -> int:
+    return calendar.timegm(dt.timetuple())
+
+
+def wall_now_ts() -> int:
+    return wall_ts(datetime.now())
+
+
+def wall_iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(WALL_FORMAT)
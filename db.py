@@ -1,9 +1,13 @@
 # db.py
 import os
 import sqlite3
+import threading
+import time
 from flask import current_app, g
 
-SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "schema.sql")
+import archive
+import queries
+from periodic import PeriodicJob
 
 
 def get_db_path(app) -> str:
@@ -11,32 +15,202 @@ def get_db_path(app) -> str:
     return os.path.join(app.instance_path, "app.sqlite")
 
 
-def get_db(app):
-    if "db" not in g:
-        path = get_db_path(app)
-        db = sqlite3.connect(path)
+class ConnectionPool:
+    """
+    Idle read/write connections, handed to one request at a time and put back
+    at teardown, so the prepared statements cached by sqlite3 (one per named
+    query, see queries.py) are compiled once per connection instead of once
+    per request. At most max_idle connections are kept per database; extra
+    ones (more concurrent requests than that) are closed when returned.
+
+    A connection may be returned on another thread than it was taken on
+    (check_same_thread=False); it is only ever used by one request at a time.
+    After a fork the child starts with an empty pool and never touches the
+    parent's connections.
+    """
+
+    def __init__(self, max_idle: int = 8):
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            # forked: the inherited connections belong to the parent
+            self._idle = {}
+            self._pid = os.getpid()
+
+    def get(self, path: str) -> sqlite3.Connection:
+        with self._lock:
+            self._check_pid()
+            idle = self._idle.get(path)
+            if idle:
+                return idle.pop()
+        db = sqlite3.connect(path, cached_statements=queries.STATEMENT_CACHE_SIZE, check_same_thread=False)
         db.row_factory = sqlite3.Row
         db.execute("PRAGMA foreign_keys = ON;")
-        g.db = db
+        return db
+
+    def put(self, path: str, db: sqlite3.Connection):
+        # never carry a transaction over to the next request
+        db.rollback()
+        with self._lock:
+            self._check_pid()
+            idle = self._idle.setdefault(path, [])
+            if len(idle) < self.max_idle:
+                idle.append(db)
+                return
+        db.close()
+
+    def close_all(self):
+        with self._lock:
+            self._check_pid()
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for db in conns:
+                db.close()
+
+
+_pool = ConnectionPool(int(os.environ.get("DB_POOL_SIZE", "8")))
+
+
+def get_db(app):
+    """
+    Read/write connection for the current request, from the connection pool.
+    """
+    if "db" not in g:
+        g.db_path = get_db_path(app)
+        g.db = _pool.get(g.db_path)
     return g.db
 
 
+def warm_pool(app):
+    """
+    Open this process's first pooled connection and load the schema into it,
+    so the first request does not pay for either. Used by pre-forked workers
+    right after fork (see serve.py); the pool never hands out a connection
+    opened before the fork.
+    """
+    path = get_db_path(app)
+    db = _pool.get(path)
+    db.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    _pool.put(path, db)
+
+
+def _connect_readonly(path: str, immutable: bool = False) -> sqlite3.Connection:
+    uri = f"file:{path}?mode=ro" + ("&immutable=1" if immutable else "")
+    db = sqlite3.connect(uri, uri=True, cached_statements=queries.STATEMENT_CACHE_SIZE)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA query_only = ON;")
+    return db
+
+
+def get_read_db(app, with_archive: bool = False):
+    """
+    Read-only connection for heavy admin reads.
+
+    All reads of one request see the same WAL snapshot (the read transaction
+    is held until teardown), and since WAL readers never take the writer lock,
+    they cannot block student writes. If a SnapshotCopy is running, reads go
+    to its periodically refreshed copy instead of the live file.
+
+    with_archive=True also attaches archive.sqlite as "archive" once something
+    has been archived (check archive.is_attached()).
+    """
+    if "read_db" not in g:
+        snapshot = app.extensions.get("db_snapshot")
+        if snapshot is not None and snapshot.ready():
+            db = _connect_readonly(snapshot.path, immutable=True)
+        else:
+            db = _connect_readonly(get_db_path(app))
+        if with_archive:
+            archive.attach(db, archive.archive_path(get_db_path(app)), readonly=True)
+            g.read_db_archive_checked = True
+        db.execute("BEGIN")
+        g.read_db = db
+    elif with_archive and not g.get("read_db_archive_checked"):
+        # tried once per request: without an archive file there is nothing to
+        # attach, and every retry would restart the read snapshot
+        g.read_db_archive_checked = True
+        path = archive.archive_path(get_db_path(app))
+        if os.path.exists(path):
+            # ATTACH is not allowed inside the read transaction
+            g.read_db.rollback()
+            archive.attach(g.read_db, path, readonly=True)
+            g.read_db.execute("BEGIN")
+    return g.read_db
+
+
 def close_db(e=None):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        _pool.put(g.pop("db_path"), db)
 
+    g.pop("read_db_archive_checked", None)
+    read_db = g.pop("read_db", None)
+    if read_db is not None:
+        read_db.rollback()
+        read_db.close()
 
-def init_db(app):
-    path = get_db_path(app)
-    os.makedirs(app.instance_path, exist_ok=True)
 
-    db = sqlite3.connect(path)
-    db.row_factory = sqlite3.Row
-    db.execute("PRAGMA foreign_keys = ON;")
+class SnapshotCopy(PeriodicJob):
+    """
+    Keeps a copy of the database next to it (app.snapshot.sqlite), refreshed every
+    interval_seconds with sqlite3.Connection.backup.
 
-    with open(SCHEMA_FILE, "r", encoding="utf-8") as f:
-        db.executescript(f.read())
+    The copy is written to a temp file and renamed into place, so readers always
+    open a complete file; connections opened earlier keep reading the old one.
+    """
 
+    thread_name = "db-snapshot"
+
+    def __init__(self, db_path: str, interval_seconds: float = 60, pages_per_step: int = 256):
+        super().__init__(interval_seconds)
+        self.db_path = db_path
+        self.path = os.path.join(os.path.dirname(db_path), "app.snapshot.sqlite")
+        self.pages_per_step = pages_per_step
+        self.last_refresh = None
+
+    def ready(self) -> bool:
+        return self.last_refresh is not None and os.path.exists(self.path)
+
+    def refresh(self):
+        # per-process temp name: every worker of a pre-forked server refreshes on its own
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        src = sqlite3.connect(self.db_path)
+        dst = sqlite3.connect(tmp)
+        try:
+            # copies pages_per_step pages at a time so writers are not held up by one long read
+            src.backup(dst, pages=self.pages_per_step, sleep=0.005)
+            dst.execute("PRAGMA journal_mode = DELETE;")
+            dst.commit()
+        finally:
+            dst.close()
+            src.close()
+        os.replace(tmp, self.path)
+        self.last_refresh = time.time()
+
+    def run_once(self):
+        self.refresh()
+
+
+def read_meta(db) -> dict:
+    try:
+        rows = db.execute("SELECT key, value FROM app_meta").fetchall()
+    except sqlite3.OperationalError:
+        # database created before app_meta existed
+        return {}
+    return {r[0]: r[1] for r in rows}
+
+
+def write_meta(db, key: str, value: str):
+    db.execute(
+        """
+        INSERT INTO app_meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """,
+        (key, value),
+    )
     db.commit()
-    db.close()
+
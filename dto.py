@@ -1,10 +1,10 @@
 # dto.py
-from dataclasses import dataclass
-from typing import Optional, Dict, Any
+# NamedTuples: slotted and built positionally straight from query rows
+# (see the row factories in queries.py).
+from typing import Any, Dict, NamedTuple, Optional
 
 
-@dataclass
-class RoomDto:
+class RoomDto(NamedTuple):
     id: int
     type: str
     title: str
@@ -31,25 +31,27 @@ class RoomDto:
         }
 
 
-@dataclass
-class EventDto:
+class EventDto(NamedTuple):
     id: int
     title: str
     category: str
     date_time: str
+    duration_minutes: int
     location: str
     description: str
     quota: Optional[int]
     registered_count: int
     remaining: Optional[int]
     is_full: bool
+    is_registered: Optional[bool] = None  # only set for personalized listings
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        out = {
             "id": self.id,
             "title": self.title,
             "category": self.category,
             "date_time": self.date_time,
+            "duration_minutes": self.duration_minutes,
             "location": self.location,
             "description": self.description,
             "quota": self.quota,
@@ -57,10 +59,12 @@ class EventDto:
             "remaining": self.remaining,
             "is_full": self.is_full,
         }
+        if self.is_registered is not None:
+            out["is_registered"] = self.is_registered
+        return out
 
 
-@dataclass
-class InfoPageDto:
+class InfoPageDto(NamedTuple):
     id: int
     slug: str
     title: str
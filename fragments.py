@@ -0,0 +1,46 @@
+# fragments.py
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class FragmentCache:
+    """
+    Process-local LRU of server-rendered page parts and the data behind them
+    (see rooms_page / events_page in app.py).
+
+    Callers put the change_log version (changes.py) into every key. Any write
+    to rooms, events, requests or admin settings advances it, so entries from
+    before a write are never hit again and age out of the LRU; nothing has to
+    be invalidated explicitly. Values are shared between requests and must not
+    be mutated.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+            self._misses += 1
+
+        # built outside the lock; two requests missing at once both build, which is harmless
+        value = build()
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
@@ -0,0 +1,91 @@
+# info_bundle.py
+import gzip
+import hashlib
+import json
+from typing import Callable, Dict, Optional
+
+from flask import Response
+
+from dto import InfoPageDto
+
+
+def content_hash(slug: str, title: str, content: str) -> str:
+    h = hashlib.sha256()
+    for part in (slug, title, content):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _default_dumps(obj) -> str:
+    # same output as Flask's jsonify in non-debug mode
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(",", ":"))
+
+
+class _Entry:
+    __slots__ = ("etag", "raw", "gz")
+
+    def __init__(self, payload: bytes, etag: str):
+        self.etag = etag
+        self.raw = payload
+        self.gz = gzip.compress(payload, compresslevel=9, mtime=0)
+
+
+class InfoBundle:
+    """
+    Info pages precomputed as JSON bytes (plain + gzip), keyed by content hash.
+    Built once from info_pages; requests are served without touching the DB.
+    """
+
+    def __init__(self, rows, dumps: Optional[Callable] = None):
+        dumps = dumps or _default_dumps
+
+        self._pages: Dict[str, _Entry] = {}
+        listing = []
+        version = hashlib.sha256()
+
+        for r in sorted(rows, key=lambda r: r["slug"]):
+            dto = InfoPageDto(id=int(r["id"]), slug=r["slug"], title=r["title"], content=r["content"])
+            h = content_hash(dto.slug, dto.title, dto.content)
+            version.update(h.encode("ascii"))
+            self._pages[dto.slug] = _Entry(dumps(dto.to_dict()).encode("utf-8"), h[:32])
+            listing.append({"slug": dto.slug, "title": dto.title, "content": dto.content})
+
+        self.version = version.hexdigest()[:32]
+        self._all = _Entry(dumps(listing).encode("utf-8"), self.version)
+
+    def page(self, slug: str) -> Optional[_Entry]:
+        return self._pages.get(slug)
+
+    def all(self) -> _Entry:
+        return self._all
+
+
+def load_bundle(db, dumps: Optional[Callable] = None) -> InfoBundle:
+    rows = db.execute("SELECT id, slug, title, content FROM info_pages").fetchall()
+    return InfoBundle(rows, dumps)
+
+
+def respond(entry: _Entry, req) -> Response:
+    """
+    Serve a precomputed entry, honouring If-None-Match and Accept-Encoding: gzip.
+    The gzip and plain bodies are different representations, so each has its
+    own ETag ("<hash>-gz" for gzip).
+    """
+    use_gzip = req.accept_encodings["gzip"] > 0  # q-values parsed; gzip;q=0 refuses it
+    tag = f"{entry.etag}-gz" if use_gzip else entry.etag
+    headers = {
+        "ETag": f'"{tag}"',
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-cache",
+    }
+
+    if req.if_none_match.contains(tag):
+        return Response(status=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        body = entry.gz
+    else:
+        body = entry.raw
+    return Response(body, status=200, mimetype="application/json", headers=headers)
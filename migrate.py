@@ -0,0 +1,340 @@
+# migrate.py
+"""
+Versioned schema migrations.
+
+Migrations live in migrations/ as NNNN_name.sql or NNNN_name.py and are applied
+in version order. Applied versions are recorded in schema_migrations.
+
+Rules for writing migrations (they run against live databases):
+- Every statement must be idempotent (IF NOT EXISTS, add_column(), ...).
+  SQL files run one statement per transaction, so a failed migration can
+  simply be re-run.
+- Build each index in its own statement / create_index() call. In WAL mode
+  readers keep working while the index is built, and the writer lock is only
+  held for that one index.
+- Large data rewrites go through backfill(), which updates bounded batches
+  and commits between them so request handlers can still write.
+
+Usage:
+  python migrate.py             apply pending migrations to instance/app.sqlite
+  python migrate.py --status    list applied / pending migrations
+"""
+import argparse
+import importlib.util
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+_FILE_RE = re.compile(r"^(\d{4})_([a-z0-9_]+)\.(sql|py)$")
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+    kind: str  # "sql" or "py"
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    found = {}
+    for fname in os.listdir(directory):
+        m = _FILE_RE.match(fname)
+        if not m:
+            continue
+        version = int(m.group(1))
+        if version in found:
+            raise RuntimeError(f"Duplicate migration version {version:04d}")
+        found[version] = Migration(version, m.group(2), os.path.join(directory, fname), m.group(3))
+    return [found[v] for v in sorted(found)]
+
+
+def latest_version(directory: str = MIGRATIONS_DIR) -> int:
+    migrations = discover(directory)
+    return migrations[-1].version if migrations else 0
+
+
+def _ensure_table(db: sqlite3.Connection):
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+          version INTEGER PRIMARY KEY,
+          name TEXT NOT NULL,
+          applied_at TEXT NOT NULL
+        )
+        """
+    )
+    db.commit()
+
+
+def applied_versions(db: sqlite3.Connection) -> set:
+    try:
+        rows = db.execute("SELECT version FROM schema_migrations").fetchall()
+    except sqlite3.OperationalError:
+        return set()
+    return {int(r[0]) for r in rows}
+
+
+def current_version(db: sqlite3.Connection) -> int:
+    try:
+        row = db.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0] or 0)
+
+
+def pending(db: sqlite3.Connection, directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    done = applied_versions(db)
+    return [m for m in discover(directory) if m.version not in done]
+
+
+def _table_exists(db: sqlite3.Connection, table: str) -> bool:
+    row = db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return row is not None
+
+
+def _record(db: sqlite3.Connection, m: Migration):
+    db.execute(
+        "INSERT OR IGNORE INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+        (m.version, m.name, _now_iso()),
+    )
+    db.commit()
+
+
+def split_sql(script: str) -> List[str]:
+    statements = []
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            stmt = buf.strip()
+            if stmt and not all(l.strip().startswith("--") or not l.strip() for l in stmt.splitlines()):
+                statements.append(stmt)
+            buf = ""
+    if buf.strip() and not all(l.strip().startswith("--") or not l.strip() for l in buf.splitlines()):
+        raise RuntimeError("Incomplete SQL statement at end of migration")
+    return statements
+
+
+def _run_sql(db: sqlite3.Connection, m: Migration):
+    with open(m.path, "r", encoding="utf-8") as f:
+        script = f.read()
+    for stmt in split_sql(script):
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(stmt)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+
+def _run_py(db: sqlite3.Connection, m: Migration):
+    spec = importlib.util.spec_from_file_location(f"migration_{m.version:04d}", m.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(db)
+    db.commit()
+
+
+def migrate(db: sqlite3.Connection, target: Optional[int] = None, directory: str = MIGRATIONS_DIR,
+            log=None) -> List[Migration]:
+    """
+    Apply pending migrations (up to target, if given). Returns the migrations applied.
+    """
+    db.execute("PRAGMA busy_timeout = 5000;")
+    db.execute("PRAGMA journal_mode = WAL;")
+    db.execute("PRAGMA foreign_keys = ON;")
+
+    _ensure_table(db)
+    migrations = discover(directory)
+    done = applied_versions(db)
+
+    # database created by the old destructive schema.sql: treat it as the baseline
+    if not done and migrations and _table_exists(db, "rooms"):
+        _record(db, migrations[0])
+        done.add(migrations[0].version)
+
+    applied = []
+    for m in migrations:
+        if m.version in done:
+            continue
+        if target is not None and m.version > target:
+            break
+        started = time.perf_counter()
+        if m.kind == "sql":
+            _run_sql(db, m)
+        else:
+            _run_py(db, m)
+        _record(db, m)
+        applied.append(m)
+        if log:
+            log(f"applied {m.version:04d}_{m.name} in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return applied
+
+
+# ---------------- Helpers for .py migrations ----------------
+
+def column_names(db: sqlite3.Connection, table: str) -> set:
+    return {r[1] for r in db.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def add_column(db: sqlite3.Connection, table: str, column: str, ddl: str):
+    """
+    ALTER TABLE ... ADD COLUMN unless the column already exists.
+    Adding a column only rewrites the schema, not the table, so it is cheap.
+    """
+    if column not in column_names(db, table):
+        db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        db.commit()
+
+
+def create_index(db: sqlite3.Connection, name: str, table: str, columns: str, unique: bool = False,
+                 where: str = ""):
+    """
+    Build one index in its own short transaction.
+    """
+    u = "UNIQUE " if unique else ""
+    w = f" WHERE {where}" if where else ""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        db.execute(f"CREATE {u}INDEX IF NOT EXISTS {name} ON {table}({columns}){w}")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def run_atomic(db: sqlite3.Connection, script: str):
+    """
+    Run all statements of script in one IMMEDIATE transaction.
+    For small DDL groups that must appear together (e.g. triggers plus the
+    backfill of the tables they maintain).
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        for stmt in split_sql(script):
+            db.execute(stmt)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def rebuild_table(db: sqlite3.Connection, table: str, create_sql: str, copy_sql: str, indexes=()):
+    """
+    Replace table with a new definition, for changes ALTER TABLE cannot make
+    (dropping constrained columns, changing types). create_sql must create
+    "{table}_new", copy_sql fills it from table. The table's triggers are
+    re-created on the new table; its old indexes are dropped with it, so
+    indexes lists the CREATE INDEX statements for the new one.
+
+    Runs in one IMMEDIATE transaction. Foreign keys must be off (a DROP TABLE
+    with them on would cascade into child tables), see foreign_keys_off().
+    """
+    triggers = [r[0] for r in db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,)
+    ).fetchall()]
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        db.execute(f"DROP TABLE IF EXISTS {table}_new")
+        db.execute(create_sql)
+        db.execute(copy_sql)
+        db.execute(f"DROP TABLE {table}")
+        db.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        for stmt in list(indexes) + triggers:
+            db.execute(stmt)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+class foreign_keys_off:
+    """
+    with foreign_keys_off(db): ...  -- for table rebuilds.
+    Checks for dangling references before turning enforcement back on.
+    """
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def __enter__(self):
+        self.db.commit()
+        self.db.execute("PRAGMA foreign_keys = OFF")
+        self.db.execute("PRAGMA legacy_alter_table = ON")  # RENAME must not rewrite/validate other objects
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("PRAGMA legacy_alter_table = OFF")
+        try:
+            if exc_type is None:
+                bad = self.db.execute("PRAGMA foreign_key_check").fetchall()
+                if bad:
+                    raise RuntimeError(f"foreign key violations after rebuild: {bad[:5]}")
+        finally:
+            self.db.execute("PRAGMA foreign_keys = ON")
+        return False
+
+
+def drop_index(db: sqlite3.Connection, name: str):
+    db.execute(f"DROP INDEX IF EXISTS {name}")
+    db.commit()
+
+
+def backfill(db: sqlite3.Connection, table: str, set_sql: str, where_sql: str, params=(),
+             batch_size: int = 1000, pause_seconds: float = 0.01) -> int:
+    """
+    UPDATE table SET set_sql WHERE where_sql, batch_size rows per transaction.
+
+    where_sql must stop matching a row once it has been updated
+    (e.g. "new_col IS NULL"), otherwise this never finishes.
+    The pause between batches lets waiting writers take the lock.
+    """
+    total = 0
+    while True:
+        cur = db.execute(
+            f"""
+            UPDATE {table} SET {set_sql}
+            WHERE rowid IN (SELECT rowid FROM {table} WHERE {where_sql} LIMIT ?)
+            """,
+            (*params, batch_size),
+        )
+        db.commit()
+        total += cur.rowcount
+        if cur.rowcount < batch_size:
+            return total
+        time.sleep(pause_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(__file__), "instance", "app.sqlite"))
+    parser.add_argument("--status", action="store_true", help="show applied/pending migrations and exit")
+    parser.add_argument("--target", type=int, default=None, help="migrate up to this version")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    db = sqlite3.connect(args.db)
+    try:
+        if args.status:
+            done = applied_versions(db)
+            for m in discover():
+                print(f"{'applied' if m.version in done else 'pending'}  {m.version:04d}_{m.name}")
+            return
+        applied = migrate(db, target=args.target, log=print)
+        if not applied:
+            print(f"up to date (version {current_version(db)})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
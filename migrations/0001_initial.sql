@@ -1,24 +1,12 @@
-PRAGMA foreign_keys = ON;
-
-DROP TABLE IF EXISTS student_hidden_event_requests;
-DROP TABLE IF EXISTS event_registrations;
-DROP TABLE IF EXISTS room_bookings;
-
-DROP TABLE IF EXISTS event_requests;
-DROP TABLE IF EXISTS admin_settings;
-
-DROP TABLE IF EXISTS email_verifications;
-DROP TABLE IF EXISTS users;
-
-DROP TABLE IF EXISTS rooms;
-DROP TABLE IF EXISTS events;
-DROP TABLE IF EXISTS info_pages;
+-- migrations/0001_initial.sql
+-- Baseline schema (what schema.sql created before migrations existed).
+-- Databases created from that file are recorded as being at this version.
 
 -- -------------------------
 -- Core domain tables
 -- -------------------------
 
-CREATE TABLE rooms (
+CREATE TABLE IF NOT EXISTS rooms (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   type TEXT NOT NULL CHECK (type IN ('single','shared','studio')),
   title TEXT NOT NULL,
@@ -29,7 +17,7 @@ CREATE TABLE rooms (
 );
 
 -- Only ACCEPTED events become visible in events list
-CREATE TABLE events (
+CREATE TABLE IF NOT EXISTS events (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   title TEXT NOT NULL,
   category TEXT NOT NULL CHECK (category IN ('social','orientation','study_group')),
@@ -41,7 +29,7 @@ CREATE TABLE events (
   created_at TEXT NOT NULL
 );
 
-CREATE TABLE info_pages (
+CREATE TABLE IF NOT EXISTS info_pages (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   slug TEXT NOT NULL UNIQUE,
   title TEXT NOT NULL,
@@ -52,7 +40,7 @@ CREATE TABLE info_pages (
 -- Auth tables (prototype: store plain code too)
 -- -------------------------
 
-CREATE TABLE users (
+CREATE TABLE IF NOT EXISTS users (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   email TEXT NOT NULL UNIQUE,
   password_hash TEXT NOT NULL,
@@ -62,7 +50,7 @@ CREATE TABLE users (
 
 -- Prototype mode: store code_plain so UI can display it
 -- Real mode: you would NOT store code_plain
-CREATE TABLE email_verifications (
+CREATE TABLE IF NOT EXISTS email_verifications (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   email TEXT NOT NULL UNIQUE,
   code_hash TEXT NOT NULL,
@@ -76,18 +64,18 @@ CREATE TABLE email_verifications (
 -- Admin settings
 -- -------------------------
 
-CREATE TABLE admin_settings (
+CREATE TABLE IF NOT EXISTS admin_settings (
   key TEXT PRIMARY KEY,
   value TEXT NOT NULL
 );
 
-INSERT INTO admin_settings (key, value) VALUES ('rooms_open', '1');
+INSERT OR IGNORE INTO admin_settings (key, value) VALUES ('rooms_open', '1');
 
 -- -------------------------
 -- One room per student
 -- -------------------------
 
-CREATE TABLE room_bookings (
+CREATE TABLE IF NOT EXISTS room_bookings (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   room_id INTEGER NOT NULL,
   user_email TEXT NOT NULL UNIQUE,
@@ -99,7 +87,7 @@ CREATE TABLE room_bookings (
 -- Event registrations
 -- -------------------------
 
-CREATE TABLE event_registrations (
+CREATE TABLE IF NOT EXISTS event_registrations (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   event_id INTEGER NOT NULL,
   user_email TEXT NOT NULL,
@@ -112,7 +100,7 @@ CREATE TABLE event_registrations (
 -- Student event requests
 -- -------------------------
 
-CREATE TABLE event_requests (
+CREATE TABLE IF NOT EXISTS event_requests (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   title TEXT NOT NULL,
   category TEXT NOT NULL CHECK (category IN ('social','orientation','study_group')),
@@ -127,7 +115,7 @@ CREATE TABLE event_requests (
   updated_at TEXT NOT NULL
 );
 
-CREATE TABLE student_hidden_event_requests (
+CREATE TABLE IF NOT EXISTS student_hidden_event_requests (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   request_id INTEGER NOT NULL,
   student_email TEXT NOT NULL,
@@ -137,13 +125,13 @@ CREATE TABLE student_hidden_event_requests (
 );
 
 -- Helpful indexes
-CREATE INDEX idx_users_email ON users(email);
-CREATE INDEX idx_users_role ON users(role);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
 
-CREATE INDEX idx_room_bookings_room ON room_bookings(room_id);
-CREATE INDEX idx_event_regs_event ON event_registrations(event_id);
+CREATE INDEX IF NOT EXISTS idx_room_bookings_room ON room_bookings(room_id);
+CREATE INDEX IF NOT EXISTS idx_event_regs_event ON event_registrations(event_id);
 
-CREATE INDEX idx_event_requests_student ON event_requests(requested_by_email);
-CREATE INDEX idx_event_requests_status ON event_requests(status);
+CREATE INDEX IF NOT EXISTS idx_event_requests_student ON event_requests(requested_by_email);
+CREATE INDEX IF NOT EXISTS idx_event_requests_status ON event_requests(status);
 
-CREATE INDEX idx_hidden_req_student ON student_hidden_event_requests(student_email);
+CREATE INDEX IF NOT EXISTS idx_hidden_req_student ON student_hidden_event_requests(student_email);
@@ -0,0 +1,8 @@
+# migrations/0002_verification_expiry.py
+# Wrong-code counter and send-time index for expiring verification codes.
+from migrate import add_column, create_index
+
+
+def upgrade(db):
+    add_column(db, "email_verifications", "attempts", "INTEGER NOT NULL DEFAULT 0")
+    create_index(db, "idx_email_verifications_last_sent", "email_verifications", "last_sent_at")
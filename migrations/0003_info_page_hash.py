@@ -0,0 +1,7 @@
+# migrations/0003_info_page_hash.py
+# Content hash used by the seed to skip unchanged info pages.
+from migrate import add_column
+
+
+def upgrade(db):
+    add_column(db, "info_pages", "content_hash", "TEXT NULL")
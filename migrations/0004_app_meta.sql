@@ -0,0 +1,7 @@
+-- migrations/0004_app_meta.sql
+-- seed_version, checked at startup to skip seeding
+
+CREATE TABLE IF NOT EXISTS app_meta (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL
+);
@@ -0,0 +1,5 @@
+-- migrations/0005_event_regs_user_index.sql
+-- Per-user lookups on event_registrations (is_registered flag, "my events").
+-- UNIQUE(event_id, user_email) leads with event_id and cannot serve them.
+
+CREATE INDEX IF NOT EXISTS idx_event_regs_user_event ON event_registrations(user_email, event_id);
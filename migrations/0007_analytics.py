@@ -0,0 +1,160 @@
+# migrations/0007_analytics.py
+# Summary tables for admin analytics, kept up to date by triggers.
+# Tables, triggers and the initial backfill are created in one transaction so
+# no write can slip in between (it would be missed or counted twice).
+from migrate import run_atomic
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats_room_groups (
+  room_type TEXT NOT NULL,
+  price_band INTEGER NOT NULL,          -- price_eur rounded down to 100
+  rooms INTEGER NOT NULL DEFAULT 0,
+  capacity INTEGER NOT NULL DEFAULT 0,
+  booked INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (room_type, price_band)
+);
+
+CREATE TABLE IF NOT EXISTS stats_event_regs_daily (
+  event_id INTEGER NOT NULL,
+  category TEXT NOT NULL,
+  day TEXT NOT NULL,                    -- YYYY-MM-DD of registration created_at
+  registrations INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (event_id, day)
+);
+CREATE INDEX IF NOT EXISTS idx_stats_event_regs_daily_category ON stats_event_regs_daily(category, day);
+
+CREATE TABLE IF NOT EXISTS stats_request_status (
+  status TEXT PRIMARY KEY,
+  requests INTEGER NOT NULL DEFAULT 0
+);
+
+-- rooms -----------------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_rooms_insert AFTER INSERT ON rooms
+BEGIN
+  INSERT INTO stats_room_groups (room_type, price_band, rooms, capacity, booked)
+  VALUES (NEW.type, (NEW.price_eur / 100) * 100, 1, NEW.capacity, 0)
+  ON CONFLICT(room_type, price_band) DO UPDATE SET
+    rooms = rooms + 1,
+    capacity = capacity + excluded.capacity;
+END;
+
+-- BEFORE: bookings are still present, cascaded booking deletes then find no room
+CREATE TRIGGER IF NOT EXISTS trg_stats_rooms_delete BEFORE DELETE ON rooms
+BEGIN
+  UPDATE stats_room_groups
+  SET rooms = rooms - 1,
+      capacity = capacity - OLD.capacity,
+      booked = booked - (SELECT COUNT(*) FROM room_bookings WHERE room_id = OLD.id)
+  WHERE room_type = OLD.type AND price_band = (OLD.price_eur / 100) * 100;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_rooms_update AFTER UPDATE OF type, price_eur, capacity ON rooms
+BEGIN
+  UPDATE stats_room_groups
+  SET rooms = rooms - 1,
+      capacity = capacity - OLD.capacity,
+      booked = booked - (SELECT COUNT(*) FROM room_bookings WHERE room_id = OLD.id)
+  WHERE room_type = OLD.type AND price_band = (OLD.price_eur / 100) * 100;
+
+  INSERT INTO stats_room_groups (room_type, price_band, rooms, capacity, booked)
+  VALUES (NEW.type, (NEW.price_eur / 100) * 100, 1, NEW.capacity,
+          (SELECT COUNT(*) FROM room_bookings WHERE room_id = NEW.id))
+  ON CONFLICT(room_type, price_band) DO UPDATE SET
+    rooms = rooms + 1,
+    capacity = capacity + excluded.capacity,
+    booked = booked + excluded.booked;
+END;
+
+-- room_bookings ---------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_room_bookings_insert AFTER INSERT ON room_bookings
+BEGIN
+  UPDATE stats_room_groups
+  SET booked = booked + 1
+  WHERE (room_type, price_band) =
+        (SELECT type, (price_eur / 100) * 100 FROM rooms WHERE id = NEW.room_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_room_bookings_delete AFTER DELETE ON room_bookings
+BEGIN
+  UPDATE stats_room_groups
+  SET booked = booked - 1
+  WHERE (room_type, price_band) =
+        (SELECT type, (price_eur / 100) * 100 FROM rooms WHERE id = OLD.room_id);
+END;
+
+-- event_registrations ---------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_event_regs_insert AFTER INSERT ON event_registrations
+BEGIN
+  INSERT INTO stats_event_regs_daily (event_id, category, day, registrations)
+  VALUES (NEW.event_id,
+          COALESCE((SELECT category FROM events WHERE id = NEW.event_id), ''),
+          substr(NEW.created_at, 1, 10),
+          1)
+  ON CONFLICT(event_id, day) DO UPDATE SET registrations = registrations + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_event_regs_delete AFTER DELETE ON event_registrations
+BEGIN
+  UPDATE stats_event_regs_daily
+  SET registrations = registrations - 1
+  WHERE event_id = OLD.event_id AND day = substr(OLD.created_at, 1, 10);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_events_category AFTER UPDATE OF category ON events
+BEGIN
+  UPDATE stats_event_regs_daily SET category = NEW.category WHERE event_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_events_delete AFTER DELETE ON events
+BEGIN
+  DELETE FROM stats_event_regs_daily WHERE event_id = OLD.id;
+END;
+
+-- event_requests --------------------------------------------------------
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_requests_insert AFTER INSERT ON event_requests
+BEGIN
+  INSERT INTO stats_request_status (status, requests) VALUES (NEW.status, 1)
+  ON CONFLICT(status) DO UPDATE SET requests = requests + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_requests_status AFTER UPDATE OF status ON event_requests
+WHEN OLD.status <> NEW.status
+BEGIN
+  UPDATE stats_request_status SET requests = requests - 1 WHERE status = OLD.status;
+  INSERT INTO stats_request_status (status, requests) VALUES (NEW.status, 1)
+  ON CONFLICT(status) DO UPDATE SET requests = requests + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_requests_delete AFTER DELETE ON event_requests
+BEGIN
+  UPDATE stats_request_status SET requests = requests - 1 WHERE status = OLD.status;
+END;
+
+-- backfill --------------------------------------------------------------
+
+DELETE FROM stats_room_groups;
+INSERT INTO stats_room_groups (room_type, price_band, rooms, capacity, booked)
+SELECT r.type, (r.price_eur / 100) * 100, COUNT(*), SUM(r.capacity),
+       COALESCE(SUM((SELECT COUNT(*) FROM room_bookings rb WHERE rb.room_id = r.id)), 0)
+FROM rooms r
+GROUP BY r.type, (r.price_eur / 100) * 100;
+
+DELETE FROM stats_event_regs_daily;
+INSERT INTO stats_event_regs_daily (event_id, category, day, registrations)
+SELECT er.event_id, e.category, substr(er.created_at, 1, 10), COUNT(*)
+FROM event_registrations er
+JOIN events e ON e.id = er.event_id
+GROUP BY er.event_id, substr(er.created_at, 1, 10);
+
+DELETE FROM stats_request_status;
+INSERT INTO stats_request_status (status, requests)
+SELECT status, COUNT(*) FROM event_requests GROUP BY status;
+"""
+
+
+def upgrade(db):
+    run_atomic(db, SCHEMA)
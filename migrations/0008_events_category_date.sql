@@ -0,0 +1,5 @@
+-- migrations/0008_events_category_date.sql
+-- /api/events category filter: equality on category, then range/order on date_time.
+-- Listings without a category keep using idx_events_date_time.
+
+CREATE INDEX IF NOT EXISTS idx_events_category_date ON events(category, date_time);
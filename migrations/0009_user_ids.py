@@ -0,0 +1,154 @@
+# migrations/0009_user_ids.py
+# Replace the email TEXT columns that reference users with integer user ids:
+#   room_bookings.user_email                    -> user_id
+#   event_registrations.user_email              -> user_id
+#   student_hidden_event_requests.student_email -> student_id
+#   event_requests.requested_by_email           -> requested_by_id
+#   events.created_by_email                     -> created_by_id
+# SQLite cannot drop columns that are part of a UNIQUE constraint or index,
+# so each table is rebuilt (one transaction per table).
+# Bookings/registrations/hidden flags whose email has no user row cannot be
+# valid and are deleted first (so the stats triggers of 0007 see the deletes);
+# requests and events keep a NULL author instead.
+from migrate import column_names, foreign_keys_off, rebuild_table, run_atomic
+
+ORPHANS = {
+    "room_bookings": "DELETE FROM room_bookings WHERE user_email NOT IN (SELECT email FROM users);",
+    "event_registrations": "DELETE FROM event_registrations WHERE user_email NOT IN (SELECT email FROM users);",
+    "student_hidden_event_requests":
+        "DELETE FROM student_hidden_event_requests WHERE student_email NOT IN (SELECT email FROM users);",
+}
+
+TABLES = [
+    (
+        "room_bookings", "user_email",
+        """
+        CREATE TABLE room_bookings_new (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          room_id INTEGER NOT NULL,
+          user_id INTEGER NOT NULL UNIQUE,
+          created_at TEXT NOT NULL,
+          FOREIGN KEY (room_id) REFERENCES rooms(id) ON DELETE CASCADE,
+          FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        INSERT INTO room_bookings_new (id, room_id, user_id, created_at)
+        SELECT rb.id, rb.room_id, u.id, rb.created_at
+        FROM room_bookings rb JOIN users u ON u.email = rb.user_email
+        """,
+        [
+            "CREATE INDEX idx_room_bookings_room_created ON room_bookings(room_id, created_at)",
+        ],
+    ),
+    (
+        "event_registrations", "user_email",
+        """
+        CREATE TABLE event_registrations_new (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          event_id INTEGER NOT NULL,
+          user_id INTEGER NOT NULL,
+          created_at TEXT NOT NULL,
+          UNIQUE(event_id, user_id),
+          FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+          FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        INSERT INTO event_registrations_new (id, event_id, user_id, created_at)
+        SELECT er.id, er.event_id, u.id, er.created_at
+        FROM event_registrations er JOIN users u ON u.email = er.user_email
+        """,
+        [
+            "CREATE INDEX idx_event_regs_user_event ON event_registrations(user_id, event_id)",
+            "CREATE INDEX idx_event_regs_event_created ON event_registrations(event_id, created_at)",
+        ],
+    ),
+    (
+        "student_hidden_event_requests", "student_email",
+        """
+        CREATE TABLE student_hidden_event_requests_new (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          request_id INTEGER NOT NULL,
+          student_id INTEGER NOT NULL,
+          created_at TEXT NOT NULL,
+          UNIQUE(request_id, student_id),
+          FOREIGN KEY (request_id) REFERENCES event_requests(id) ON DELETE CASCADE,
+          FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+        """,
+        """
+        INSERT INTO student_hidden_event_requests_new (id, request_id, student_id, created_at)
+        SELECT h.id, h.request_id, u.id, h.created_at
+        FROM student_hidden_event_requests h JOIN users u ON u.email = h.student_email
+        """,
+        [],
+    ),
+    (
+        "event_requests", "requested_by_email",
+        """
+        CREATE TABLE event_requests_new (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          title TEXT NOT NULL,
+          category TEXT NOT NULL CHECK (category IN ('social','orientation','study_group')),
+          date_time TEXT NOT NULL,
+          location TEXT NOT NULL,
+          description TEXT NOT NULL,
+          quota INTEGER NULL CHECK (quota IS NULL OR quota >= 0),
+          requested_by_id INTEGER NULL REFERENCES users(id) ON DELETE SET NULL,
+          status TEXT NOT NULL CHECK (status IN ('pending','accepted','rejected')),
+          admin_comment TEXT NULL,
+          created_at TEXT NOT NULL,
+          updated_at TEXT NOT NULL
+        )
+        """,
+        """
+        INSERT INTO event_requests_new
+          (id, title, category, date_time, location, description, quota, requested_by_id,
+           status, admin_comment, created_at, updated_at)
+        SELECT r.id, r.title, r.category, r.date_time, r.location, r.description, r.quota, u.id,
+               r.status, r.admin_comment, r.created_at, r.updated_at
+        FROM event_requests r LEFT JOIN users u ON u.email = r.requested_by_email
+        """,
+        [
+            "CREATE INDEX idx_event_requests_student_created ON event_requests(requested_by_id, created_at)",
+            "CREATE INDEX idx_event_requests_status_updated ON event_requests(status, updated_at)",
+        ],
+    ),
+    (
+        "events", "created_by_email",
+        """
+        CREATE TABLE events_new (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          title TEXT NOT NULL,
+          category TEXT NOT NULL CHECK (category IN ('social','orientation','study_group')),
+          date_time TEXT NOT NULL,
+          location TEXT NOT NULL,
+          description TEXT NOT NULL,
+          quota INTEGER NULL CHECK (quota IS NULL OR quota >= 0), -- NULL = unlimited
+          created_by_id INTEGER NULL REFERENCES users(id) ON DELETE SET NULL,
+          created_at TEXT NOT NULL
+        )
+        """,
+        """
+        INSERT INTO events_new
+          (id, title, category, date_time, location, description, quota, created_by_id, created_at)
+        SELECT e.id, e.title, e.category, e.date_time, e.location, e.description, e.quota, u.id, e.created_at
+        FROM events e LEFT JOIN users u ON u.email = e.created_by_email
+        """,
+        [
+            "CREATE INDEX idx_events_date_time ON events(date_time)",
+            "CREATE INDEX idx_events_category_date ON events(category, date_time)",
+        ],
+    ),
+]
+
+
+def upgrade(db):
+    with foreign_keys_off(db):
+        for table, old_column, create_sql, copy_sql, indexes in TABLES:
+            if old_column not in column_names(db, table):
+                continue  # already rebuilt by an earlier, interrupted run
+            if table in ORPHANS:
+                run_atomic(db, ORPHANS[table])
+            rebuild_table(db, table, create_sql, copy_sql, indexes)
@@ -0,0 +1,67 @@
+# migrations/0010_epoch_timestamps.py
+# Integer time columns for the comparisons on the hot paths (see clock.py):
+# - events.starts_at: wall-clock seconds of date_time, which stays as the
+#   display string. Kept in sync by triggers, so every writer (handlers, seed,
+#   scripts) gets it. Listing filters and ordering use starts_at; dates that
+#   do not parse are left NULL and only show up in "all" listings.
+# - email_verifications.created_ts / last_sent_ts: UTC epoch seconds,
+#   replacing the ISO TEXT columns (small, short-lived table: rebuilt).
+from migrate import (add_column, backfill, column_names, create_index, drop_index, foreign_keys_off,
+                     rebuild_table, run_atomic)
+
+# strftime('%s') reads the naive date_time as UTC, which is what clock.wall_ts() does
+STARTS_AT_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS trg_events_starts_at_insert AFTER INSERT ON events
+BEGIN
+  UPDATE events SET starts_at = CAST(strftime('%s', NEW.date_time) AS INTEGER) WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_starts_at_update AFTER UPDATE OF date_time ON events
+BEGIN
+  UPDATE events SET starts_at = CAST(strftime('%s', NEW.date_time) AS INTEGER) WHERE id = NEW.id;
+END;
+"""
+
+VERIFICATIONS_NEW = """
+CREATE TABLE email_verifications_new (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  email TEXT NOT NULL UNIQUE,
+  code_hash TEXT NOT NULL,
+  code_plain TEXT NOT NULL,
+  password_hash TEXT NOT NULL,
+  created_ts INTEGER NOT NULL,
+  last_sent_ts INTEGER NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+VERIFICATIONS_COPY = """
+INSERT INTO email_verifications_new
+  (id, email, code_hash, code_plain, password_hash, created_ts, last_sent_ts, attempts)
+SELECT id, email, code_hash, code_plain, password_hash,
+       COALESCE(CAST(strftime('%s', created_at) AS INTEGER), 0),
+       COALESCE(CAST(strftime('%s', last_sent_at) AS INTEGER), 0),
+       attempts
+FROM email_verifications
+"""
+
+
+def upgrade(db):
+    add_column(db, "events", "starts_at", "INTEGER NULL")
+    run_atomic(db, STARTS_AT_TRIGGERS)
+    backfill(
+        db, "events",
+        "starts_at = CAST(strftime('%s', date_time) AS INTEGER)",
+        "starts_at IS NULL AND strftime('%s', date_time) IS NOT NULL",
+    )
+    create_index(db, "idx_events_starts_at", "events", "starts_at")
+    create_index(db, "idx_events_category_starts", "events", "category, starts_at")
+    drop_index(db, "idx_events_date_time")
+    drop_index(db, "idx_events_category_date")
+
+    if "last_sent_at" in column_names(db, "email_verifications"):
+        with foreign_keys_off(db):
+            rebuild_table(
+                db, "email_verifications", VERIFICATIONS_NEW, VERIFICATIONS_COPY,
+                ["CREATE INDEX idx_email_verifications_last_sent_ts ON email_verifications(last_sent_ts)"],
+            )
@@ -0,0 +1,17 @@
+-- migrations/0011_room_preferences.sql
+-- Ranked room preferences for batch allocation (see allocation.py).
+-- rank 1 is the first choice; max_price_eur NULL = any price of that type.
+-- UNIQUE(user_id, rank) also serves the per-student lookup.
+CREATE TABLE IF NOT EXISTS room_preferences (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  rank INTEGER NOT NULL CHECK (rank >= 1),
+  room_type TEXT NOT NULL CHECK (room_type IN ('single','shared','studio')),
+  max_price_eur INTEGER NULL CHECK (max_price_eur IS NULL OR max_price_eur >= 0),
+  created_at TEXT NOT NULL,
+  UNIQUE(user_id, rank)
+);
+
+-- "fcfs": students join rooms directly; "preferences": students submit
+-- preferences and an admin runs the allocation
+INSERT OR IGNORE INTO admin_settings (key, value) VALUES ('room_allocation', 'fcfs');
@@ -0,0 +1,14 @@
+-- migrations/0012_event_waitlist.sql
+-- Per-event waitlist for full events. Queue order is the AUTOINCREMENT id.
+-- idx_event_waitlist_event (event_id, implicitly followed by id) gives the
+-- head of an event's queue and the "entries ahead of me" count as index
+-- range scans; UNIQUE(event_id, user_id) finds a student's own entry.
+CREATE TABLE IF NOT EXISTS event_waitlist (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  event_id INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+  user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  created_at TEXT NOT NULL,
+  UNIQUE(event_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_event_waitlist_event ON event_waitlist(event_id);
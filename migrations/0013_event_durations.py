@@ -0,0 +1,58 @@
+# migrations/0013_event_durations.py
+# Event durations and an interval index for schedule-conflict checks:
+# - events.duration_minutes (existing events get 120) and event_requests.duration_minutes
+# - events.ends_at: starts_at + duration, maintained by the same triggers as starts_at
+# - event_intervals: R*Tree over (starts_at, ends_at) keyed by event id, kept in
+#   sync by triggers. "Which events overlap [s, e)" is a tree search instead of
+#   a scan. R*Tree coordinates are 32-bit floats rounded outwards, so the
+#   tree gives a superset and queries re-check the exact events columns.
+from migrate import add_column, backfill, run_atomic
+
+TRIGGERS = """
+DROP TRIGGER IF EXISTS trg_events_starts_at_insert;
+DROP TRIGGER IF EXISTS trg_events_starts_at_update;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_times_insert AFTER INSERT ON events
+BEGIN
+  UPDATE events
+  SET starts_at = CAST(strftime('%s', NEW.date_time) AS INTEGER),
+      ends_at = CAST(strftime('%s', NEW.date_time) AS INTEGER) + NEW.duration_minutes * 60
+  WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_times_update AFTER UPDATE OF date_time, duration_minutes ON events
+BEGIN
+  UPDATE events
+  SET starts_at = CAST(strftime('%s', NEW.date_time) AS INTEGER),
+      ends_at = CAST(strftime('%s', NEW.date_time) AS INTEGER) + NEW.duration_minutes * 60
+  WHERE id = NEW.id;
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS event_intervals USING rtree(id, starts_at, ends_at);
+
+CREATE TRIGGER IF NOT EXISTS trg_event_intervals_update AFTER UPDATE OF starts_at, ends_at ON events
+BEGIN
+  DELETE FROM event_intervals WHERE id = NEW.id;
+  INSERT INTO event_intervals (id, starts_at, ends_at)
+  SELECT NEW.id, NEW.starts_at, NEW.ends_at
+  WHERE NEW.starts_at IS NOT NULL AND NEW.ends_at IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_intervals_delete AFTER DELETE ON events
+BEGIN
+  DELETE FROM event_intervals WHERE id = OLD.id;
+END;
+"""
+
+
+def upgrade(db):
+    add_column(db, "events", "duration_minutes", "INTEGER NOT NULL DEFAULT 120 CHECK (duration_minutes > 0)")
+    add_column(db, "events", "ends_at", "INTEGER NULL")
+    add_column(db, "event_requests", "duration_minutes", "INTEGER NOT NULL DEFAULT 120 CHECK (duration_minutes > 0)")
+    run_atomic(db, TRIGGERS)
+    # setting ends_at fires trg_event_intervals_update, which fills the R*Tree
+    backfill(
+        db, "events",
+        "ends_at = starts_at + duration_minutes * 60",
+        "ends_at IS NULL AND starts_at IS NOT NULL",
+    )
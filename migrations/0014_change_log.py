@@ -0,0 +1,103 @@
+# migrations/0014_change_log.py
+# Append-only change log for incremental sync (see changes.py and
+# /api/changes). Every write to a synced table appends (entity, entity_id);
+# version is AUTOINCREMENT, so it only grows and is never reused, even after
+# compaction deletes old entries. Rows only name what changed: readers load
+# the current state, and a row that no longer exists was deleted.
+# Written by triggers so every writer (handlers, allocation, archive mover,
+# scripts) is covered, and created together with them in one transaction.
+from migrate import run_atomic
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS change_log (
+  version INTEGER PRIMARY KEY AUTOINCREMENT,
+  entity TEXT NOT NULL,                 -- 'room' | 'event' | 'event_request'
+  entity_id INTEGER NOT NULL,
+  created_ts INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+);
+
+-- rooms: the room itself and its booked count -----------------------------
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_rooms_insert AFTER INSERT ON rooms
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('room', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_rooms_update AFTER UPDATE ON rooms
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('room', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_rooms_delete AFTER DELETE ON rooms
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('room', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_room_bookings_insert AFTER INSERT ON room_bookings
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('room', NEW.room_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_room_bookings_delete AFTER DELETE ON room_bookings
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('room', OLD.room_id);
+END;
+
+-- events: the event itself and its registered count -----------------------
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_events_insert AFTER INSERT ON events
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('event', NEW.id);
+END;
+
+-- starts_at / ends_at are trigger-maintained copies of date_time
+CREATE TRIGGER IF NOT EXISTS trg_changes_events_update
+AFTER UPDATE OF title, category, date_time, duration_minutes, location, description, quota ON events
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('event', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_events_delete AFTER DELETE ON events
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('event', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_event_regs_insert AFTER INSERT ON event_registrations
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('event', NEW.event_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_event_regs_delete AFTER DELETE ON event_registrations
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('event', OLD.event_id);
+END;
+
+-- event requests, and students hiding their closed ones -------------------
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_requests_insert AFTER INSERT ON event_requests
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('event_request', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_requests_update AFTER UPDATE ON event_requests
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('event_request', NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_requests_delete AFTER DELETE ON event_requests
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('event_request', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_hidden_requests_insert AFTER INSERT ON student_hidden_event_requests
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('event_request', NEW.request_id);
+END;
+
+-- highest version removed by compaction; clients behind it must reload
+INSERT OR IGNORE INTO app_meta (key, value) VALUES ('change_log_compacted_through', '0');
+"""
+
+
+def upgrade(db):
+    run_atomic(db, SCHEMA)
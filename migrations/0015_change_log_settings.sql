@@ -0,0 +1,13 @@
+-- migrations/0015_change_log_settings.sql
+-- Admin setting changes (rooms_open, room_allocation) also advance the
+-- change_log version, so caches keyed on it (fragments.py) see them.
+-- /api/changes does not report 'setting' entries.
+CREATE TRIGGER IF NOT EXISTS trg_changes_settings_insert AFTER INSERT ON admin_settings
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('setting', NEW.rowid);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_changes_settings_update AFTER UPDATE ON admin_settings
+BEGIN
+  INSERT INTO change_log (entity, entity_id) VALUES ('setting', NEW.rowid);
+END;
@@ -0,0 +1,46 @@
+# periodic.py
+import sqlite3
+import threading
+
+
+class PeriodicJob:
+    """
+    Base for the background jobs (verification sweeper, change_log compactor,
+    snapshot copy): a daemon thread that calls run_once() every
+    interval_seconds until stop(). interval_seconds <= 0 disables the thread;
+    run_once() can still be called directly.
+
+    sqlite3 errors (database locked, table missing during init) are ignored
+    and the job tries again next interval. Long runs should check
+    self._stop between batches so stop() does not wait for them.
+    """
+
+    thread_name = "periodic-job"
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        raise NotImplementedError
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except sqlite3.Error:
+                pass
+            self._stop.wait(self.interval_seconds)
+
+    def start(self):
+        if self._thread is not None or self.interval_seconds <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
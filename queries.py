@@ -0,0 +1,530 @@
+# queries.py
+"""
+Named SQL for the request handlers.
+
+Every statement app.py runs is declared here once and executed by name:
+
+  queries.fetch_all(db, "rooms.list")
+  queries.fetch_one(db, "users.by_email", (email,))
+  queries.execute(db, "room_bookings.insert", (room_id, user_id, now))
+
+- sqlite3 caches prepared statements per connection, keyed by the SQL text.
+  One string per query means one cache entry per query, and connections are
+  opened with cached_statements=STATEMENT_CACHE_SIZE, which holds all of them.
+- Queries declared with a row factory return typed objects (RoomDto,
+  EventDto) built positionally; all others return sqlite3.Row.
+- Call count and time per query are recorded in-process; see stats().
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from dto import EventDto, RoomDto
+
+
+# Row factories for the DTO queries. They unpack the row positionally, so the
+# SELECT column order below must match. SQLite already hands back ints for
+# INTEGER columns; only the computed fields and the 0/1 -> bool flags are
+# converted.
+
+def room_row(cursor, row) -> RoomDto:
+    id_, type_, title, description, price_eur, capacity, available, booked = row
+    remaining = capacity - booked if capacity > booked else 0
+    return RoomDto(id_, type_, title, description, price_eur, capacity, available == 1, booked,
+                   remaining, remaining == 0)
+
+
+def _event(id_, title, category, date_time, duration_minutes, location, description, quota, registered,
+           is_registered=None):
+    if quota is None:
+        return EventDto(id_, title, category, date_time, duration_minutes, location, description, None,
+                        registered, None, False, is_registered)
+    remaining = quota - registered if quota > registered else 0
+    return EventDto(id_, title, category, date_time, duration_minutes, location, description, quota,
+                    registered, remaining, remaining == 0, is_registered)
+
+
+def event_row(cursor, row) -> EventDto:
+    return _event(*row)
+
+
+def event_row_for_user(cursor, row) -> EventDto:
+    # trailing column is the EXISTS(...) flag
+    return _event(*row[:9], row[9] == 1)
+
+
+class Query(NamedTuple):
+    name: str
+    sql: str
+    row_factory: Optional[Callable[[Any, tuple], Any]] = None  # (cursor, row) -> typed object
+
+
+QUERIES: Dict[str, Query] = {}
+
+
+def _q(name: str, sql: str, row_factory: Optional[Callable[[Any, tuple], Any]] = None):
+    if name in QUERIES:
+        raise RuntimeError(f"Duplicate query name {name}")
+    QUERIES[name] = Query(name, " ".join(sql.split()), row_factory)
+
+
+# column order is what room_row / event_row unpack
+_ROOM_COLUMNS = (
+    "r.id, r.type, r.title, r.description, r.price_eur, r.capacity, r.available, "
+    "(SELECT COUNT(*) FROM room_bookings rb WHERE rb.room_id = r.id) AS booked_count"
+)
+_EVENT_COLUMNS = (
+    "e.id, e.title, e.category, e.date_time, e.duration_minutes, e.location, e.description, e.quota, "
+    "(SELECT COUNT(*) FROM event_registrations er WHERE er.event_id = e.id) AS registered_count"
+)
+
+# ---------------- users / settings ----------------
+_q("users.by_email", "SELECT id, email, role FROM users WHERE email = ?")
+_q("users.insert_student", "INSERT INTO users (email, password_hash, role, created_at) VALUES (?, ?, 'student', ?)")
+_q("settings.get", "SELECT value FROM admin_settings WHERE key = ?")
+_q("settings.set", """
+    INSERT INTO admin_settings (key, value) VALUES (?, ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value
+""")
+
+# ---------------- email verifications (demo inbox) ----------------
+_q("verifications.status", """
+    SELECT email, created_ts, last_sent_ts, attempts
+    FROM email_verifications
+    WHERE email = ? AND last_sent_ts >= ?
+""")
+_q("verifications.last_code", """
+    SELECT code_plain AS code, created_ts, last_sent_ts
+    FROM email_verifications
+    WHERE email = ? AND last_sent_ts >= ?
+""")
+_q("verifications.password_hash",
+   "SELECT password_hash FROM email_verifications WHERE email = ? AND last_sent_ts >= ?")
+_q("verifications.delete", "DELETE FROM email_verifications WHERE email = ?")
+_q("verifications.counts", """
+    SELECT COUNT(*) AS total,
+           COALESCE(SUM(CASE WHEN last_sent_ts < ? THEN 1 ELSE 0 END), 0) AS expired
+    FROM email_verifications
+""")
+
+# ---------------- rooms ----------------
+_q("rooms.list", f"SELECT {_ROOM_COLUMNS} FROM rooms r ORDER BY r.id", row_factory=room_row)
+_q("rooms.by_user", f"""
+    SELECT {_ROOM_COLUMNS}
+    FROM room_bookings my
+    JOIN rooms r ON r.id = my.room_id
+    WHERE my.user_id = ?
+""", row_factory=room_row)
+_q("rooms.by_ids", f"""
+    SELECT {_ROOM_COLUMNS} FROM rooms r WHERE r.id IN (SELECT value FROM json_each(?)) ORDER BY r.id
+""", row_factory=room_row)
+_q("rooms.capacity", "SELECT id, capacity FROM rooms WHERE id = ?")
+_q("rooms.title", "SELECT id, title FROM rooms WHERE id = ?")
+_q("room_bookings.room_of_user", "SELECT room_id FROM room_bookings WHERE user_id = ?")
+_q("room_bookings.count", "SELECT COUNT(*) AS c FROM room_bookings WHERE room_id = ?")
+_q("room_preferences.by_user",
+   "SELECT rank, room_type, max_price_eur FROM room_preferences WHERE user_id = ? ORDER BY rank")
+_q("room_preferences.delete_for_user", "DELETE FROM room_preferences WHERE user_id = ?")
+_q("room_preferences.insert", """
+    INSERT INTO room_preferences (user_id, rank, room_type, max_price_eur, created_at)
+    VALUES (?, ?, ?, ?, ?)
+""")
+_q("room_bookings.insert", "INSERT INTO room_bookings (room_id, user_id, created_at) VALUES (?, ?, ?)")
+_q("room_bookings.delete_for_user", "DELETE FROM room_bookings WHERE user_id = ?")
+_q("room_bookings.roster", """
+    SELECT u.email AS user_email, rb.created_at
+    FROM room_bookings rb
+    JOIN users u ON u.id = rb.user_id
+    WHERE rb.room_id = ?
+    ORDER BY rb.created_at ASC
+""")
+
+# ---------------- bulk rosters ----------------
+# Rosters of many rooms/events in one statement, one row per student, ordered
+# by (id, position). ROW_NUMBER() pages inside each roster (params: offset,
+# offset + limit); it walks idx_room_bookings_room_created /
+# idx_event_regs_event_created in order, so no sort is needed. Rooms/events
+# with no students on the page still get one row with NULL email.
+_ROSTER_SQL = """
+    WITH page AS (
+      SELECT b.{key} AS owner_id, u.email AS user_email, b.created_at,
+             ROW_NUMBER() OVER (PARTITION BY b.{key} ORDER BY b.created_at, b.id) AS position
+      FROM {table} b
+      JOIN users u ON u.id = b.user_id
+      {where_b}
+    )
+    SELECT o.id, o.title,
+           (SELECT COUNT(*) FROM {table} c WHERE c.{key} = o.id) AS total,
+           p.user_email, p.created_at
+    FROM {owners} o
+    LEFT JOIN page p ON p.owner_id = o.id AND p.position > ? AND p.position <= ?
+    {where_o}
+    ORDER BY o.id, p.position
+"""
+_IDS = "IN (SELECT value FROM json_each(?))"
+for _name, _table, _key, _owners in (("rooms", "room_bookings", "room_id", "rooms"),
+                                     ("events", "event_registrations", "event_id", "events")):
+    _q(f"rosters.{_name}.all", _ROSTER_SQL.format(table=_table, key=_key, owners=_owners, where_b="", where_o=""))
+    # params: (ids, offset, offset + limit, ids)
+    _q(f"rosters.{_name}.by_ids", _ROSTER_SQL.format(table=_table, key=_key, owners=_owners,
+                                                     where_b=f"WHERE b.{_key} {_IDS}", where_o=f"WHERE o.id {_IDS}"))
+
+# ---------------- events ----------------
+_q("events.all", f"SELECT {_EVENT_COLUMNS} FROM events e ORDER BY e.starts_at ASC", row_factory=event_row)
+_q("events.by_user", f"""
+    SELECT {_EVENT_COLUMNS}
+    FROM event_registrations my
+    JOIN events e ON e.id = my.event_id
+    WHERE my.user_id = ?
+    ORDER BY e.starts_at ASC
+""", row_factory=event_row)
+# ids as a JSON array (changes.py); one statement for any number of ids
+_q("events.by_ids", f"""
+    SELECT {_EVENT_COLUMNS} FROM events e WHERE e.id IN (SELECT value FROM json_each(?)) ORDER BY e.starts_at
+""", row_factory=event_row)
+_q("events.by_ids_for_user", f"""
+    SELECT {_EVENT_COLUMNS},
+           EXISTS (SELECT 1 FROM event_registrations my WHERE my.user_id = ? AND my.event_id = e.id)
+    FROM events e
+    WHERE e.id IN (SELECT value FROM json_each(?))
+    ORDER BY e.starts_at
+""", row_factory=event_row_for_user)
+_q("events.quota", "SELECT id, quota FROM events WHERE id = ?")
+_q("events.title", "SELECT id, title FROM events WHERE id = ?")
+_q("events.times", "SELECT id, starts_at, ends_at FROM events WHERE id = ?")
+_q("events.insert", """
+    INSERT INTO events
+      (title, category, date_time, duration_minutes, location, description, quota, created_by_id, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+""")
+# Overlap search on the event_intervals R*Tree (migration 0013). The tree
+# condition finds candidates (its bounds are rounded outwards); the events
+# condition is the exact check. Params: (start, end, ...), ?1/?2 are reused.
+_OVERLAPS = "i.starts_at < ?2 AND i.ends_at > ?1 AND e.starts_at < ?2 AND e.ends_at > ?1"
+_q("events.conflicts_for_user", f"""
+    SELECT e.id, e.title, e.date_time, e.duration_minutes, e.location
+    FROM event_intervals i
+    JOIN events e ON e.id = i.id
+    WHERE {_OVERLAPS}
+      AND e.id != ?3
+      AND EXISTS (SELECT 1 FROM event_registrations er WHERE er.event_id = e.id AND er.user_id = ?4)
+    ORDER BY e.starts_at
+""")
+_q("events.conflicts_at_location", f"""
+    SELECT e.id, e.title, e.date_time, e.duration_minutes, e.location
+    FROM event_intervals i
+    JOIN events e ON e.id = i.id
+    WHERE {_OVERLAPS}
+      AND lower(e.location) = lower(?3)
+    ORDER BY e.starts_at
+""")
+_q("event_registrations.count", "SELECT COUNT(*) AS c FROM event_registrations WHERE event_id = ?")
+_q("event_registrations.insert", "INSERT INTO event_registrations (event_id, user_id, created_at) VALUES (?, ?, ?)")
+_q("event_registrations.delete", "DELETE FROM event_registrations WHERE event_id = ? AND user_id = ?")
+_q("event_registrations.exists", "SELECT 1 FROM event_registrations WHERE event_id = ? AND user_id = ?")
+_q("event_registrations.roster", """
+    SELECT u.email AS user_email, er.created_at
+    FROM event_registrations er
+    JOIN users u ON u.id = er.user_id
+    WHERE er.event_id = ?
+    ORDER BY er.created_at ASC
+""")
+
+# ---------------- event waitlist ----------------
+# queue order is the waitlist id; both counts are range scans on idx_event_waitlist_event
+_q("waitlist.insert", "INSERT INTO event_waitlist (event_id, user_id, created_at) VALUES (?, ?, ?)")
+_q("waitlist.delete", "DELETE FROM event_waitlist WHERE event_id = ? AND user_id = ?")
+_q("waitlist.delete_by_id", "DELETE FROM event_waitlist WHERE id = ?")
+_q("waitlist.position", """
+    SELECT (SELECT COUNT(*) FROM event_waitlist w WHERE w.event_id = me.event_id AND w.id <= me.id) AS position,
+           (SELECT COUNT(*) FROM event_waitlist w WHERE w.event_id = me.event_id) AS waiting
+    FROM event_waitlist me
+    WHERE me.event_id = ? AND me.user_id = ?
+""")
+_q("waitlist.queue", "SELECT id, user_id FROM event_waitlist WHERE event_id = ? ORDER BY id")
+
+# ---------------- event requests ----------------
+_q("event_requests.visible_for_student", """
+    SELECT er.*
+    FROM event_requests er
+    LEFT JOIN student_hidden_event_requests h
+      ON h.request_id = er.id AND h.student_id = er.requested_by_id
+    WHERE er.requested_by_id = ?
+      AND h.id IS NULL
+    ORDER BY er.created_at DESC
+""")
+_q("event_requests.by_status", """
+    SELECT er.*, u.email AS requested_by_email
+    FROM event_requests er
+    LEFT JOIN users u ON u.id = er.requested_by_id
+    WHERE er.status = ?
+    ORDER BY er.updated_at DESC
+""")
+_q("event_requests.by_ids", """
+    SELECT er.*, u.email AS requested_by_email
+    FROM event_requests er
+    LEFT JOIN users u ON u.id = er.requested_by_id
+    WHERE er.id IN (SELECT value FROM json_each(?))
+    ORDER BY er.updated_at DESC
+""")
+_q("event_requests.visible_by_ids_for_student", """
+    SELECT er.*
+    FROM event_requests er
+    LEFT JOIN student_hidden_event_requests h
+      ON h.request_id = er.id AND h.student_id = er.requested_by_id
+    WHERE er.requested_by_id = ?
+      AND er.id IN (SELECT value FROM json_each(?))
+      AND h.id IS NULL
+    ORDER BY er.created_at DESC
+""")
+_q("event_requests.owners_by_ids",
+   "SELECT id, requested_by_id FROM event_requests WHERE id IN (SELECT value FROM json_each(?))")
+_q("event_requests.by_id", "SELECT * FROM event_requests WHERE id = ?")
+_q("event_requests.owner", "SELECT id, requested_by_id, status FROM event_requests WHERE id = ?")
+_q("event_requests.insert", """
+    INSERT INTO event_requests
+      (title, category, date_time, duration_minutes, location, description, quota, requested_by_id,
+       status, admin_comment, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending', NULL, ?, ?)
+""")
+_q("event_requests.reject", """
+    UPDATE event_requests
+    SET status = 'rejected', admin_comment = ?, updated_at = ?
+    WHERE id = ?
+""")
+_q("event_requests.accept", """
+    UPDATE event_requests
+    SET status = 'accepted', admin_comment = NULL, updated_at = ?
+    WHERE id = ?
+""")
+_q("hidden_requests.insert", """
+    INSERT INTO student_hidden_event_requests (request_id, student_id, created_at)
+    VALUES (?, ?, ?)
+""")
+
+
+# ---------------- archive (attached as "archive", see archive.py) ----------------
+_q("archive.events.all", """
+    SELECT e.id, e.title, e.category, e.date_time, e.duration_minutes, e.location, e.description, e.quota,
+           (SELECT COUNT(*) FROM archive.event_registrations er WHERE er.event_id = e.id) AS registered_count
+    FROM archive.events e
+    ORDER BY e.starts_at ASC
+""", row_factory=event_row)
+_q("archive.events.title", "SELECT id, title FROM archive.events WHERE id = ?")
+_q("archive.event_registrations.roster", """
+    SELECT u.email AS user_email, er.created_at
+    FROM archive.event_registrations er
+    LEFT JOIN main.users u ON u.id = er.user_id
+    WHERE er.event_id = ?
+    ORDER BY er.created_at ASC
+""")
+_q("archive.event_requests.by_status", """
+    SELECT er.*, u.email AS requested_by_email
+    FROM archive.event_requests er
+    LEFT JOIN main.users u ON u.id = er.requested_by_id
+    WHERE er.status = ?
+    ORDER BY er.updated_at DESC
+""")
+
+# ---------------- filtered event listing ----------------
+# The listing's WHERE clause depends on which filters are set, so its
+# variants are registered on first use under names like
+# "events.page[upcoming,category]". Each variant is still one fixed SQL string.
+
+class EventFilter(NamedTuple):
+    when: str = "all"                # "upcoming", "past" or "all"
+    category: Optional[str] = None
+    date_from: Optional[int] = None  # starts_at >= date_from (wall-clock seconds, see clock.py)
+    date_to: Optional[int] = None    # starts_at < date_to
+    has_seats: bool = False
+
+
+_HAS_SEATS = "(e.quota IS NULL OR e.quota > (SELECT COUNT(*) FROM event_registrations er WHERE er.event_id = e.id))"
+
+# Tags a variant name can carry (see _variant_name): at most one of
+# _WHEN_TAGS, and each of the others present or absent.
+_WHEN_TAGS = ("upcoming", "past")
+_RANGE_TAGS = ("from", "to")
+_PAGE_TAGS = ("category",) + _RANGE_TAGS + ("seats",)
+# events.page and events.page_for_user, plus events.facets
+LISTING_VARIANTS = 2 * (len(_WHEN_TAGS) + 1) * 2 ** len(_PAGE_TAGS) + 2 ** len(_RANGE_TAGS)
+
+_variant_lock = threading.Lock()
+_variant_count = 0
+
+
+def _variant(name: str, sql: str, row_factory=None) -> str:
+    global _variant_count
+    if name not in QUERIES:
+        with _variant_lock:
+            if name not in QUERIES:
+                if _variant_count == LISTING_VARIANTS:
+                    # a new tag was added without updating the lists above
+                    raise RuntimeError(f"more than {LISTING_VARIANTS} listing variants; {name!r} would not fit "
+                                       "the statement cache")
+                QUERIES[name] = Query(name, " ".join(sql.split()), row_factory)
+                _variant_count += 1
+    return name
+
+
+def _range_where(f: EventFilter, tags: list, where: list, params: list):
+    if f.date_from is not None:
+        tags.append("from")
+        where.append("e.starts_at >= ?")
+        params.append(f.date_from)
+    if f.date_to is not None:
+        tags.append("to")
+        where.append("e.starts_at < ?")
+        params.append(f.date_to)
+
+
+def _variant_name(base: str, tags: list) -> str:
+    return f"{base}[{','.join(tags)}]" if tags else base
+
+
+def events_page_query(f: EventFilter, now: int, user_id: Optional[int] = None) -> Tuple[str, list]:
+    """
+    Name and parameters of the event page query for f; the caller appends
+    LIMIT and OFFSET. Upcoming/all pages run oldest first, past pages newest
+    first. With user_id, rows carry is_registered.
+    """
+    personal = user_id is not None
+    tags, where, params = [], [], []
+    if personal:
+        params.append(user_id)
+    if f.when in _WHEN_TAGS:
+        tags.append(f.when)
+        # events without a parseable start (starts_at NULL) count as past, as in the facets
+        where.append("e.starts_at >= ?" if f.when == "upcoming" else "(e.starts_at < ? OR e.starts_at IS NULL)")
+        params.append(now)
+    if f.category:
+        tags.append("category")
+        where.append("e.category = ?")
+        params.append(f.category)
+    _range_where(f, tags, where, params)
+    if f.has_seats:
+        tags.append("seats")
+        where.append(_HAS_SEATS)
+
+    registered_sql = ""
+    if personal:
+        registered_sql = """,
+               EXISTS (
+                 SELECT 1 FROM event_registrations my
+                 WHERE my.user_id = ? AND my.event_id = e.id
+               ) AS is_registered"""
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    order = "DESC" if f.when == "past" else "ASC"
+
+    name = _variant_name("events.page_for_user" if personal else "events.page", tags)
+    sql = f"""
+        SELECT {_EVENT_COLUMNS}{registered_sql}
+        FROM events e
+        {where_sql}
+        ORDER BY e.starts_at {order}
+        LIMIT ? OFFSET ?
+    """
+    return _variant(name, sql, event_row_for_user if personal else event_row), params
+
+
+def event_facets_query(f: EventFilter, now: int) -> Tuple[str, list]:
+    """
+    One aggregate pass over the events in f's date range, grouped by
+    (category, upcoming, has_seats). Every facet count and the listing total
+    can be summed from these few rows.
+    """
+    tags, where, params = [], [], [now]
+    _range_where(f, tags, where, params)
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+
+    sql = f"""
+        SELECT e.category AS category,
+               COALESCE(e.starts_at >= ?, 0) AS upcoming,
+               {_HAS_SEATS} AS has_seats,
+               COUNT(*) AS n
+        FROM events e
+        {where_sql}
+        GROUP BY 1, 2, 3
+    """
+    return _variant(_variant_name("events.facets", tags), sql), params
+
+
+# Statements run outside the registry (auth, analytics, archive moves,
+# migrations) that may share a connection with it.
+STATEMENT_HEADROOM = 64
+# Every named query declared above (no variant is registered at import), every
+# listing variant (bounded by _variant), and the headroom.
+STATEMENT_CACHE_SIZE = len(QUERIES) + LISTING_VARIANTS + STATEMENT_HEADROOM
+
+
+# ---------------- Execution + timing ----------------
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, List[float]] = {}  # name -> [calls, total_seconds, max_seconds]
+
+
+def _record(name: str, seconds: float):
+    with _stats_lock:
+        s = _stats.get(name)
+        if s is None:
+            _stats[name] = [1, seconds, seconds]
+        else:
+            s[0] += 1
+            s[1] += seconds
+            if seconds > s[2]:
+                s[2] = seconds
+
+
+def execute(db, name: str, params=()):
+    q = QUERIES[name]
+    started = time.perf_counter()
+    cur = db.execute(q.sql, params)
+    _record(name, time.perf_counter() - started)
+    return cur
+
+
+def _cursor(db, q: Query):
+    cur = db.cursor()
+    if q.row_factory is not None:
+        cur.row_factory = q.row_factory
+    return cur
+
+
+def fetch_one(db, name: str, params=()):
+    q = QUERIES[name]
+    started = time.perf_counter()
+    row = _cursor(db, q).execute(q.sql, params).fetchone()
+    _record(name, time.perf_counter() - started)
+    return row
+
+
+def fetch_all(db, name: str, params=()) -> list:
+    q = QUERIES[name]
+    started = time.perf_counter()
+    rows = _cursor(db, q).execute(q.sql, params).fetchall()
+    _record(name, time.perf_counter() - started)
+    return rows
+
+
+def stats() -> List[Dict[str, Any]]:
+    """
+    Per-query timing since process start, slowest total first.
+    """
+    with _stats_lock:
+        items = [(name, list(s)) for name, s in _stats.items()]
+    out = []
+    for name, (calls, total, worst) in items:
+        out.append({
+            "query": name,
+            "calls": int(calls),
+            "total_ms": round(total * 1000, 3),
+            "avg_ms": round(total * 1000 / calls, 4),
+            "max_ms": round(worst * 1000, 3),
+        })
+    out.sort(key=lambda x: x["total_ms"], reverse=True)
+    return out
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,114 @@
+# ratelimit.py
+import math
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class TokenBucketLimiter:
+    """
+    In-memory token buckets, one per key (IP, email, ...).
+
+    Buckets are spread over a fixed number of shards so concurrent requests
+    for different keys rarely wait on the same lock. Each shard is an
+    OrderedDict used as an LRU: the least recently seen key is evicted once
+    the shard is full, so memory stays bounded no matter how many distinct
+    keys an attacker sends.
+    """
+
+    def __init__(self, capacity: int, refill_per_second: float, max_keys: int = 10000, shards: int = 16):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        if refill_per_second <= 0:
+            raise ValueError("refill_per_second must be > 0")
+
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._shard_count = max(1, int(shards))
+        self._max_per_shard = max(1, int(max_keys) // self._shard_count)
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(self._shard_count)]
+
+    def _shard(self, key: Hashable):
+        h = zlib.crc32(repr(key).encode("utf-8"))
+        return self._shards[h % self._shard_count]
+
+    def hit(self, key: Hashable, now: Optional[float] = None) -> int:
+        """
+        Take one token for key.
+        Returns 0 if the call is allowed, otherwise the seconds to wait (>= 1).
+        """
+        if now is None:
+            now = time.monotonic()
+
+        lock, buckets = self._shard(key)
+        with lock:
+            state = buckets.get(key)
+            if state is None:
+                # [tokens, last_refill]
+                state = [self.capacity, now]
+                buckets[key] = state
+                if len(buckets) > self._max_per_shard:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(key)
+                elapsed = now - state[1]
+                if elapsed > 0:
+                    state[0] = min(self.capacity, state[0] + elapsed * self.refill_per_second)
+                    state[1] = now
+
+            if state[0] >= 1.0:
+                state[0] -= 1.0
+                return 0
+
+            missing = 1.0 - state[0]
+            return max(1, int(math.ceil(missing / self.refill_per_second)))
+
+    def __len__(self) -> int:
+        return sum(len(b) for _, b in self._shards)
+
+
+# scope -> (ip bucket (capacity, refill/s), email bucket (capacity, refill/s) or None)
+DEFAULT_RULES: Dict[str, Tuple[Tuple[int, float], Optional[Tuple[int, float]]]] = {
+    # registration / resend send codes: small bursts, about 1 per 20s sustained per email
+    "register": ((10, 10 / 60), (3, 1 / 20)),
+    "resend": ((10, 10 / 60), (3, 1 / 20)),
+    # login: allow typos, stop password guessing
+    "login": ((20, 20 / 60), (5, 5 / 60)),
+    # demo inbox is polled by the UI
+    "demo": ((30, 30 / 60), (10, 10 / 60)),
+}
+
+
+class RateLimiter:
+    """
+    Named rate-limit scopes, each with an IP bucket and optionally an email bucket.
+    """
+
+    def __init__(self, rules=None, max_keys: int = 10000, shards: int = 16):
+        rules = DEFAULT_RULES if rules is None else rules
+        self._limiters = {}
+        for scope, (ip_rule, email_rule) in rules.items():
+            ip_limiter = TokenBucketLimiter(ip_rule[0], ip_rule[1], max_keys, shards)
+            email_limiter = None
+            if email_rule is not None:
+                email_limiter = TokenBucketLimiter(email_rule[0], email_rule[1], max_keys, shards)
+            self._limiters[scope] = (ip_limiter, email_limiter)
+
+    def check(self, scope: str, ip: str, email: str = "") -> int:
+        """
+        Returns 0 if allowed, otherwise the Retry-After value in seconds.
+        Unknown scopes are never limited.
+        """
+        pair = self._limiters.get(scope)
+        if pair is None:
+            return 0
+
+        ip_limiter, email_limiter = pair
+        retry_in = ip_limiter.hit(ip or "-")
+        if retry_in:
+            return retry_in
+        if email and email_limiter is not None:
+            return email_limiter.hit(email)
+        return 0
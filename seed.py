@@ -1,6 +1,10 @@
 # seed.py
 from datetime import datetime, timezone
 import auth
+from info_bundle import content_hash
+
+# bump whenever the seed data below changes; startup skips seeding when it matches
+SEED_VERSION = 1
 
 
 def _now_iso():
@@ -35,7 +39,7 @@ def seed_if_empty(db):
         )
 
     # -------------------------
-    # Info pages (UPSERT by slug)
+    # Info pages (UPSERT by slug, only when content changed)
     # This ensures new pages are added even if table is not empty.
     # -------------------------
     pages = [
@@ -99,35 +103,24 @@ def seed_if_empty(db):
          "Non-emergency (campus/security if applicable): ask housing office.\n"),
     ]
 
+    stored = {
+        r["slug"]: r["content_hash"]
+        for r in db.execute("SELECT slug, content_hash FROM info_pages").fetchall()
+    }
     for slug, title, content in pages:
+        h = content_hash(slug, title, content)
+        if stored.get(slug) == h:
+            continue
         db.execute(
             """
-            INSERT INTO info_pages (slug, title, content)
-            VALUES (?, ?, ?)
+            INSERT INTO info_pages (slug, title, content, content_hash)
+            VALUES (?, ?, ?, ?)
             ON CONFLICT(slug) DO UPDATE SET
               title = excluded.title,
-              content = excluded.content
+              content = excluded.content,
+              content_hash = excluded.content_hash
             """,
-            (slug, title, content),
-        )
-
-    # -------------------------
-    # Events
-    # -------------------------
-    c = db.execute("SELECT COUNT(*) AS n FROM events").fetchone()["n"]
-    if int(c) == 0:
-        now = _now_iso()
-        events = [
-            ("Welcome Meetup", "orientation", "2026-02-01T18:00", "Main Hall", "Meet other students.", 50, "admin@uni-bayreuth.de", now),
-            ("Study Group: CS", "study_group", "2026-02-03T16:00", "Library", "Weekly CS study group.", None, "admin@uni-bayreuth.de", now),
-            ("Board Games Night", "social", "2026-02-05T19:00", "Common Room", "Bring your own games.", 20, "admin@uni-bayreuth.de", now),
-        ]
-        db.executemany(
-            """
-            INSERT INTO events (title, category, date_time, location, description, quota, created_by_email, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            events,
+            (slug, title, content, h),
         )
 
     # -------------------------
@@ -147,4 +140,23 @@ def seed_if_empty(db):
             (ADMIN_EMAIL, pw_hash, _now_iso()),
         )
 
+    # -------------------------
+    # Events
+    # -------------------------
+    c = db.execute("SELECT COUNT(*) AS n FROM events").fetchone()["n"]
+    if int(c) == 0:
+        now = _now_iso()
+        events = [
+            ("Welcome Meetup", "orientation", "2026-02-01T18:00", "Main Hall", "Meet other students.", 50, ADMIN_EMAIL, now),
+            ("Study Group: CS", "study_group", "2026-02-03T16:00", "Library", "Weekly CS study group.", None, ADMIN_EMAIL, now),
+            ("Board Games Night", "social", "2026-02-05T19:00", "Common Room", "Bring your own games.", 20, ADMIN_EMAIL, now),
+        ]
+        db.executemany(
+            """
+            INSERT INTO events (title, category, date_time, location, description, quota, created_by_id, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, (SELECT id FROM users WHERE email = ?), ?)
+            """,
+            events,
+        )
+
     db.commit()
@@ -0,0 +1,95 @@
+# serve.py
+"""
+Production launcher: runs create_app() under gunicorn (pre-forking, multi-worker).
+
+The app is loaded once in the parent (preload), so migrations and the seed
+check run once instead of once per worker. No SQLite connection is open at
+fork time (the db connection pool starts empty in each forked process);
+each worker opens and warms its own connection in post_fork. Background
+jobs (verification sweeper, change_log compactor, optional snapshot copy)
+are threads and do not survive fork; they are started in each worker.
+
+Usage:
+  pip install gunicorn
+  python serve.py
+
+Environment:
+  HOST / PORT          bind address (default 127.0.0.1:8000)
+  WEB_CONCURRENCY      worker processes (default 2 * CPUs + 1)
+  WEB_THREADS          threads per worker (default 4)
+  GRACEFUL_TIMEOUT     seconds workers get to finish requests on shutdown (default 30)
+  MAX_REQUESTS         recycle a worker after this many requests (default 0 = never)
+"""
+import multiprocessing
+import os
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # gunicorn is optional and Unix-only
+    BaseApplication = None
+
+from app import create_app, start_background_jobs, stop_background_jobs
+from db import warm_pool
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, "") or default)
+
+
+def default_options() -> dict:
+    host = os.environ.get("HOST", "127.0.0.1")
+    port = _env_int("PORT", 8000)
+    return {
+        "bind": f"{host}:{port}",
+        "workers": _env_int("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1),
+        "threads": _env_int("WEB_THREADS", 4),
+        "worker_class": "gthread",
+        "preload_app": True,
+        "graceful_timeout": _env_int("GRACEFUL_TIMEOUT", 30),
+        "timeout": 60,
+        "keepalive": 5,
+        "max_requests": _env_int("MAX_REQUESTS", 0),
+        "max_requests_jitter": _env_int("MAX_REQUESTS", 0) // 10,
+        "accesslog": os.environ.get("ACCESS_LOG") or None,
+    }
+
+
+def post_fork(server, worker):
+    app = worker.app.wsgi_app
+    warm_pool(app)
+    start_background_jobs(app)
+
+
+def worker_exit(server, worker):
+    stop_background_jobs(worker.app.wsgi_app)
+
+
+if BaseApplication is not None:
+    class StandaloneApplication(BaseApplication):
+        def __init__(self, options: dict = None, instance_path: str = None):
+            self.options = options or default_options()
+            self.instance_path = instance_path
+            self.wsgi_app = None
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+            self.cfg.set("post_fork", post_fork)
+            self.cfg.set("worker_exit", worker_exit)
+
+        def load(self):
+            if self.wsgi_app is None:
+                self.wsgi_app = create_app(instance_path=self.instance_path, start_background=False)
+            return self.wsgi_app
+
+
+def main():
+    if BaseApplication is None:
+        raise SystemExit("serve.py needs gunicorn: pip install gunicorn")
+    StandaloneApplication().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,14 @@ function closeOverlay(id) {
   if (el) el.style.display = "none";
 }
 
+// Dashboard payload the server rendered the page from (SSR), used once instead of fetching it again
+function takeInitialData() {
+  const el = document.getElementById("initialData");
+  if (!el) return null;
+  el.remove();
+  try { return JSON.parse(el.textContent); } catch (e) { return null; }
+}
+
 function isPast(iso) {
   const d = new Date(iso);
   if (Number.isNaN(d.getTime())) return false;
@@ -78,18 +86,23 @@ async function apiLeaveRoom(email) {
 }
 async function apiRoomsOpen() { return await jsonFetch("/api/settings/rooms_open"); }
 
+// Whole student view (rooms, my room, events page, my events, my requests) in one call
+async function apiDashboard(page, pageSize, filterQuery = "") {
+  return await jsonFetch(`/api/me/dashboard?page=${page}&page_size=${pageSize}${filterQuery}`);
+}
+
 
 // -------------------------
 // Events
 // -------------------------
-async function apiEvents(page, pageSize) {
-  return await jsonFetch(`/api/events?page=${page}&page_size=${pageSize}`);
+async function apiEvents(page, pageSize, filterQuery = "") {
+  return await jsonFetch(`/api/events?page=${page}&page_size=${pageSize}&personalize=1${filterQuery}`);
 }
-async function apiRegisterEvent(eventId, email) {
+async function apiRegisterEvent(eventId, email, ignoreConflicts = false) {
   return await jsonFetch(`/api/events/${eventId}/register`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ email }),
+    body: JSON.stringify({ email, ignore_conflicts: ignoreConflicts }),
   });
 }
 async function apiLeaveEvent(eventId, email) {
@@ -99,6 +112,15 @@ async function apiLeaveEvent(eventId, email) {
     body: JSON.stringify({ email }),
   });
 }
+async function apiJoinWaitlist(eventId) {
+  return await jsonFetch(`/api/events/${eventId}/waitlist`, { method: "POST" });
+}
+async function apiWaitlistPosition(eventId) {
+  return await jsonFetch(`/api/events/${eventId}/waitlist`);
+}
+async function apiLeaveWaitlist(eventId) {
+  return await jsonFetch(`/api/events/${eventId}/waitlist`, { method: "DELETE" });
+}
 async function apiMyRegisteredEvents(email) {
   return await jsonFetch(`/api/me/events?email=${encodeURIComponent(email)}`);
 }
@@ -261,16 +283,19 @@ async function initRoomsPage() {
 if (!email) { window.location.href = "/login"; return; }
 
 
+  const initial = takeInitialData();
+  if (!initial) roomsContainer.textContent = "Loading rooms...";
+  const d = initial ? { ok: true, data: initial } : await apiDashboard(1, EVENTS_PAGE_SIZE);
+  if (!d.ok) {
+    roomsContainer.textContent = (d.data && d.data.error) ? d.data.error : "Failed to load rooms.";
+    return;
+  }
+
   const lockMsgEl = document.getElementById("roomsLockMsg");
   if (lockMsgEl) {
-    const ro = await apiRoomsOpen();
-    if (ro.ok && ro.data && typeof ro.data.open === "boolean") {
-      lockMsgEl.textContent = ro.data.open
-        ? "Room selection is currently OPEN."
-        : "Room selection is currently CLOSED by admin.";
-    } else {
-      lockMsgEl.textContent = "";
-    }
+    lockMsgEl.textContent = d.data.rooms_open
+      ? "Room selection is currently OPEN."
+      : "Room selection is currently CLOSED by admin.";
   }
 
   const myRoomCard = document.getElementById("myRoomCard");
@@ -278,14 +303,14 @@ if (!email) { window.location.href = "/login"; return; }
   const leaveBtn = document.getElementById("leaveRoomBtn");
 
   if (myRoomCard && myRoomDetails && leaveBtn) {
-    const mr = await apiMeRoom(email);
-    if (mr.ok && mr.data && mr.data.room) {
+    const myRoom = d.data.my_room;
+    if (myRoom) {
       myRoomCard.style.display = "block";
       myRoomDetails.innerHTML =
-        `<strong>${mr.data.room.title}</strong><br>` +
-        `Type: ${mr.data.room.type}<br>` +
-        `Price: €${mr.data.room.price_eur}<br>` +
-        `Capacity: ${mr.data.room.capacity}`;
+        `<strong>${myRoom.title}</strong><br>` +
+        `Type: ${myRoom.type}<br>` +
+        `Price: €${myRoom.price_eur}<br>` +
+        `Capacity: ${myRoom.capacity}`;
     } else {
       myRoomCard.style.display = "none";
     }
@@ -302,14 +327,7 @@ if (!email) { window.location.href = "/login"; return; }
     };
   }
 
-  roomsContainer.textContent = "Loading rooms...";
-  const r = await apiRooms();
-  if (!r.ok) {
-    roomsContainer.textContent = (r.data && r.data.error) ? r.data.error : "Failed to load rooms.";
-    return;
-  }
-
-  const rooms = [...r.data];
+  const rooms = [...(d.data.rooms || [])];
   rooms.sort((a, b) => (a.is_full ? 1 : 0) - (b.is_full ? 1 : 0) || (a.id - b.id));
 
   roomsContainer.innerHTML = "";
@@ -354,6 +372,98 @@ if (!email) { window.location.href = "/login"; return; }
 // -------------------------
 const EVENTS_PAGE_SIZE = 4;
 let currentEventsPage = 1;
+// filtering happens on the server; these are sent as query parameters
+const eventsFilter = { when: "upcoming", category: "", has_seats: false };
+
+function eventsFilterQuery() {
+  let q = `&when=${eventsFilter.when}`;
+  if (eventsFilter.category) q += `&category=${encodeURIComponent(eventsFilter.category)}`;
+  if (eventsFilter.has_seats) q += "&has_seats=1";
+  return q;
+}
+
+function renderEventsFilters(facets) {
+  if (!facets) return;
+
+  const whenSel = document.getElementById("eventsWhen");
+  if (whenSel) {
+    const labels = { upcoming: "Upcoming", past: "Past", all: "All" };
+    whenSel.innerHTML = Object.keys(labels)
+      .map((k) => `<option value="${k}">${labels[k]} (${facets.when[k] || 0})</option>`)
+      .join("");
+    whenSel.value = eventsFilter.when;
+  }
+
+  const catSel = document.getElementById("eventsCategory");
+  if (catSel) {
+    const cats = facets.category || {};
+    const total = Object.values(cats).reduce((a, b) => a + b, 0);
+    let html = `<option value="">All categories (${total})</option>`;
+    for (const [cat, n] of Object.entries(cats)) {
+      html += `<option value="${cat}">${cat} (${n})</option>`;
+    }
+    if (eventsFilter.category && !(eventsFilter.category in cats)) {
+      html += `<option value="${eventsFilter.category}">${eventsFilter.category} (0)</option>`;
+    }
+    catSel.innerHTML = html;
+    catSel.value = eventsFilter.category;
+  }
+
+  const seatsLabel = document.getElementById("eventsHasSeatsCount");
+  if (seatsLabel) seatsLabel.textContent = `(${facets.has_seats})`;
+}
+
+function initEventsFilters() {
+  const whenSel = document.getElementById("eventsWhen");
+  const catSel = document.getElementById("eventsCategory");
+  const seatsBox = document.getElementById("eventsHasSeats");
+
+  const apply = async () => {
+    if (whenSel) eventsFilter.when = whenSel.value;
+    if (catSel) eventsFilter.category = catSel.value;
+    if (seatsBox) eventsFilter.has_seats = seatsBox.checked;
+    currentEventsPage = 1;
+    await renderEventsPage();
+  };
+  [whenSel, catSel, seatsBox].forEach((el) => { if (el) el.onchange = apply; });
+}
+
+// Loads the whole events page (events list, my events, my requests) with one request
+async function loadEventsDashboard() {
+  const ids = ["eventsContainer", "myRegisteredEventsContainer", "myRequestsContainer"];
+  if (!getCurrentEmail()) {
+    ids.forEach((id) => setText(id, "No logged-in email found. Please login first."));
+    return;
+  }
+
+  const initial = takeInitialData();
+  if (initial) {
+    // the server may have rendered another page/filter from the URL
+    const shown = initial.events || {};
+    if (shown.page) currentEventsPage = shown.page;
+    if (shown.filters) {
+      eventsFilter.when = shown.filters.when;
+      eventsFilter.category = shown.filters.category || "";
+      eventsFilter.has_seats = !!shown.filters.has_seats;
+    }
+    const seatsBox = document.getElementById("eventsHasSeats");
+    if (seatsBox) seatsBox.checked = eventsFilter.has_seats;
+  } else {
+    setText("eventsContainer", "Loading events...");
+  }
+  const d = initial
+    ? { ok: true, data: initial }
+    : await apiDashboard(currentEventsPage, EVENTS_PAGE_SIZE, eventsFilterQuery());
+  if (!d.ok) {
+    const msg = (d.data && d.data.error) ? d.data.error : "Failed to load events.";
+    ids.forEach((id) => setText(id, msg));
+    return;
+  }
+
+  renderEventsList(d.data.events || {});
+  renderMyRegisteredEventsList(d.data.my_events || []);
+  renderMyRequestsList(d.data.event_requests || []);
+}
 
 async function renderMyRegisteredEvents() {
   const container = document.getElementById("myRegisteredEventsContainer");
@@ -372,7 +482,13 @@ async function renderMyRegisteredEvents() {
     return;
   }
 
-  const items = r.data || [];
+  renderMyRegisteredEventsList(r.data || []);
+}
+
+function renderMyRegisteredEventsList(items) {
+  const container = document.getElementById("myRegisteredEventsContainer");
+  if (!container) return;
+
   container.innerHTML = "";
 
   if (items.length === 0) {
@@ -410,8 +526,7 @@ async function renderMyRegisteredEvents() {
       const lr = await apiLeaveEvent(eventId, getCurrentEmail());
       if (lr.ok) {
         setText(`myEvMsg-${eventId}`, "Left.");
-        await renderMyRegisteredEvents();
-        await renderEventsPage();
+        await loadEventsDashboard();
       } else {
         setText(`myEvMsg-${eventId}`, (lr.data && lr.data.error) ? lr.data.error : "Failed to leave.");
       }
@@ -423,31 +538,32 @@ async function renderEventsPage() {
   const container = document.getElementById("eventsContainer");
   if (!container) return;
 
-  const email = getCurrentEmail();
-
   container.textContent = "Loading events...";
-  const r = await apiEvents(currentEventsPage, EVENTS_PAGE_SIZE);
+  const r = await apiEvents(currentEventsPage, EVENTS_PAGE_SIZE, eventsFilterQuery());
 
   if (!r.ok) {
     container.textContent = (r.data && r.data.error) ? r.data.error : "Failed to load events.";
     return;
   }
 
-  const items = (r.data && r.data.items) ? r.data.items : [];
-  const hasNext = !!(r.data && r.data.has_next);
-  const hasPrev = !!(r.data && r.data.has_prev);
-
-  items.sort((a, b) => {
-    const ap = isPast(a.date_time) ? 1 : 0;
-    const bp = isPast(b.date_time) ? 1 : 0;
-    if (ap !== bp) return ap - bp;
-    const af = a.is_full ? 1 : 0;
-    const bf = b.is_full ? 1 : 0;
-    if (af !== bf) return af - bf;
-    return a.id - b.id;
-  });
+  renderEventsList(r.data || {});
+}
+
+function renderEventsList(data) {
+  const container = document.getElementById("eventsContainer");
+  if (!container) return;
+
+  const email = getCurrentEmail();
+  const items = data.items || [];  // already filtered and ordered by the server
+  const hasNext = !!data.has_next;
+  const hasPrev = !!data.has_prev;
+
+  renderEventsFilters(data.facets);
 
   container.innerHTML = "";
+  if (items.length === 0) {
+    container.innerHTML = `<div class="card"><p class="small">No events match these filters.</p></div>`;
+  }
   for (const ev of items) {
     const card = document.createElement("div");
     card.className = "card";
@@ -459,6 +575,19 @@ async function renderEventsPage() {
       : `${ev.registered_count}/${ev.quota} registered (remaining: ${ev.remaining})`;
 
     const registerDisabled = ev.is_full || isPast(ev.date_time) || !email;
+    const canWaitlist = ev.is_full && !isPast(ev.date_time) && !!email;
+
+    // is_registered comes with the personalized listing; no need to cross-check "my events"
+    let actionBtn;
+    if (ev.is_registered) {
+      actionBtn = `<button class="secondary leave-event-btn" data-event-id="${ev.id}">Leave event</button>`;
+    } else if (canWaitlist) {
+      actionBtn = `<button class="secondary join-waitlist-btn" data-event-id="${ev.id}">Join waitlist</button>`;
+    } else {
+      actionBtn = `<button class="register-event-btn" data-event-id="${ev.id}" ${registerDisabled ? "disabled" : ""}>
+          ${registerDisabled ? "Register unavailable" : "Register"}
+        </button>`;
+    }
 
     card.innerHTML = `
       <h3>${ev.title}</h3>
@@ -468,10 +597,9 @@ async function renderEventsPage() {
       <p><strong>Quota:</strong> ${quotaText}</p>
       <p>${ev.description}</p>
       <div class="btn-row">
-        <button class="register-event-btn" data-event-id="${ev.id}" ${registerDisabled ? "disabled" : ""}>
-          ${registerDisabled ? "Register unavailable" : "Register"}
-        </button>
+        ${actionBtn}
       </div>
+      <div id="waitlistBox-${ev.id}"></div>
       <p class="msg" id="eventMsg-${ev.id}"></p>
     `;
     container.appendChild(card);
@@ -481,17 +609,48 @@ async function renderEventsPage() {
     btn.addEventListener("click", async () => {
       const eventId = btn.getAttribute("data-event-id");
       setText(`eventMsg-${eventId}`, "Registering...");
-      const rr = await apiRegisterEvent(eventId, getCurrentEmail());
+      let rr = await apiRegisterEvent(eventId, getCurrentEmail());
+      if (!rr.ok && rr.data && rr.data.can_waitlist) {
+        // filled up since the list was loaded
+        setText(`eventMsg-${eventId}`, rr.data.error);
+        if (confirm("This event is full. Join the waitlist for the next free place?")) {
+          await joinWaitlist(eventId);
+        }
+        return;
+      }
+      if (!rr.ok && rr.data && rr.data.conflicts) {
+        const titles = rr.data.conflicts.map((c) => `${c.title} (${c.date_time})`).join(", ");
+        if (confirm(`This event overlaps with: ${titles}. Register anyway?`)) {
+          rr = await apiRegisterEvent(eventId, getCurrentEmail(), true);
+        }
+      }
       if (rr.ok) {
         setText(`eventMsg-${eventId}`, "Registered.");
-        await renderMyRegisteredEvents();
-        await renderEventsPage();
+        await loadEventsDashboard();
       } else {
         setText(`eventMsg-${eventId}`, (rr.data && rr.data.error) ? rr.data.error : "Failed to register.");
       }
     });
   });
 
+  container.querySelectorAll(".join-waitlist-btn").forEach((btn) => {
+    btn.addEventListener("click", () => joinWaitlist(btn.getAttribute("data-event-id")));
+  });
+
+  container.querySelectorAll(".leave-event-btn").forEach((btn) => {
+    btn.addEventListener("click", async () => {
+      const eventId = btn.getAttribute("data-event-id");
+      setText(`eventMsg-${eventId}`, "Leaving...");
+      const lr = await apiLeaveEvent(eventId, getCurrentEmail());
+      if (lr.ok) {
+        setText(`eventMsg-${eventId}`, "Left.");
+        await loadEventsDashboard();
+      } else {
+        setText(`eventMsg-${eventId}`, (lr.data && lr.data.error) ? lr.data.error : "Failed to leave.");
+      }
+    });
+  });
+
   const prevBtn = document.getElementById("prevEventsBtn");
   const nextBtn = document.getElementById("nextEventsBtn");
   const info = document.getElementById("eventsPageInfo");
@@ -503,6 +662,68 @@ async function renderEventsPage() {
   if (nextBtn) nextBtn.onclick = async () => { currentEventsPage += 1; await renderEventsPage(); };
 }
 
+async function joinWaitlist(eventId) {
+  const msgId = `eventMsg-${eventId}`;
+  setText(msgId, "Joining waitlist...");
+  let r = await apiJoinWaitlist(eventId);
+  if (!r.ok && r.status === 409) {
+    // already queued (e.g. joined in another tab): show the current position instead
+    const p = await apiWaitlistPosition(eventId);
+    if (p.ok && !p.data.registered) r = p;
+  }
+  if (!r.ok) {
+    setText(msgId, (r.data && r.data.error) ? r.data.error : "Failed to join the waitlist.");
+    return;
+  }
+  setText(msgId, "");
+  renderWaitlistBox(eventId, r.data);
+}
+
+// Position on an event's waitlist, with controls to re-check it or leave the queue
+function renderWaitlistBox(eventId, w) {
+  const box = document.getElementById(`waitlistBox-${eventId}`);
+  if (!box) return;
+  const msgId = `eventMsg-${eventId}`;
+
+  const conflicts = w.conflicts || [];
+  const conflictNote = conflicts.length
+    ? `<p class="small">Skipped when a place opens while it overlaps with: ${conflicts.map((c) => c.title).join(", ")}</p>`
+    : "";
+
+  box.innerHTML = `
+    <p class="small">On the waitlist: position ${w.position} of ${w.waiting}</p>
+    ${conflictNote}
+    <div class="btn-row">
+      <button class="secondary waitlist-check-btn">Check position</button>
+      <button class="secondary waitlist-leave-btn">Leave waitlist</button>
+    </div>
+  `;
+
+  box.querySelector(".waitlist-check-btn").onclick = async () => {
+    const r = await apiWaitlistPosition(eventId);
+    if (r.ok && r.data.registered) {
+      box.innerHTML = "";
+      setText(msgId, "A place opened up: you are registered.");
+      await loadEventsDashboard();
+    } else if (r.ok) {
+      renderWaitlistBox(eventId, r.data);
+    } else {
+      box.innerHTML = "";
+      setText(msgId, (r.data && r.data.error) ? r.data.error : "Failed to check the waitlist.");
+    }
+  };
+
+  box.querySelector(".waitlist-leave-btn").onclick = async () => {
+    const r = await apiLeaveWaitlist(eventId);
+    if (r.ok) {
+      box.innerHTML = "";
+      setText(msgId, "Left the waitlist.");
+    } else {
+      setText(msgId, (r.data && r.data.error) ? r.data.error : "Failed to leave the waitlist.");
+    }
+  };
+}
+
 async function renderMyRequests() {
   const container = document.getElementById("myRequestsContainer");
   if (!container) return;
@@ -520,7 +741,13 @@ async function renderMyRequests() {
     return;
   }
 
-  const items = r.data || [];
+  renderMyRequestsList(r.data || []);
+}
+
+function renderMyRequestsList(items) {
+  const container = document.getElementById("myRequestsContainer");
+  if (!container) return;
+
   container.innerHTML = "";
 
   for (const req of items) {
@@ -618,9 +845,8 @@ function initEventsPage() {
     }
   };
 
-  renderEventsPage();
-  renderMyRegisteredEvents();
-  renderMyRequests();
+  initEventsFilters();
+  loadEventsDashboard();
 }
 
 // -------------------------
@@ -843,6 +1069,7 @@ function initDemoInboxPage() {
     setText("demoMsg", "Pending verification found.");
     document.getElementById("demoCreatedAt").textContent = "Created at: " + r.data.created_at;
     document.getElementById("demoLastSentAt").textContent = "Last sent at: " + r.data.last_sent_at;
+    setText("demoExpiresAt", "Expires at: " + (r.data.expires_at || "-"));
     if (box) box.style.display = "block";
   };
 
@@ -0,0 +1,96 @@
+# sweeper.py
+import sqlite3
+import threading
+import time
+from typing import Any, Dict
+
+import auth
+from periodic import PeriodicJob
+
+
+class VerificationSweeper(PeriodicJob):
+    """
+    Background thread that deletes expired email_verifications rows.
+
+    Rows are removed in small batches, each in its own short transaction, so
+    the writer lock is released between batches and request handlers are
+    never blocked for long.
+    """
+
+    thread_name = "verification-sweeper"
+
+    def __init__(self, db_path: str, interval_seconds: float = 300, batch_size: int = 500,
+                 pause_seconds: float = 0.05):
+        super().__init__(interval_seconds)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "runs": 0,
+            "batches": 0,
+            "deleted_total": 0,
+            "last_run_at": None,
+            "last_deleted": 0,
+            "last_duration_ms": 0.0,
+            "last_rows_per_second": 0.0,
+            "table_rows": None,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=5)
+        db.execute("PRAGMA busy_timeout = 5000;")
+        return db
+
+    def sweep_once(self) -> int:
+        started = time.perf_counter()
+        cutoff = auth.expiry_cutoff_ts()
+        deleted = 0
+        batches = 0
+
+        db = self._connect()
+        try:
+            while not self._stop.is_set():
+                cur = db.execute(
+                    """
+                    DELETE FROM email_verifications
+                    WHERE id IN (
+                      SELECT id FROM email_verifications
+                      WHERE last_sent_ts < ?
+                      ORDER BY last_sent_ts
+                      LIMIT ?
+                    )
+                    """,
+                    (cutoff, self.batch_size),
+                )
+                db.commit()
+                batches += 1
+                deleted += cur.rowcount
+                if cur.rowcount < self.batch_size:
+                    break
+                time.sleep(self.pause_seconds)
+
+            table_rows = db.execute("SELECT COUNT(*) FROM email_verifications").fetchone()[0]
+        finally:
+            db.close()
+
+        duration = time.perf_counter() - started
+        with self._lock:
+            s = self._stats
+            s["runs"] += 1
+            s["batches"] += batches
+            s["deleted_total"] += deleted
+            s["last_run_at"] = auth._now_iso()
+            s["last_deleted"] = deleted
+            s["last_duration_ms"] = round(duration * 1000, 2)
+            s["last_rows_per_second"] = round(deleted / duration, 1) if duration > 0 else 0.0
+            s["table_rows"] = int(table_rows)
+        return deleted
+
+    def run_once(self):
+        self.sweep_once()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,45 @@
+# tests/conftest.py
+"""
+Shared fixtures: a fresh app per test on a temporary instance folder, and
+logged-in test clients.
+
+Run with: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+
+ADMIN_EMAIL = "admin@uni-bayreuth.de"
+ADMIN_PASSWORD = "admin123"
+
+
+@pytest.fixture()
+def app(tmp_path):
+    return create_app(instance_path=str(tmp_path), start_background=False)
+
+
+@pytest.fixture()
+def student(app):
+    """student(n) -> test client logged in as a new verified student."""
+    def make(n: int):
+        client = app.test_client()
+        email = f"student{n}@uni-bayreuth.de"
+        client.post("/api/auth/register", json={"email": email, "password": "secret1"})
+        code = client.get(f"/api/demo/last-code?email={email}").get_json()["code"]
+        client.post("/api/auth/verify", json={"email": email, "code": code})
+        assert client.post("/api/auth/login", json={"email": email, "password": "secret1"}).status_code == 200
+        client.email = email
+        return client
+    return make
+
+
+@pytest.fixture()
+def admin(app):
+    client = app.test_client()
+    assert client.post("/api/auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}).status_code == 200
+    return client
@@ -0,0 +1,35 @@
+# tests/test_batch.py
+"""
+POST /api/batch: sub-calls share one connection, so one call must never
+leave a transaction open for the next.
+"""
+
+
+def _rejected_request(student_client, admin) -> int:
+    student_client.post("/api/event-requests", json={
+        "email": student_client.email, "title": "Movie night", "category": "social",
+        "date_time": "2030-01-10T19:00", "location": "Common room", "description": "Films",
+    })
+    req = [r for r in admin.get("/api/admin/event-requests?status=pending").get_json() if r["title"] == "Movie night"][0]
+    admin.post(f"/api/admin/event-requests/{req['id']}/decision", json={"action": "reject", "comment": "no"})
+    return req["id"]
+
+
+def test_failed_insert_does_not_break_later_calls(student, admin):
+    client = student(1)
+    req_id = _rejected_request(client, admin)
+    hide = {"method": "POST", "path": f"/api/event-requests/{req_id}/hide", "body": {"email": client.email}}
+    join = {"method": "POST", "path": "/api/rooms/1/join", "body": {"email": client.email}}
+
+    resp = client.post("/api/batch", json={"requests": [
+        hide,
+        hide,  # duplicate: IntegrityError inside the handler
+        {"method": "GET", "path": "/api/me/dashboard"},  # BEGIN
+        join,
+        join,  # already in a room: IntegrityError inside the handler
+        {"method": "GET", "path": "/api/changes"},  # BEGIN
+    ]})
+
+    assert resp.status_code == 200
+    statuses = [r["status"] for r in resp.get_json()["responses"]]
+    assert statuses == [200, 200, 200, 200, 409, 200]
@@ -0,0 +1,28 @@
+# tests/test_pages.py
+"""
+Student pages (/rooms, /events) and the APIs behind them: query argument handling.
+"""
+import pytest
+
+
+@pytest.mark.parametrize("query", ["page=abc", "page_size=x", "when=bogus"])
+def test_bad_query_falls_back_to_the_shell(student, query):
+    client = student(1)
+    resp = client.get(f"/events?{query}")
+    assert resp.status_code == 200
+    assert b'id="eventsContainer"' in resp.data
+    assert b'id="initialData"' not in resp.data
+
+
+def test_events_page_is_rendered_for_students(student):
+    resp = student(1).get("/events?when=all")
+    assert resp.status_code == 200
+    assert b'id="initialData"' in resp.data
+    assert b"event-btn" in resp.data
+
+
+@pytest.mark.parametrize("path", ["/api/me/dashboard", "/api/events"])
+def test_bad_page_is_a_400(student, path):
+    resp = student(1).get(f"{path}?page=abc")
+    assert resp.status_code == 400
+    assert resp.get_json() == {"error": "page and page_size must be integers"}
@@ -0,0 +1,69 @@
+# tests/test_waitlist.py
+"""
+Waitlist promotion on leave (POST /api/events/<id>/leave).
+"""
+import sqlite3
+
+from db import get_db_path
+
+NOW = "2026-01-01T00:00:00+00:00"
+
+
+def _event(app, title: str, date_time: str, quota=None) -> int:
+    db = sqlite3.connect(get_db_path(app))
+    try:
+        cur = db.execute(
+            """
+            INSERT INTO events (title, category, date_time, location, description, quota, created_at)
+            VALUES (?, 'social', ?, 'Hall', '', ?, ?)
+            """,
+            (title, date_time, quota, NOW),
+        )
+        db.commit()
+        return cur.lastrowid
+    finally:
+        db.close()
+
+
+def test_leave_promotes_head_of_waitlist(app, student):
+    full = _event(app, "Full", "2030-05-01T18:00", quota=1)
+    a, b = student(1), student(2)
+
+    assert a.post(f"/api/events/{full}/register").status_code == 200
+    assert b.post(f"/api/events/{full}/register").get_json()["can_waitlist"] is True
+    assert b.post(f"/api/events/{full}/waitlist").get_json()["position"] == 1
+
+    assert a.post(f"/api/events/{full}/leave").get_json()["promoted"] == 1
+    assert b.get(f"/api/events/{full}/waitlist").get_json() == {"registered": True, "position": None}
+
+
+def test_promotion_skips_students_with_a_schedule_conflict(app, student):
+    full = _event(app, "Full", "2030-05-01T18:00", quota=1)
+    overlapping = _event(app, "Overlapping", "2030-05-01T19:00")
+    a, b, c = student(1), student(2), student(3)
+
+    assert a.post(f"/api/events/{full}/register").status_code == 200
+    assert b.post(f"/api/events/{full}/waitlist").status_code == 200
+    assert c.post(f"/api/events/{full}/waitlist").status_code == 200
+    # b is first in the queue but is now busy during the event
+    assert b.post(f"/api/events/{overlapping}/register").status_code == 200
+
+    assert a.post(f"/api/events/{full}/leave").get_json()["promoted"] == 1
+
+    assert c.get(f"/api/events/{full}/waitlist").get_json()["registered"] is True
+    waiting = b.get(f"/api/events/{full}/waitlist").get_json()
+    assert waiting["registered"] is False and waiting["position"] == 1
+    assert [e["id"] for e in waiting["conflicts"]] == [overlapping]
+
+
+def test_nobody_promoted_when_every_waiting_student_conflicts(app, student):
+    full = _event(app, "Full", "2030-05-01T18:00", quota=1)
+    overlapping = _event(app, "Overlapping", "2030-05-01T18:30")
+    a, b = student(1), student(2)
+
+    assert a.post(f"/api/events/{full}/register").status_code == 200
+    assert b.post(f"/api/events/{full}/waitlist").status_code == 200
+    assert b.post(f"/api/events/{overlapping}/register").status_code == 200
+
+    assert a.post(f"/api/events/{full}/leave").get_json()["promoted"] == 0
+    assert b.get(f"/api/events/{full}/waitlist").get_json()["position"] == 1